@@ -55,6 +55,14 @@ class BaseAgent(abc.ABC):
 
         pass
 
+    def setMoveTimeLimit(self, seconds):
+        """
+        Inform the agent (before `BaseAgent.registerInitialState`) about how long
+        the rules allow it to take on each move.
+        """
+
+        pass
+
     @staticmethod
     def loadAgent(name, index, args = {}):
         """
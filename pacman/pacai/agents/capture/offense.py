@@ -17,12 +17,11 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
         features['successorScore'] = self.getScore(successor)
 
         # Compute distance to the nearest food.
-        foodList = self.getFood(successor).asList()
+        myPos = successor.getAgentState(self.index).getPosition()
+        minDistance = successor.getFoodDistance(myPos, self.getFood(successor))
 
         # This should always be True, but better safe than sorry.
-        if (len(foodList) > 0):
-            myPos = successor.getAgentState(self.index).getPosition()
-            minDistance = min([self.getMazeDistance(myPos, food) for food in foodList])
+        if (minDistance is not None):
             features['distanceToFood'] = minDistance
 
         return features
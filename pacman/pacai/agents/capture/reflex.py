@@ -13,17 +13,29 @@ class ReflexCaptureAgent(CaptureAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index)
 
+        # The successors of the state currently being evaluated in `chooseAction`.
+        self._successorsState = None
+        self._successors = {}
+
     def chooseAction(self, gameState):
         """
         Picks among the actions with the highest return from `ReflexCaptureAgent.evaluate`.
         """
 
-        actions = gameState.getLegalActions(self.index)
+        # Generate all the successors at once, `getSuccessor` will pick them up.
+        successors = gameState.generateSuccessors(self.index)
+        actions = [action for (action, successor) in successors]
+
+        self._successorsState = gameState
+        self._successors = dict(successors)
 
         start = time.time()
         values = [self.evaluate(gameState, a) for a in actions]
         logging.debug('evaluate() time for agent %d: %.4f' % (self.index, time.time() - start))
 
+        self._successorsState = None
+        self._successors = {}
+
         maxValue = max(values)
         bestActions = [a for a, v in zip(actions, values) if v == maxValue]
 
@@ -34,7 +46,13 @@ class ReflexCaptureAgent(CaptureAgent):
         Finds the next successor which is a grid position (location tuple).
         """
 
-        successor = gameState.generateSuccessor(self.index, action)
+        successor = None
+        if (gameState is self._successorsState):
+            successor = self._successors.get(action)
+
+        if (successor is None):
+            successor = gameState.generateSuccessor(self.index, action)
+
         pos = successor.getAgentState(self.index).getPosition()
 
         if (pos != util.nearestPoint(pos)):
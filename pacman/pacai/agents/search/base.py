@@ -13,6 +13,10 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+
+    Any other arguments that name a parameter of the search function
+    (e.g. `weight` for `pacai.student.search.weightedAStarSearch`
+    or `width` for `pacai.student.search.beamSearch`) are passed to it.
     """
 
     def __init__(self, index,
@@ -27,7 +31,7 @@ class SearchAgent(BaseAgent):
         logging.info('[SearchAgent] using problem type %s.' % (prob))
 
         # Get the search function from the name and heuristic.
-        self.searchFunction = self._fetchSearchFunction(fn, heuristic)
+        self.searchFunction = self._fetchSearchFunction(fn, heuristic, **kwargs)
 
         # The actions the search produced.
         self._actions = []
@@ -53,14 +57,19 @@ class SearchAgent(BaseAgent):
         self._actions = self.searchFunction(problem)  # Find a path.
         self._actionIndex = 0
 
-        totalCost = problem.actionsCost(self._actions)
-
         state.setHighlightLocations(problem.getVisitHistory())
 
-        logging.info('Path found with total cost of %d in %.1f seconds' %
-                (totalCost, time.time() - starttime))
+        if (self._actions is None):
+            # Incomplete searches (e.g. a narrow beam) can fail, then the agent just stops.
+            self._actions = []
+            logging.info('No path found in %.1f seconds' % (time.time() - starttime))
+        else:
+            totalCost = problem.actionsCost(self._actions)
+            logging.info('Path found with total cost of %d in %.1f seconds' %
+                    (totalCost, time.time() - starttime))
 
         logging.info('Search nodes expanded: %d' % problem.getExpandedCount())
+        logging.info('Search nodes stored (high-water mark): %d' % problem.getMaxStoredNodes())
 
     def getAction(self, state):
         """
@@ -76,25 +85,34 @@ class SearchAgent(BaseAgent):
 
         return action
 
-    def _fetchSearchFunction(self, functionName, heuristicName):
+    def _fetchSearchFunction(self, functionName, heuristicName, **kwargs):
         """
         Get the specified search function by name.
         If that function also takes a heurisitc (i.e. has a parameter called "heuristic"),
-        then return a lambda that binds the heuristic to the function.
+        or any other parameter named in the keyword arguments,
+        then return a lambda that binds them to the function.
         """
 
         # Locate the function.
         function = reflection.qualifiedImport(functionName)
 
+        # Keep the options that the function takes.
+        parameters = function.__code__.co_varnames[:function.__code__.co_argcount]
+        options = {name: value for (name, value) in kwargs.items() if name in parameters}
+        if (len(options) > 0):
+            logging.info('[SearchAgent] using search options %s.' % (options))
+
         # Check if the function has a heuristic.
-        if 'heuristic' not in function.__code__.co_varnames:
+        if 'heuristic' in parameters:
+            # Fetch the heuristic.
+            options['heuristic'] = reflection.qualifiedImport(heuristicName)
+            logging.info('[SearchAgent] using function %s and heuristic %s.' %
+                    (functionName, heuristicName))
+        else:
             logging.info('[SearchAgent] using function %s.' % (functionName))
-            return function
 
-        # Fetch the heuristic.
-        heuristic = reflection.qualifiedImport(heuristicName)
-        logging.info('[SearchAgent] using function %s and heuristic %s.' %
-                (functionName, heuristicName))
+        if (len(options) == 0):
+            return function
 
-        # Bind the heuristic.
-        return lambda x: function(x, heuristic = heuristic)
+        # Bind the heuristic and options.
+        return lambda x: function(x, **options)
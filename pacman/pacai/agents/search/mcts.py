@@ -0,0 +1,457 @@
+"""
+Monte Carlo tree search (with UCT).
+
+Instead of searching every move to a fixed depth, the searcher grows a tree
+towards the moves that look best (and least explored),
+valuing each new node with a rollout of quick moves to the end of the game (or a depth limit).
+
+The searcher works for both pacman (where Pacman is up against the ghosts)
+and capture (where a team is up against the other team),
+e.g. `-p MCTSAgent --agent-args timeBudget=auto` or `--red pacai.core.mctsTeam`.
+"""
+
+import logging
+import math
+import multiprocessing
+import random
+import time
+
+from pacai.agents.base import BaseAgent
+from pacai.agents.search.multiagent import AUTO_TIME_BUDGET
+from pacai.agents.search.multiagent import AUTO_TIME_BUDGET_FRACTION
+from pacai.agents.search.parallel import SearchPool
+from pacai.agents.search.parallel import getWorkerAgent
+from pacai.agents.search.parallel import getWorkerState
+from pacai.core.directions import Directions
+from pacai.util import reflection
+
+ROLLOUT_RANDOM = 'random'
+ROLLOUT_GREEDY = 'greedy'
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_EXPLORATION = math.sqrt(2)
+
+# The number of moves (by single agents) in each rollout.
+DEFAULT_ROLLOUT_DEPTH = 20
+
+# The chance that a greedy rollout takes a random move instead.
+DEFAULT_ROLLOUT_EPSILON = 0.1
+
+class MCTSNode(object):
+    """
+    A node of the search tree, with the agent to move at this node.
+    Values are from the point of view of the searcher's side.
+    """
+
+    __slots__ = ('state', 'agentIndex', 'parent', 'action', 'children', 'untried',
+            'visits', 'value')
+
+    def __init__(self, state, agentIndex, parent = None, action = None):
+        self.state = state
+        self.agentIndex = agentIndex
+        self.parent = parent
+        self.action = action
+
+        self.children = []
+        # Actions that have no child yet (None until the node is first expanded).
+        self.untried = None
+
+        self.visits = 0
+        self.value = 0.0
+
+    def isFullyExpanded(self):
+        return self.untried is not None and len(self.untried) == 0
+
+class MCTSAgent(BaseAgent):
+    """
+    A Monte Carlo tree search agent.
+
+    Each search runs a number of iterations (select, expand, rollout, backup),
+    either a fixed number (iterations) or as many as fit in a timeBudget
+    (in seconds, or 'auto' to derive it from the rules' move time limits).
+    The move taken is the most visited one at the root.
+
+    The rolloutPolicy is 'random', 'greedy' (by the evaluation function),
+    or the fully qualified name of a function that takes (state, agentIndex)
+    and returns an action.
+
+    The tree is kept between moves (unless reuseTree is false),
+    and the searches can be split over a number of worker processes,
+    which each grow their own tree and add up the visits at the root.
+    """
+
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', iterations = None,
+            timeBudget = None, exploration = DEFAULT_EXPLORATION,
+            rolloutPolicy = ROLLOUT_RANDOM, rolloutDepth = DEFAULT_ROLLOUT_DEPTH,
+            rolloutEpsilon = DEFAULT_ROLLOUT_EPSILON, reuseTree = True, workers = 0, **kwargs):
+        super().__init__(index)
+
+        # Everything the workers need to make the same searcher (see `getSearchSpec`).
+        self._searchArgs = {
+            'evalFn': evalFn,
+            'exploration': exploration,
+            'rolloutPolicy': rolloutPolicy,
+            'rolloutDepth': rolloutDepth,
+            'rolloutEpsilon': rolloutEpsilon,
+            'reuseTree': reuseTree,
+        }
+
+        self._evaluationFunction = reflection.qualifiedImport(evalFn)
+
+        if (timeBudget is not None and timeBudget != AUTO_TIME_BUDGET):
+            timeBudget = float(timeBudget)
+            if (timeBudget <= 0):
+                raise ValueError('Time budget must be positive, got %f.' % (timeBudget))
+
+        if (iterations is None and timeBudget is None):
+            iterations = DEFAULT_ITERATIONS
+
+        if (iterations is not None):
+            iterations = int(iterations)
+            if (iterations <= 0):
+                raise ValueError('Iterations must be positive, got %d.' % (iterations))
+
+        self._iterations = iterations
+        self._timeBudget = timeBudget
+        self._moveTimeLimit = None
+
+        self._exploration = float(exploration)
+        self._rolloutDepth = int(rolloutDepth)
+        self._rolloutEpsilon = float(rolloutEpsilon)
+
+        if (rolloutPolicy == ROLLOUT_RANDOM):
+            self._rolloutPolicy = self._randomRolloutAction
+        elif (rolloutPolicy == ROLLOUT_GREEDY):
+            self._rolloutPolicy = self._greedyRolloutAction
+        else:
+            self._rolloutPolicy = reflection.qualifiedImport(rolloutPolicy)
+
+        self._reuseTree = (str(reuseTree).lower() not in ('false', '0'))
+        self._root = None
+
+        # The range of the values seen in the current tree (to normalize them for UCT).
+        self._minValue = float('inf')
+        self._maxValue = float('-inf')
+
+        self._workers = int(workers)
+        self._searchPool = None
+
+        self._numSearches = 0
+        self._totalIterations = 0
+        self._numReused = 0
+
+    def final(self, state):
+        if (self._searchPool is not None):
+            self._searchPool.close()
+            self._searchPool = None
+
+        self._root = None
+
+        if (self._numSearches > 0):
+            logging.info('Agent %d MCTS: %d searches, %d iterations (%.1f per search), '
+                    % (self.index, self._numSearches, self._totalIterations,
+                    self._totalIterations / self._numSearches)
+                    + '%d trees reused.' % (self._numReused))
+
+    def getAction(self, state):
+        deadline = None
+        timeBudget = self.getTimeBudget()
+        if (timeBudget is not None):
+            deadline = time.time() + timeBudget
+
+        if (self._workers > 1 and not multiprocessing.current_process().daemon):
+            return self._getParallelAction(state, deadline)
+
+        root = self.search(state, self._iterations, deadline)
+        stats = [(child.action, child.visits, child.value) for child in root.children]
+
+        return self._chooseAction(state, stats)
+
+    def getSearchSpec(self):
+        """
+        Get a picklable (class name, index, args) to make the same searcher in another process.
+        """
+
+        name = '%s.%s' % (type(self).__module__, type(self).__qualname__)
+        return (name, self.index, dict(self._searchArgs))
+
+    def getSearchStats(self):
+        return {
+            'searches': self._numSearches,
+            'iterations': self._totalIterations,
+            'reused': self._numReused,
+        }
+
+    def getTimeBudget(self):
+        """
+        Get the number of seconds to search for each move,
+        or None if searches are a fixed number of iterations.
+        """
+
+        if (self._timeBudget == AUTO_TIME_BUDGET):
+            if (self._moveTimeLimit is None):
+                return None
+
+            return self._moveTimeLimit * AUTO_TIME_BUDGET_FRACTION
+
+        return self._timeBudget
+
+    def search(self, state, iterations = None, deadline = None):
+        """
+        Grow the tree at the state until the iterations are done or the deadline passes
+        (at least one iteration is always run).
+        Returns the root of the tree.
+        """
+
+        root = self._getRoot(state)
+
+        count = 0
+        while (True):
+            self._runIteration(root)
+            count += 1
+
+            if (iterations is not None and count >= iterations):
+                break
+
+            if (deadline is not None and time.time() >= deadline):
+                break
+
+        self._numSearches += 1
+        self._totalIterations += count
+
+        logging.debug('Agent %d ran %d MCTS iterations (%d root visits).'
+                % (self.index, count, root.visits))
+
+        if (self._reuseTree):
+            self._root = root
+
+        return root
+
+    def setMoveTimeLimit(self, seconds):
+        self._moveTimeLimit = seconds
+
+    def _backup(self, node, value):
+        self._minValue = min(self._minValue, value)
+        self._maxValue = max(self._maxValue, value)
+
+        while (node is not None):
+            node.visits += 1
+            node.value += value
+            node = node.parent
+
+    def _chooseAction(self, state, stats):
+        """
+        Choose the most visited action (breaking ties by the mean value)
+        from a list of (action, visits, value).
+        """
+
+        best = None
+        bestKey = None
+
+        for (action, visits, value) in stats:
+            key = (visits, value / max(1, visits))
+            if (bestKey is None or key > bestKey):
+                best = action
+                bestKey = key
+
+        if (best is None):
+            return state.getLegalActions(self.index)[0]
+
+        return best
+
+    def _evaluate(self, state):
+        """
+        Evaluate a state from the point of view of the searcher's side.
+        """
+
+        value = self._evaluationFunction(state)
+        if (not self._raisesScore(state, self.index)):
+            value = -value
+
+        return value
+
+    def _getParallelAction(self, state, deadline):
+        if (self._searchPool is not None and not self._searchPool.isForState(state)):
+            self._searchPool.close()
+            self._searchPool = None
+
+        if (self._searchPool is None):
+            self._searchPool = SearchPool(self._workers, state)
+
+        iterations = None
+        if (self._iterations is not None):
+            iterations = int(math.ceil(self._iterations / self._workers))
+
+        snapshot = state.getSnapshot()
+        spec = self.getSearchSpec()
+        tasks = [(spec, snapshot, iterations, deadline, random.getrandbits(32))
+                for i in range(self._workers)]
+
+        # Add up the visits (and values) of each root action over all the trees.
+        totals = {}
+        for (iterationCount, stats) in self._searchPool.imap(_searchTask, tasks):
+            self._totalIterations += iterationCount
+
+            for (action, visits, value) in stats:
+                oldVisits, oldValue = totals.get(action, (0, 0.0))
+                totals[action] = (oldVisits + visits, oldValue + value)
+
+        self._numSearches += 1
+
+        stats = [(action, visits, value) for (action, (visits, value)) in totals.items()]
+        return self._chooseAction(state, stats)
+
+    def _getRoot(self, state):
+        """
+        Get the node for the state from the last search's tree (if it can be found),
+        or a new root.
+        """
+
+        numAgents = state.getNumAgents()
+
+        if (self._root is not None):
+            # The state should be one round (every agent moving once) below the old root.
+            frontier = [self._root]
+            for i in range(numAgents):
+                frontier = [child for node in frontier for child in node.children]
+
+            stateHash = hash(state)
+            for node in frontier:
+                if (node.agentIndex == self.index and hash(node.state) == stateHash
+                        and node.state == state):
+                    node.parent = None
+                    node.action = None
+                    self._numReused += 1
+
+                    return node
+
+        self._minValue = float('inf')
+        self._maxValue = float('-inf')
+
+        return MCTSNode(state, self.index)
+
+    def _greedyRolloutAction(self, state, agentIndex):
+        if (random.random() < self._rolloutEpsilon):
+            return self._randomRolloutAction(state, agentIndex)
+
+        sign = 1
+        if (not self._raisesScore(state, agentIndex)):
+            sign = -1
+
+        best = []
+        bestValue = float('-inf')
+
+        for (action, successor) in state.generateSuccessors(agentIndex):
+            if (action == Directions.STOP):
+                continue
+
+            value = sign * self._evaluationFunction(successor)
+            if (value > bestValue):
+                best = [action]
+                bestValue = value
+            elif (value == bestValue):
+                best.append(action)
+
+        if (len(best) == 0):
+            return Directions.STOP
+
+        return random.choice(best)
+
+    def _isTeammate(self, state, agentIndex):
+        return self._raisesScore(state, agentIndex) == self._raisesScore(state, self.index)
+
+    def _raisesScore(self, state, agentIndex):
+        """
+        Check if the agent is on the side that is trying to raise the score:
+        red in capture, and Pacman in pacman.
+        """
+
+        if (hasattr(state, 'isOnRedTeam')):
+            return state.isOnRedTeam(agentIndex)
+
+        return (agentIndex == 0)
+
+    def _randomRolloutAction(self, state, agentIndex):
+        legalActions = state.getLegalActions(agentIndex)
+        moves = [action for action in legalActions if action != Directions.STOP]
+
+        return random.choice(moves or legalActions)
+
+    def _rollout(self, state, agentIndex):
+        numAgents = state.getNumAgents()
+
+        for i in range(self._rolloutDepth):
+            if (state.isOver()):
+                break
+
+            action = self._rolloutPolicy(state, agentIndex)
+            state = state.generateSuccessor(agentIndex, action)
+            agentIndex = (agentIndex + 1) % numAgents
+
+        return self._evaluate(state)
+
+    def _runIteration(self, root):
+        numAgents = root.state.getNumAgents()
+
+        # Select: walk down the tree while every move has been tried.
+        node = root
+        while (not node.state.isOver() and node.isFullyExpanded()):
+            node = self._selectChild(node)
+
+        # Expand: try a new move.
+        if (not node.state.isOver()):
+            if (node.untried is None):
+                node.untried = list(node.state.getLegalActions(node.agentIndex))
+                random.shuffle(node.untried)
+
+            action = node.untried.pop()
+            successor = node.state.generateSuccessor(node.agentIndex, action)
+
+            child = MCTSNode(successor, (node.agentIndex + 1) % numAgents, node, action)
+            node.children.append(child)
+            node = child
+
+        # Rollout and back up the value.
+        self._backup(node, self._rollout(node.state, node.agentIndex))
+
+    def _selectChild(self, node):
+        """
+        Select the child with the best upper confidence bound (UCT)
+        for the agent to move at the node.
+        """
+
+        valueRange = self._maxValue - self._minValue
+        teammate = self._isTeammate(node.state, node.agentIndex)
+        logVisits = math.log(node.visits)
+
+        best = None
+        bestScore = float('-inf')
+
+        for child in node.children:
+            # The mean value, normalized to [0, 1] (from the point of view of the mover).
+            mean = 0.5
+            if (valueRange > 0):
+                mean = (child.value / child.visits - self._minValue) / valueRange
+
+            if (not teammate):
+                mean = 1.0 - mean
+
+            score = mean + self._exploration * math.sqrt(logVisits / child.visits)
+            if (score > bestScore):
+                best = child
+                bestScore = score
+
+        return best
+
+def _searchTask(task):
+    spec, snapshot, iterations, deadline, seed = task
+
+    random.seed(seed)
+
+    agent = getWorkerAgent(spec)
+    oldIterations = agent.getSearchStats()['iterations']
+
+    root = agent.search(getWorkerState(snapshot), iterations, deadline)
+
+    stats = [(child.action, child.visits, child.value) for child in root.children]
+    return (agent.getSearchStats()['iterations'] - oldIterations, stats)
@@ -1,19 +1,416 @@
+import logging
+import multiprocessing
+import time
+
 from pacai.agents.base import BaseAgent
+from pacai.agents.search.ordering import DEFAULT_EVAL_DEPTH
+from pacai.agents.search.ordering import MoveOrdering
+from pacai.agents.search.ordering import parseOrderings
+from pacai.agents.search.parallel import RootParallelSearch
+from pacai.agents.search.transposition import REPLACE_DEPTH
+from pacai.agents.search.transposition import TranspositionTable
+from pacai.core.directions import Directions
 from pacai.util import reflection
 
+# A time budget of 'auto' uses this fraction of the rules' time limit for each move.
+AUTO_TIME_BUDGET = 'auto'
+AUTO_TIME_BUDGET_FRACTION = 0.5
+
+# Iterative deepening will never search deeper than this.
+MAX_ITERATIVE_DEPTH = 64
+
+class SearchTimeout(Exception):
+    """
+    Raised by `MultiAgentSearchAgent.checkTime` (and `MultiAgentSearchAgent.visitNode`)
+    when a search is out of time.
+    """
+
+    pass
+
 class MultiAgentSearchAgent(BaseAgent):
     """
     A common class for all multi-agent searchers.
+
+    Searchers can keep a `pacai.agents.search.transposition.TranspositionTable`
+    for a whole game by passing a tableSize (and optionally a tableReplacement policy),
+    e.g. `--agent-args depth=3,tableSize=100000,tableReplacement=always`.
+
+    Searchers can also be given a timeBudget (in seconds, or 'auto' to derive it from the
+    rules' move time limits), in which case they will search with iterative deepening
+    (see `MultiAgentSearchAgent.runSearch`) instead of to a fixed depth,
+    e.g. `--agent-args timeBudget=auto`.
+
+    Searchers that prune can reorder their moves with a '+' separated list of orderings
+    (see `pacai.agents.search.ordering`), e.g. `--agent-args ordering=eval+killer+history`.
+
+    Searchers that implement `MultiAgentSearchAgent.getSubtreeValue` can split the moves at the
+    root over a number of worker processes (see `pacai.agents.search.parallel`),
+    e.g. `--agent-args depth=4,workers=8`.
     """
 
-    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2, **kwargs):
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2,
+            tableSize = 0, tableReplacement = REPLACE_DEPTH,
+            timeBudget = None, maxDepth = MAX_ITERATIVE_DEPTH,
+            ordering = None, orderingDepth = DEFAULT_EVAL_DEPTH, workers = 0, **kwargs):
         super().__init__(index)
 
+        # Everything the workers need to make the same searcher (see `getSearchSpec`).
+        self._searchArgs = {
+            'evalFn': evalFn,
+            'tableSize': tableSize,
+            'tableReplacement': tableReplacement,
+            'ordering': ordering,
+            'orderingDepth': orderingDepth,
+        }
+
         self._evaluationFunction = reflection.qualifiedImport(evalFn)
         self._treeDepth = int(depth)
 
+        self._transpositionTable = None
+        if (int(tableSize) > 0):
+            self._transpositionTable = TranspositionTable(tableSize, tableReplacement)
+
+        if (timeBudget is not None and timeBudget != AUTO_TIME_BUDGET):
+            timeBudget = float(timeBudget)
+            if (timeBudget <= 0):
+                raise ValueError('Time budget must be positive, got %f.' % (timeBudget))
+
+        self._timeBudget = timeBudget
+        self._maxDepth = int(maxDepth)
+        self._moveTimeLimit = None
+
+        # Only set while an iterative deepening search is running.
+        self._deadline = None
+        self._previousBestAction = None
+
+        self._ordering = None
+        orderings = parseOrderings(ordering)
+        if (len(orderings) > 0):
+            self._ordering = MoveOrdering(orderings, orderingDepth)
+
+        # Search statistics (see `MultiAgentSearchAgent.getSearchStats`).
+        self._searchNodes = 0
+        self._searchCutoffs = 0
+        self._numSearches = 0
+        self._totalNodes = 0
+        self._totalCutoffs = 0
+        self._totalBranchingFactor = 0.0
+
+        self._workers = int(workers)
+        self._parallelSearch = None
+
+        if (self._workers > 1
+                and type(self).getSubtreeValue is MultiAgentSearchAgent.getSubtreeValue):
+            logging.warning('%s cannot search in parallel, ignoring workers.'
+                    % (type(self).__name__))
+            self._workers = 0
+
+    def canPrune(self):
+        """
+        Check if this searcher prunes with its (alpha, beta) window,
+        in which case parallel searches will find a bound before splitting the root.
+        """
+
+        return False
+
+    def checkTime(self):
+        """
+        Searchers should call this (or `MultiAgentSearchAgent.visitNode`) at every node.
+        Raises `SearchTimeout` if the current search is out of time.
+        """
+
+        if (self._deadline is not None and time.time() > self._deadline):
+            raise SearchTimeout()
+
+    def final(self, state):
+        if (self._parallelSearch is not None):
+            self._parallelSearch.close()
+            self._parallelSearch = None
+
+        if (self._transpositionTable is not None):
+            self._transpositionTable.logStats('Agent %d transposition table' % (self.index))
+
+        stats = self.getSearchStats()
+        if (stats['searches'] > 0):
+            logging.info(('Agent %d search: %d searches, %d nodes (%.1f per search), '
+                    + '%d cutoffs, effective branching factor %.2f.') % (self.index,
+                    stats['searches'], stats['nodes'], stats['meanNodes'], stats['cutoffs'],
+                    stats['meanBranchingFactor']))
+
     def getEvaluationFunction(self):
         return self._evaluationFunction
 
+    def getOrderedSuccessors(self, state, agentIndex, depth):
+        """
+        Get the (action, successor) pairs for an agent at the given depth of the search,
+        with the most promising action first:
+        the best action of the previous iteration at the root,
+        and the best action from a shallower search (in the transposition table) elsewhere.
+        The rest of the actions are sorted by the move ordering (if any).
+
+        Only the actions are ordered, and each successor is generated when the search gets to it
+        (so moves that are pruned are never generated).
+        Where the move ordering evaluates the successors ('eval' near the root),
+        they are all generated up front.
+        """
+
+        bestAction = None
+        if (depth == 0 and agentIndex == self.index):
+            bestAction = self._previousBestAction
+        elif (self._transpositionTable is not None):
+            bestAction = self._transpositionTable.getMove(state, agentIndex,
+                    self.getTreeDepth() - depth - 1)
+
+        if (self._ordering is not None and self._ordering.needsSuccessors(depth)):
+            return self._ordering.order(state, agentIndex, depth,
+                    state.generateSuccessors(agentIndex), agentIndex == self.index,
+                    self._evaluationFunction, bestAction)
+
+        actions = list(state.getLegalActions(agentIndex))
+
+        if (self._ordering is not None):
+            actions = self._ordering.orderActions(state, agentIndex, depth, actions, bestAction)
+        elif (bestAction in actions):
+            actions.remove(bestAction)
+            actions.insert(0, bestAction)
+
+        return state.iterSuccessors(agentIndex, actions)
+
+    def getSearchSpec(self):
+        """
+        Get a picklable (class name, index, args) to make the same searcher in another process.
+        """
+
+        name = '%s.%s' % (type(self).__module__, type(self).__qualname__)
+        return (name, self.index, dict(self._searchArgs))
+
+    def getSearchStats(self):
+        """
+        Get statistics over all the searches so far.
+        The effective branching factor of a search is the b where b^d is the number of nodes
+        searched to reach a depth of d plies (so it is lower when more of the tree is pruned).
+        """
+
+        meanNodes = 0.0
+        meanBranchingFactor = 0.0
+        if (self._numSearches > 0):
+            meanNodes = self._totalNodes / self._numSearches
+            meanBranchingFactor = self._totalBranchingFactor / self._numSearches
+
+        return {
+            'searches': self._numSearches,
+            'nodes': self._totalNodes,
+            'cutoffs': self._totalCutoffs,
+            'meanNodes': meanNodes,
+            'meanBranchingFactor': meanBranchingFactor,
+        }
+
+    def getSubtreeValue(self, state, agentIndex, depth, alpha, beta):
+        """
+        Get the value of the subtree at the state, where the agent is to move at the given depth
+        (to `MultiAgentSearchAgent.getTreeDepth`).
+        The (alpha, beta) window can be used by searchers that prune.
+
+        Searchers that implement this can search in parallel.
+        """
+
+        raise NotImplementedError('%s does not implement getSubtreeValue().'
+                % (type(self).__name__))
+
+    def getTimeBudget(self):
+        """
+        Get the number of seconds to search for each move,
+        or None if searches are to a fixed depth.
+        """
+
+        if (self._timeBudget == AUTO_TIME_BUDGET):
+            if (self._moveTimeLimit is None):
+                return None
+
+            return self._moveTimeLimit * AUTO_TIME_BUDGET_FRACTION
+
+        return self._timeBudget
+
+    def getTranspositionTable(self):
+        """
+        Get the transposition table, or None if this searcher does not use one.
+        """
+
+        return self._transpositionTable
+
     def getTreeDepth(self):
+        """
+        Get the depth to search to.
+        During iterative deepening, this is the depth of the current iteration.
+        """
+
         return self._treeDepth
+
+    def newSearch(self):
+        """
+        Called at the start of each search (see `MultiAgentSearchAgent.runSearch`).
+        """
+
+        if (self._transpositionTable is not None):
+            self._transpositionTable.newSearch()
+
+        if (self._ordering is not None):
+            self._ordering.newSearch()
+
+        self._searchNodes = 0
+        self._searchCutoffs = 0
+
+    def recordCutoff(self, state, agentIndex, depth, action):
+        """
+        Searchers that prune should call this when an action causes a cutoff
+        (so that the move ordering can try it earlier next time).
+        """
+
+        self._searchCutoffs += 1
+
+        if (self._ordering is not None):
+            self._ordering.recordCutoff(state, agentIndex, depth, action,
+                    self.getTreeDepth() - depth)
+
+    def runSearch(self, state, search):
+        """
+        Run a search for `pacai.agents.base.BaseAgent.getAction`.
+        The search is a function that searches to `MultiAgentSearchAgent.getTreeDepth`
+        and returns the best action.
+
+        Without a time budget, the search is just run once.
+        With a time budget, the search is run to depth 1, 2, 3, ... until the time runs out
+        (the search should call `MultiAgentSearchAgent.visitNode`),
+        and the best action of the deepest finished search is returned.
+        """
+
+        self.newSearch()
+
+        if (self._workers > 1):
+            search = self._getParallelSearch(state, search)
+
+        timeBudget = self.getTimeBudget()
+        if (timeBudget is None):
+            action = search()
+            self._recordSearch(state, self._treeDepth)
+            return action
+
+        fixedDepth = self._treeDepth
+        self._deadline = time.time() + timeBudget
+
+        bestAction = None
+        finishedDepth = 0
+
+        try:
+            for depth in range(1, self._maxDepth + 1):
+                self._treeDepth = depth
+
+                try:
+                    action = search()
+                except SearchTimeout:
+                    break
+
+                bestAction = action
+                finishedDepth = depth
+                self._previousBestAction = action
+        finally:
+            self._treeDepth = fixedDepth
+            self._deadline = None
+            self._previousBestAction = None
+
+        logging.debug('Agent %d searched to depth %d.' % (self.index, finishedDepth))
+        self._recordSearch(state, finishedDepth)
+
+        if (bestAction is None):
+            # Not even a single level could be searched, just take any move.
+            logging.warning('Agent %d ran out of time before finishing a search.' % (self.index))
+
+            legalActions = state.getLegalActions(self.index)
+            moves = [action for action in legalActions if action != Directions.STOP]
+            bestAction = (moves + legalActions)[0]
+
+        return bestAction
+
+    def searchSubtree(self, state, agentIndex, depth, treeDepth, deadline, alpha, beta):
+        """
+        Run `MultiAgentSearchAgent.getSubtreeValue` for a search to the tree depth
+        that has to finish by the deadline (or None).
+        Returns (value, nodes searched), the value is None if the search ran out of time.
+        """
+
+        oldTreeDepth = self._treeDepth
+        oldDeadline = self._deadline
+        oldNodes = self._searchNodes
+
+        self._treeDepth = treeDepth
+        self._deadline = deadline
+
+        try:
+            value = self.getSubtreeValue(state, agentIndex, depth, alpha, beta)
+        except SearchTimeout:
+            value = None
+        finally:
+            self._treeDepth = oldTreeDepth
+            self._deadline = oldDeadline
+
+        return value, self._searchNodes - oldNodes
+
+    def setMoveTimeLimit(self, seconds):
+        self._moveTimeLimit = seconds
+
+    def visitNode(self):
+        """
+        Searchers should call this at every node.
+        Counts the node and raises `SearchTimeout` if the current search is out of time.
+        """
+
+        self._searchNodes += 1
+        self.checkTime()
+
+    def _getParallelSearch(self, state, search):
+        """
+        Get a search that splits the root over the workers,
+        or the given search if that is not possible.
+        """
+
+        if (multiprocessing.current_process().daemon):
+            # Daemon processes (e.g. games played by worker processes) cannot start workers.
+            logging.warning('Agent %d cannot start search workers in a worker process, '
+                    % (self.index) + 'searching serially.')
+            self._workers = 0
+            return search
+
+        if (self._parallelSearch is not None and not self._parallelSearch.isForState(state)):
+            self._parallelSearch.close()
+            self._parallelSearch = None
+
+        if (self._parallelSearch is None):
+            self._parallelSearch = RootParallelSearch(self._workers, state)
+
+        def parallelSearch():
+            action, nodes = self._parallelSearch.search(self, state, self._treeDepth,
+                    self._deadline)
+            self._searchNodes += nodes
+
+            if (action is None):
+                raise SearchTimeout()
+
+            return action
+
+        return parallelSearch
+
+    def _recordSearch(self, state, depth):
+        plies = depth * state.getNumAgents()
+
+        branchingFactor = 0.0
+        if (plies > 0 and self._searchNodes > 0):
+            branchingFactor = self._searchNodes ** (1.0 / plies)
+
+        self._numSearches += 1
+        self._totalNodes += self._searchNodes
+        self._totalCutoffs += self._searchCutoffs
+        self._totalBranchingFactor += branchingFactor
+
+        logging.debug('Agent %d searched %d nodes (%d cutoffs) to %d plies, '
+                % (self.index, self._searchNodes, self._searchCutoffs, plies)
+                + 'effective branching factor %.2f.' % (branchingFactor))
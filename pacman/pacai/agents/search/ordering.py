@@ -0,0 +1,161 @@
+"""
+Move ordering for the multi-agent searchers.
+
+Alpha-beta prunes the most when the best move is searched first,
+so the searchers can reorder each node's moves with any mix of:
+ - 'eval': Sort by the evaluation of each successor (only near the root, since it is costly).
+ - 'killer': Try moves that caused a cutoff at the same ply of the tree (killer moves) first.
+ - 'history': Prefer moves that have caused deep cutoffs in this and earlier searches.
+
+Orderings are given as a '+' separated list, e.g. `--agent-args ordering=eval+killer+history`.
+"""
+
+ORDER_EVAL = 'eval'
+ORDER_KILLER = 'killer'
+ORDER_HISTORY = 'history'
+
+# No ordering (beyond the transposition table's best move).
+ORDER_NONE = 'none'
+
+ORDERINGS = [ORDER_EVAL, ORDER_KILLER, ORDER_HISTORY]
+
+# Evaluation ordering is only used this many rounds (of every agent moving) into the tree.
+DEFAULT_EVAL_DEPTH = 1
+
+# The number of killer moves kept for each ply.
+NUM_KILLERS = 2
+
+# The tiers that moves are sorted into.
+TIER_FIRST = 2
+TIER_KILLER = 1
+TIER_OTHER = 0
+
+class MoveOrdering(object):
+    """
+    Orders (action, successor) pairs at a node of the search tree.
+    Killer moves are kept for a single search, history is kept for the whole game
+    (but decays between searches).
+    """
+
+    def __init__(self, orderings, evalDepth = DEFAULT_EVAL_DEPTH):
+        for ordering in orderings:
+            if (ordering not in ORDERINGS):
+                raise ValueError("Unknown move ordering '%s', choose from: %s." %
+                        (ordering, ', '.join(ORDERINGS)))
+
+        self._useEval = (ORDER_EVAL in orderings)
+        self._useKillers = (ORDER_KILLER in orderings)
+        self._useHistory = (ORDER_HISTORY in orderings)
+        self._evalDepth = int(evalDepth)
+
+        # {(depth, agentIndex): [action, ...]}
+        self._killers = {}
+
+        # {(agentIndex, position, action): score}
+        self._history = {}
+
+    def newSearch(self):
+        self._killers = {}
+
+        # Age the history, so the current position matters more.
+        self._history = {key: score // 2 for (key, score) in self._history.items() if score > 1}
+
+    def needsSuccessors(self, depth):
+        """
+        Check if ordering moves at this depth looks at the successors (eval ordering),
+        otherwise just the actions can be ordered (see `MoveOrdering.orderActions`).
+        """
+
+        return self._useEval and depth < self._evalDepth
+
+    def order(self, state, agentIndex, depth, successors, isMax, evaluationFunction,
+            firstAction = None):
+        """
+        Get the successors in the order they should be searched.
+
+        Args:
+            state: The state at this node.
+            agentIndex: The agent to move at this node.
+            depth: The depth (in rounds of every agent moving) of this node.
+            successors: A list of (action, successor) pairs (which is not modified).
+            isMax: If the agent to move is maximizing (otherwise it is minimizing).
+            evaluationFunction: The evaluation function for eval ordering.
+            firstAction: An action to always search first (e.g. from the transposition table).
+        """
+
+        killers = []
+        if (self._useKillers):
+            killers = self._killers.get((depth, agentIndex), [])
+
+        useEval = self.needsSuccessors(depth)
+
+        position = None
+        if (self._useHistory):
+            position = state.getAgentPosition(agentIndex)
+
+        sign = 1
+        if (not isMax):
+            sign = -1
+
+        def getKey(pair):
+            action, successor = pair
+
+            if (action == firstAction):
+                return (TIER_FIRST, 0, 0)
+
+            if (action in killers):
+                return (TIER_KILLER, -killers.index(action), 0)
+
+            evalScore = 0
+            if (useEval):
+                evalScore = sign * evaluationFunction(successor)
+
+            historyScore = 0
+            if (self._useHistory):
+                historyScore = self._history.get((agentIndex, position, action), 0)
+
+            return (TIER_OTHER, evalScore, historyScore)
+
+        return sorted(successors, key = getKey, reverse = True)
+
+    def orderActions(self, state, agentIndex, depth, actions, firstAction = None):
+        """
+        Get the actions in the order they should be searched,
+        for depths where the successors are not needed (see `MoveOrdering.needsSuccessors`).
+        """
+
+        if (self.needsSuccessors(depth)):
+            raise ValueError('Eval ordering needs the successors at depth %d.' % (depth))
+
+        pairs = self.order(state, agentIndex, depth, [(action, None) for action in actions],
+                True, None, firstAction)
+
+        return [action for (action, successor) in pairs]
+
+    def recordCutoff(self, state, agentIndex, depth, action, remainingDepth):
+        """
+        Remember that the action caused a cutoff.
+        """
+
+        if (self._useKillers):
+            killers = self._killers.setdefault((depth, agentIndex), [])
+            if (action in killers):
+                killers.remove(action)
+
+            killers.insert(0, action)
+            del killers[NUM_KILLERS:]
+
+        if (self._useHistory):
+            key = (agentIndex, state.getAgentPosition(agentIndex), action)
+            self._history[key] = self._history.get(key, 0) + (remainingDepth * remainingDepth)
+
+def parseOrderings(text):
+    """
+    Parse a '+' separated list of orderings (e.g. 'eval+killer').
+    """
+
+    if (text is None):
+        return []
+
+    orderings = [ordering.strip() for ordering in text.split('+')]
+    return [ordering for ordering in orderings if ordering not in ('', ORDER_NONE)]
@@ -0,0 +1,176 @@
+"""
+Root-parallel search for the multi-agent searchers.
+
+The moves at the root of the tree are split over a pool of worker processes.
+For searchers that prune, the first (most promising) move is searched in this process
+to get a bound for its brothers (Young Brothers Wait), then the rest are searched by the workers.
+The best value found so far is shared with the workers (as alpha),
+so they can use it when they start a subtree.
+
+Game states are not pickled for each task.
+The workers get a state of the game (with the layout) once, when the pool is started,
+and each task is just a snapshot of the root
+(see `pacai.core.gamestate.AbstractGameState.getSnapshot`) and the move to the subtree.
+Other searchers can run their own tasks over a `SearchPool`
+(with `getWorkerState` and `getWorkerAgent`).
+"""
+
+import logging
+import multiprocessing
+
+from pacai.agents.base import BaseAgent
+
+# The state of each worker process.
+_workerState = None
+_workerAlpha = None
+_workerAgents = {}
+
+class SearchPool(object):
+    """
+    A pool of search workers for a single game.
+    """
+
+    def __init__(self, workers, state):
+        self._workers = workers
+        self._layout = state.getInitialLayout()
+
+        self._sharedAlpha = multiprocessing.Value('d', float('-inf'), lock = False)
+        self._pool = multiprocessing.Pool(processes = workers, initializer = _initWorker,
+                initargs = (state, self._sharedAlpha))
+
+        logging.debug('Started a pool of %d search workers.' % (workers))
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def isForState(self, state):
+        """
+        Check if this pool was started for the same game (layout) as the state.
+        """
+
+        return self._layout is state.getInitialLayout()
+
+    def imap(self, function, tasks):
+        """
+        Call the function on each task in the workers,
+        and yield the results as soon as they finish (in any order).
+        """
+
+        return self._pool.imap_unordered(function, tasks)
+
+class RootParallelSearch(SearchPool):
+    """
+    A pool of workers that searches the root moves of a single game.
+    """
+
+    def search(self, agent, state, treeDepth, deadline):
+        """
+        Search the state with the agent (see `MultiAgentSearchAgent.getSubtreeValue`).
+        Returns (best action, nodes searched by the workers),
+        the action is None if the search ran out of time.
+        """
+
+        numAgents = state.getNumAgents()
+        nextAgent = (agent.index + 1) % numAgents
+        nextDepth = 0
+        if (nextAgent == 0):
+            nextDepth = 1
+
+        successors = list(agent.getOrderedSuccessors(state, agent.index, 0))
+        if (len(successors) == 1):
+            return successors[0][0], 0
+
+        values = [None] * len(successors)
+        alpha = float('-inf')
+        first = 0
+
+        if (agent.canPrune()):
+            # Search the eldest brother here, to get a bound for the rest.
+            value = agent.searchSubtree(successors[0][1], nextAgent, nextDepth, treeDepth,
+                    deadline, alpha, float('inf'))[0]
+            if (value is None):
+                return None, 0
+
+            values[0] = value
+            alpha = value
+            first = 1
+
+        self._sharedAlpha.value = alpha
+
+        snapshot = state.getSnapshot()
+        spec = agent.getSearchSpec()
+
+        tasks = []
+        for i in range(first, len(successors)):
+            action = successors[i][0]
+            tasks.append((i, spec, snapshot, agent.index, action, nextAgent, nextDepth,
+                    treeDepth, deadline, alpha, float('inf')))
+
+        nodes = 0
+        for (i, (value, taskNodes)) in self.imap(_searchTask, tasks):
+            nodes += taskNodes
+            if (value is None):
+                # Let the rest of the workers finish (they are also out of time).
+                continue
+
+            values[i] = value
+            if (value > self._sharedAlpha.value):
+                self._sharedAlpha.value = value
+
+        if (None in values):
+            return None, nodes
+
+        # Break ties like the serial searchers (the last of the best actions).
+        bestIndex = 0
+        for i in range(len(values)):
+            if (values[i] >= values[bestIndex]):
+                bestIndex = i
+
+        return successors[bestIndex][0], nodes
+
+def _initWorker(state, sharedAlpha):
+    global _workerState, _workerAlpha, _workerAgents
+
+    _workerState = state
+    _workerAlpha = sharedAlpha
+    _workerAgents = {}
+
+def getWorkerAgent(spec):
+    """
+    Get the worker's searcher for a (class name, index, args) spec
+    (see `MultiAgentSearchAgent.getSearchSpec`).
+    Searchers are kept for the whole game, so they keep their transposition tables.
+    """
+
+    key = repr(spec)
+    if (key not in _workerAgents):
+        name, index, args = spec
+        _workerAgents[key] = BaseAgent.loadAgent(name, index, args)
+
+    return _workerAgents[key]
+
+def getWorkerState(snapshot):
+    """
+    Get a state of the worker's game from a snapshot.
+    """
+
+    state = _workerState._initSuccessor()
+    state.loadSnapshot(snapshot)
+
+    return state
+
+def _searchTask(task):
+    (taskIndex, spec, snapshot, rootAgent, action, agentIndex, depth,
+            treeDepth, deadline, alpha, beta) = task
+
+    state = getWorkerState(snapshot).generateSuccessor(rootAgent, action)
+
+    # The bound may have improved since the task was made.
+    alpha = max(alpha, _workerAlpha.value)
+
+    agent = getWorkerAgent(spec)
+    agent.newSearch()
+
+    return taskIndex, agent.searchSubtree(state, agentIndex, depth, treeDepth, deadline,
+            alpha, beta)
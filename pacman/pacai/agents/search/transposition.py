@@ -0,0 +1,171 @@
+"""
+A transposition table for the multi-agent searchers.
+"""
+
+import logging
+
+# Bound types for stored values.
+# EXACT values are the true value of the node,
+# LOWER values are a lower bound (the search failed high),
+# and UPPER values are an upper bound (the search failed low).
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Replacement policies for when two entries map to the same slot.
+# 'always' keeps the newest entry,
+# 'depth' keeps the deeper entry (unless the stored entry is from an older search).
+REPLACE_ALWAYS = 'always'
+REPLACE_DEPTH = 'depth'
+
+REPLACEMENT_POLICIES = [REPLACE_ALWAYS, REPLACE_DEPTH]
+
+DEFAULT_SIZE = 2 ** 18
+
+class TranspositionEntry(object):
+    """
+    A single stored search result.
+    """
+
+    __slots__ = ('key', 'depth', 'value', 'bound', 'move', 'generation')
+
+    def __init__(self, key, depth, value, bound, move, generation):
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.bound = bound
+        self.move = move
+        self.generation = generation
+
+class TranspositionTable(object):
+    """
+    A fixed-size table of search results keyed by the state's (Zobrist) hash,
+    the index of the agent to move, and the remaining search depth.
+
+    The table can be kept for a whole game, so that consecutive searches
+    (which mostly look at the same positions) can reuse each other's work.
+    Call `TranspositionTable.newSearch` at the start of each search,
+    so that entries from older searches are the first to be replaced.
+    """
+
+    def __init__(self, size = DEFAULT_SIZE, replacement = REPLACE_DEPTH):
+        size = int(size)
+        if (size <= 0):
+            raise ValueError('Transposition table size must be positive, got %d.' % (size))
+
+        if (replacement not in REPLACEMENT_POLICIES):
+            raise ValueError(("Unknown transposition table replacement policy '%s', "
+                    + "choose from: %s.") % (replacement, ', '.join(REPLACEMENT_POLICIES)))
+
+        self._size = size
+        self._replacement = replacement
+        self._slots = [None] * size
+        self._generation = 0
+
+        self._probes = 0
+        self._hits = 0
+
+        # Lookups of just the best move (for move ordering), kept apart from the search probes.
+        self._moveProbes = 0
+        self._moveHits = 0
+        self._stores = 0
+        self._replaced = 0
+        self._rejected = 0
+
+    def clear(self):
+        self._slots = [None] * self._size
+
+    def getMove(self, state, agentIndex, depth):
+        """
+        Get the best move stored for this node (e.g. to search it first), or None.
+        These lookups are counted separately from `TranspositionTable.probe`,
+        so they do not change the hit rate of the search.
+        """
+
+        self._moveProbes += 1
+
+        key = (hash(state), agentIndex, depth)
+        entry = self._slots[hash(key) % self._size]
+
+        if (entry is None or entry.key != key):
+            return None
+
+        self._moveHits += 1
+        return entry.move
+
+    def newSearch(self):
+        self._generation += 1
+
+    def probe(self, state, agentIndex, depth):
+        """
+        Get the stored `TranspositionEntry` for this node, or None.
+        """
+
+        self._probes += 1
+
+        key = (hash(state), agentIndex, depth)
+        entry = self._slots[hash(key) % self._size]
+
+        if (entry is None or entry.key != key):
+            return None
+
+        self._hits += 1
+        return entry
+
+    def store(self, state, agentIndex, depth, value, bound = EXACT, move = None):
+        key = (hash(state), agentIndex, depth)
+        index = hash(key) % self._size
+        oldEntry = self._slots[index]
+
+        if (oldEntry is not None and oldEntry.key != key):
+            if (self._replacement == REPLACE_DEPTH and oldEntry.generation == self._generation
+                    and oldEntry.depth > depth):
+                self._rejected += 1
+                return
+
+            self._replaced += 1
+
+        self._slots[index] = TranspositionEntry(key, depth, value, bound, move, self._generation)
+        self._stores += 1
+
+    def getHitRate(self):
+        if (self._probes == 0):
+            return 0.0
+
+        return self._hits / self._probes
+
+    def getNumEntries(self):
+        return self._size - self._slots.count(None)
+
+    def getStats(self):
+        return {
+            'probes': self._probes,
+            'hits': self._hits,
+            'moveProbes': self._moveProbes,
+            'moveHits': self._moveHits,
+            'stores': self._stores,
+            'replaced': self._replaced,
+            'rejected': self._rejected,
+            'entries': self.getNumEntries(),
+            'size': self._size,
+        }
+
+    def logStats(self, name = 'Transposition table'):
+        stats = self.getStats()
+        logging.info(('%s: %d probes, %d hits (%.1f%%), %d move probes, %d move hits, '
+                + '%d stores, %d replaced, %d rejected, %d/%d entries.') % (name,
+                stats['probes'], stats['hits'], 100.0 * self.getHitRate(), stats['moveProbes'],
+                stats['moveHits'], stats['stores'], stats['replaced'], stats['rejected'],
+                stats['entries'], stats['size']))
+
+def getBound(value, alpha, beta):
+    """
+    Get the bound type of a value found with the (alpha, beta) search window.
+    """
+
+    if (value <= alpha):
+        return UPPER
+    elif (value >= beta):
+        return LOWER
+
+    return EXACT
@@ -58,11 +58,19 @@ def getParser(description, name):
 
     parser.add_argument('--record', dest = 'record',
             action = 'store', type = str, default = None,
-            help = 'writes the moves of a game to the named pickle file (default: %(default)s)')
+            help = 'writes the moves of a game to the named replay file (default: %(default)s)')
 
     parser.add_argument('--replay', dest = 'replay',
             action = 'store', type = str, default = None,
-            help = 'load a recorded pickle game file to replay (default: %(default)s)')
+            help = 'load a recorded game file to replay (default: %(default)s)')
+
+    parser.add_argument('--replay-from', dest = 'replayFrom',
+            action = 'store', type = int, default = 0,
+            help = 'start the replay at this move (default: %(default)s)')
+
+    parser.add_argument('--replay-to', dest = 'replayTo',
+            action = 'store', type = int, default = None,
+            help = 'stop the replay at this move (default: the end of the game)')
 
     parser.add_argument('--sprites', dest = 'spritesPath',
             action = 'store', type = str, default = view.DEFAULT_SPRITES,
@@ -72,4 +80,9 @@ def getParser(description, name):
             action = 'store_true', default = False,
             help = 'display output as text only (default: %(default)s)')
 
+    parser.add_argument('--workers', dest = 'workers',
+            action = 'store', type = int, default = 1,
+            help = 'play games in parallel over this many processes, games played by workers '
+                + 'are not displayed (default: %(default)s)')
+
     return parser
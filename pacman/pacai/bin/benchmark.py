@@ -0,0 +1,509 @@
+"""
+Micro-benchmarks for the engine.
+
+Each benchmark is a subcommand, e.g.:
+```
+python -m pacai.bin.benchmark memory --layout mediumClassic --depth 2
+```
+"""
+
+import argparse
+import gc
+import logging
+import os
+import random
+import sys
+import textwrap
+import time
+import tracemalloc
+
+from pacai.agents.base import BaseAgent
+from pacai.agents.search.base import SearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+from pacai.core.search.problem import SearchProblem
+from pacai.util.logs import initLogging
+from pacai.util.logs import updateLoggingLevel
+
+CORNERS_PROBLEM = 'pacai.student.searchAgents.CornersProblem'
+
+REFERENCE_CORNERS_PROBLEM = 'pacai.bin.benchmark.ReferenceCornersProblem'
+REFERENCE_CORNERS_HEURISTIC = 'pacai.bin.benchmark.referenceCornersHeuristic'
+REFERENCE_NAME = 'reference'
+
+class ReferenceCornersProblem(SearchProblem):
+    """
+    The corners problem as it was before the corners were kept as a bit mask
+    (a tuple of visited flags, with successors built through `pacai.core.actions.Actions`).
+    Kept so the corners benchmark can compare against it.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__()
+
+        self.walls = startingGameState.getWalls()
+        self.startingPosition = startingGameState.getPacmanPosition()
+        self.startingGameState = startingGameState
+
+        top = self.walls.getHeight() - 2
+        right = self.walls.getWidth() - 2
+        self.corners = ((1, 1), (1, top), (right, 1), (right, top))
+
+    def startingState(self):
+        visited = tuple([corner == self.startingPosition for corner in self.corners])
+        return (self.startingPosition, visited)
+
+    def isGoal(self, state):
+        return all(state[1])
+
+    def successorStates(self, state):
+        successors = []
+        position, visited = state
+
+        for action in Directions.CARDINAL:
+            x, y = position
+            dx, dy = Actions.directionToVector(action)
+            nextx, nexty = int(x + dx), int(y + dy)
+
+            if (not self.walls[nextx][nexty]):
+                nextVisited = tuple([visited[i] or (nextx, nexty) == self.corners[i]
+                        for i in range(len(self.corners))])
+                successors.append((((nextx, nexty), nextVisited), action, 1))
+
+        self._numExpanded += 1
+
+        return successors
+
+    def actionsCost(self, actions):
+        if (actions is None):
+            return 999999
+
+        x, y = self.startingPosition
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if (self.walls[x][y]):
+                return 999999
+
+        return len(actions)
+
+def referenceCornersHeuristic(state, problem):
+    """
+    The corners heuristic as it was before the corner distances were precomputed:
+    the maze distance to the (manhattan) closest unvisited corner.
+    """
+
+    position, visited = state
+
+    unvisited = [corner for (corner, done) in zip(problem.corners, visited) if (not done)]
+    if (len(unvisited) == 0):
+        return 0
+
+    closest = min(unvisited, key = lambda corner: distance.manhattan(position, corner))
+    return distance.maze(position, closest, problem.startingGameState)
+
+def expandTree(state, depth):
+    """
+    Expand the full game tree (every agent moving in turn, like expectimax) to the given depth
+    and return all the nodes (the states are kept alive so they can be measured).
+    """
+
+    nodes = [state]
+    frontier = [state]
+    numAgents = state.getNumAgents()
+
+    for ply in range(depth * numAgents):
+        agentIndex = ply % numAgents
+
+        nextFrontier = []
+        for node in frontier:
+            for (action, successor) in node.generateSuccessors(agentIndex):
+                nextFrontier.append(successor)
+
+        nodes += nextFrontier
+        frontier = nextFrontier
+
+    return nodes
+
+def measureNodeMemory(layoutName = 'mediumClassic', depth = 1, numGhosts = 4):
+    """
+    Measure the bytes (and time) used per search node when expanding a game tree.
+    Returns (number of nodes, bytes per node, microseconds per node).
+
+    This only measures the current game states.
+    There is no reference (before `__slots__`) game state kept to compare against,
+    so the before numbers (in the history of this benchmark) cannot be reproduced from here.
+    """
+
+    layout = getLayout(layoutName, maxGhosts = numGhosts)
+    if (layout is None):
+        raise ValueError('The layout ' + layoutName + ' cannot be found.')
+
+    state = PacmanGameState(layout)
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        start = time.perf_counter()
+        nodes = expandTree(state, depth)
+        elapsed = time.perf_counter() - start
+
+        usedBytes, peakBytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return len(nodes), usedBytes / len(nodes), elapsed * 1000000.0 / len(nodes)
+
+def runMemory(layout, depth, numGhosts, **kwargs):
+    numNodes, bytesPerNode, timePerNode = measureNodeMemory(layout, depth, numGhosts)
+
+    logging.info('Layout: %s, Depth: %d, Ghosts: %d' % (layout, depth, numGhosts))
+    logging.info('Nodes:          %d' % (numNodes))
+    logging.info('Bytes per Node: %.1f' % (bytesPerNode))
+    logging.info('Time per Node:  %.1f us (traced)' % (timePerNode))
+
+    return numNodes, bytesPerNode, timePerNode
+
+def getSearchPositions(layoutName, numPositions, numGhosts = 4, seed = None):
+    """
+    Get positions (with Pacman to move) from a game of random moves,
+    so every searcher can be measured on the same positions.
+    """
+
+    layout = getLayout(layoutName, maxGhosts = numGhosts)
+    if (layout is None):
+        raise ValueError('The layout ' + layoutName + ' cannot be found.')
+
+    rng = random.Random(seed)
+    state = PacmanGameState(layout)
+    positions = []
+
+    while (len(positions) < numPositions and not state.isOver()):
+        positions.append(state)
+
+        for agentIndex in range(state.getNumAgents()):
+            if (state.isOver()):
+                break
+
+            legalActions = state.getLegalActions(agentIndex)
+            moves = [action for action in legalActions if action != Directions.STOP]
+            state = state.generateSuccessor(agentIndex, rng.choice(moves or legalActions))
+
+    return positions
+
+def measureOrdering(positions, agentName = 'AlphaBetaAgent', depth = 2, ordering = None):
+    """
+    Search each position (in order, like in a game) with a fresh searcher using the ordering.
+    Returns the searcher's search stats with the time per search (in seconds) added.
+    """
+
+    args = {'depth': depth}
+    if (ordering is not None):
+        args['ordering'] = ordering
+
+    agent = BaseAgent.loadAgent(agentName, 0, args)
+
+    start = time.perf_counter()
+    for position in positions:
+        agent.getAction(position)
+    elapsed = time.perf_counter() - start
+
+    stats = agent.getSearchStats()
+    stats['time'] = elapsed / max(1, len(positions))
+
+    return stats
+
+def runOrdering(layouts, orderings, agent, depth, numPositions, numGhosts, seed, **kwargs):
+    results = {}
+
+    for layout in layouts.split(','):
+        positions = getSearchPositions(layout, numPositions, numGhosts, seed)
+
+        logging.info('Layout: %s, Agent: %s, Depth: %d, Positions: %d'
+                % (layout, agent, depth, len(positions)))
+        logging.info('%-24s %12s %10s %10s %10s' % ('Ordering', 'Nodes/Search',
+                'Cutoffs', 'EBF', 'ms/Search'))
+
+        for ordering in orderings.split(','):
+            stats = measureOrdering(positions, agent, depth, ordering)
+            results[(layout, ordering)] = stats
+
+            logging.info('%-24s %12.1f %10d %10.2f %10.1f' % (ordering, stats['meanNodes'],
+                    stats['cutoffs'], stats['meanBranchingFactor'], stats['time'] * 1000.0))
+
+    return results
+
+def measureSearch(layoutName, problemName, functionName, heuristicName = None, options = None):
+    """
+    Solve a search problem on a layout (like a `pacai.agents.search.base.SearchAgent`).
+    The options are any extra agent arguments for the search function (e.g. {'weight': 2}).
+    Returns {'cost', 'expanded', 'stored', 'time' (seconds), 'peakBytes'},
+    where stored is the most search nodes held at once
+    and the memory high-water mark is from a second (traced) run.
+    """
+
+    layout = getLayout(layoutName)
+    if (layout is None):
+        raise ValueError('The layout ' + layoutName + ' cannot be found.')
+
+    state = PacmanGameState(layout)
+
+    args = {'fn': functionName, 'prob': problemName}
+    if (heuristicName is not None):
+        args['heuristic'] = heuristicName
+
+    agent = SearchAgent(0, **args, **(options or {}))
+
+    problem = agent.searchType(state)
+    start = time.perf_counter()
+    actions = agent.searchFunction(problem)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'cost': problem.actionsCost(actions),
+        'expanded': problem.getExpandedCount(),
+        'stored': problem.getMaxStoredNodes(),
+        'time': elapsed,
+    }
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        agent.searchFunction(agent.searchType(state))
+        usedBytes, peakBytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result['peakBytes'] = peakBytes
+    return result
+
+def runCorners(layouts, heuristics, function, reference = True, **kwargs):
+    results = {}
+    names = heuristics.split(',')
+
+    if (reference):
+        names = [REFERENCE_NAME] + names
+
+    for layout in layouts.split(','):
+        for heuristic in heuristics.split(','):
+            results[(layout, heuristic)] = measureSearch(layout, CORNERS_PROBLEM, function,
+                    heuristic)
+
+        if (reference):
+            results[(layout, REFERENCE_NAME)] = measureSearch(layout, REFERENCE_CORNERS_PROBLEM,
+                    function, REFERENCE_CORNERS_HEURISTIC)
+
+    # Report after all the searches, so the table is not split up by the agents' logging.
+    for layout in layouts.split(','):
+        logging.info('Layout: %s, Function: %s' % (layout, function))
+        logging.info('%-48s %6s %10s %10s %10s' % ('Heuristic', 'Cost', 'Expanded',
+                'ms', 'Peak KB'))
+
+        for heuristic in names:
+            result = results[(layout, heuristic)]
+            logging.info('%-48s %6d %10d %10.1f %10.1f' % (heuristic, result['cost'],
+                    result['expanded'], result['time'] * 1000.0, result['peakBytes'] / 1024.0))
+
+    return results
+
+def runSearch(layouts, problem, functions, heuristic, options, **kwargs):
+    # Options are given like agent arguments: "weight=2,width=50".
+    searchOptions = {}
+    if (options != ''):
+        for option in options.split(','):
+            name, value = option.split('=', 1)
+            searchOptions[name.strip()] = value.strip()
+
+    results = {}
+
+    for layout in layouts.split(','):
+        for function in functions.split(','):
+            results[(layout, function)] = measureSearch(layout, problem, function, heuristic,
+                    searchOptions)
+
+    # Report after all the searches, so the table is not split up by the agents' logging.
+    for layout in layouts.split(','):
+        logging.info('Layout: %s, Problem: %s, Heuristic: %s, Options: %s' %
+                (layout, problem, heuristic, searchOptions))
+        logging.info('%-40s %6s %10s %10s %10s %10s' % ('Function', 'Cost', 'Expanded',
+                'Stored', 'ms', 'Peak KB'))
+
+        for function in functions.split(','):
+            result = results[(layout, function)]
+            logging.info('%-40s %6d %10d %10d %10.1f %10.1f' % (function, result['cost'],
+                    result['expanded'], result['stored'], result['time'] * 1000.0,
+                    result['peakBytes'] / 1024.0))
+
+    return results
+
+def readCommand(argv):
+    """
+    Processes the command used to run a benchmark from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program runs micro-benchmarks for the engine.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.benchmark memory
+          - Measures the memory used per search node (game state) on mediumClassic.
+            Only the current game states are measured,
+            there is no reference (before __slots__) game state to compare against.
+        (2) python -m pacai.bin.benchmark memory --layout smallClassic --depth 2
+          - Measures the memory used per search node on smallClassic with a deeper tree.
+        (3) python -m pacai.bin.benchmark ordering --depth 3
+          - Compares the nodes searched by alpha-beta with each move ordering.
+        (4) python -m pacai.bin.benchmark corners
+          - Compares corner heuristics on mediumCorners and bigCorners,
+            and the reference (tuple state) corners problem and heuristic they replaced.
+        (5) python -m pacai.bin.benchmark search --options weight=3,width=20
+          - Compares the optimal and bounded-memory searches for all the food in trickySearch.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('-d', '--debug', dest = 'debug',
+            action = 'store_true', default = False,
+            help = 'set logging level to debug (default: %(default)s)')
+
+    subparsers = parser.add_subparsers(dest = 'benchmark', required = True)
+
+    memoryParser = subparsers.add_parser('memory',
+            help = 'measure the memory used by each search node (game state) '
+                + 'of this version only')
+
+    memoryParser.add_argument('-l', '--layout', dest = 'layout',
+            action = 'store', type = str, default = 'mediumClassic',
+            help = 'use the specified map layout (default: %(default)s)')
+
+    memoryParser.add_argument('--depth', dest = 'depth',
+            action = 'store', type = int, default = 1,
+            help = 'expand the tree to this depth, each agent moves once per depth '
+                + '(default: %(default)s)')
+
+    memoryParser.add_argument('-k', '--num-ghosts', dest = 'numGhosts',
+            action = 'store', type = int, default = 4,
+            help = 'set the maximum number of ghosts (default: %(default)s)')
+
+    orderingParser = subparsers.add_parser('ordering',
+            help = 'measure the nodes searched (and effective branching factor) '
+                + 'with each move ordering')
+
+    orderingParser.add_argument('-l', '--layouts', dest = 'layouts',
+            action = 'store', type = str, default = 'mediumClassic,originalClassic',
+            help = 'a comma separated list of layouts (default: %(default)s)')
+
+    orderingParser.add_argument('-o', '--orderings', dest = 'orderings',
+            action = 'store', type = str,
+            default = 'none,killer,history,eval,killer+history,eval+killer+history',
+            help = 'a comma separated list of orderings to compare, '
+                + 'each is a list of orderings joined by "+" (default: %(default)s)')
+
+    orderingParser.add_argument('-p', '--agent', dest = 'agent',
+            action = 'store', type = str, default = 'AlphaBetaAgent',
+            help = 'use the specified searcher (default: %(default)s)')
+
+    orderingParser.add_argument('--depth', dest = 'depth',
+            action = 'store', type = int, default = 2,
+            help = 'search to this depth (default: %(default)s)')
+
+    orderingParser.add_argument('-n', '--num-positions', dest = 'numPositions',
+            action = 'store', type = int, default = 20,
+            help = 'the number of positions to search (default: %(default)s)')
+
+    orderingParser.add_argument('-k', '--num-ghosts', dest = 'numGhosts',
+            action = 'store', type = int, default = 4,
+            help = 'set the maximum number of ghosts (default: %(default)s)')
+
+    orderingParser.add_argument('--seed', dest = 'seed',
+            action = 'store', type = int, default = 0,
+            help = 'the seed for the random moves that reach the positions '
+                + '(default: %(default)s)')
+
+    cornersParser = subparsers.add_parser('corners',
+            help = 'measure the cost, nodes expanded, time and memory of corner searches '
+                + 'with each heuristic')
+
+    cornersParser.add_argument('-l', '--layouts', dest = 'layouts',
+            action = 'store', type = str, default = 'mediumCorners,bigCorners',
+            help = 'a comma separated list of layouts (default: %(default)s)')
+
+    cornersParser.add_argument('--heuristics', dest = 'heuristics',
+            action = 'store', type = str,
+            default = 'pacai.core.search.heuristic.null,'
+                + 'pacai.student.searchAgents.cornersHeuristic',
+            help = 'a comma separated list of heuristics to compare (default: %(default)s)')
+
+    cornersParser.add_argument('-f', '--function', dest = 'function',
+            action = 'store', type = str, default = 'pacai.core.search.search.astar',
+            help = 'use the specified search function (default: %(default)s)')
+
+    cornersParser.add_argument('--no-reference', dest = 'reference',
+            action = 'store_false', default = True,
+            help = 'do not measure the reference corners problem and heuristic '
+                + '(default: %(default)s)')
+
+    searchParser = subparsers.add_parser('search',
+            help = 'measure the cost, nodes expanded and stored, time and memory '
+                + 'of each search function')
+
+    searchParser.add_argument('-l', '--layouts', dest = 'layouts',
+            action = 'store', type = str, default = 'trickySearch',
+            help = 'a comma separated list of layouts (default: %(default)s)')
+
+    searchParser.add_argument('--problem', dest = 'problem',
+            action = 'store', type = str,
+            default = 'pacai.core.search.food.FoodSearchProblem',
+            help = 'use the specified search problem (default: %(default)s)')
+
+    searchParser.add_argument('--functions', dest = 'functions',
+            action = 'store', type = str,
+            default = 'pacai.core.search.search.astar,pacai.core.search.search.wastar,'
+                + 'pacai.core.search.search.beam,pacai.core.search.search.arastar',
+            help = 'a comma separated list of search functions to compare '
+                + '(default: %(default)s)')
+
+    searchParser.add_argument('--heuristic', dest = 'heuristic',
+            action = 'store', type = str, default = 'pacai.student.searchAgents.foodHeuristic',
+            help = 'use the specified heuristic (default: %(default)s)')
+
+    searchParser.add_argument('--options', dest = 'options',
+            action = 'store', type = str, default = '',
+            help = 'comma separated options for the search functions, '
+                + 'e.g. "weight=2,width=50,timeBudget=0.5" (default: %(default)s)')
+
+    options = parser.parse_args(argv)
+
+    if options.debug:
+        updateLoggingLevel(logging.DEBUG)
+
+    return vars(options)
+
+BENCHMARKS = {
+    'corners': runCorners,
+    'memory': runMemory,
+    'ordering': runOrdering,
+    'search': runSearch,
+}
+
+def main(argv):
+    """
+    Entry point for the benchmarks.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    args = readCommand(argv)
+
+    return BENCHMARKS[args['benchmark']](**args)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
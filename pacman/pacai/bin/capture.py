@@ -5,14 +5,16 @@ On your side of the map, you are a ghost and can eat pacmen.
 On your opponents side of the map, you are a pacman and can eat food and capsules.
 """
 
+import io
+import itertools
 import logging
 import os
-import pickle
 import random
 import sys
 
 from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
+from pacai.bin import parallel
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
@@ -21,6 +23,7 @@ from pacai.core.gamestate import AbstractGameState
 from pacai.core.grid import Grid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
+from pacai.core import replay
 from pacai.ui.capture.null import CaptureNullView
 from pacai.ui.capture.text import CaptureTextView
 from pacai.util import reflection
@@ -43,6 +46,9 @@ class CaptureGameState(AbstractGameState):
     A game state specific to capture.
     """
 
+    __slots__ = ('_timeleft', '_blueTeam', '_redTeam', '_teams',
+            '_redCapsules', '_blueCapsules', '_redFood', '_blueFood')
+
     def __init__(self, layout, timeleft):
         super().__init__(layout)
 
@@ -78,18 +84,7 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
-
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        self._splitFood()
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -131,9 +126,28 @@ class CaptureGameState(AbstractGameState):
         super().eatFood(x, y)
 
         if (self.isOnRedSide((x, y))):
-            self._redFood[x][y] = False
+            self._redFood.set(x, y, False)
         else:
-            self._blueFood[x][y] = False
+            self._blueFood.set(x, y, False)
+
+    # Override
+    def getSnapshot(self):
+        snapshot = super().getSnapshot()
+        snapshot['timeleft'] = self._timeleft
+
+        return snapshot
+
+    # Override
+    def loadSnapshot(self, snapshot):
+        super().loadSnapshot(snapshot)
+
+        self._timeleft = snapshot['timeleft']
+
+        self._redCapsules = [capsule for capsule in self._capsules if self.isOnRedSide(capsule)]
+        self._blueCapsules = [capsule for capsule in self._capsules
+                if not self.isOnRedSide(capsule)]
+
+        self._splitFood()
 
     def getBlueCapsules(self):
         """
@@ -224,13 +238,37 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _copyInto(self, other):
+        super()._copyInto(other)
+
+        other._timeleft = self._timeleft
+        other._blueTeam = self._blueTeam
+        other._redTeam = self._redTeam
+        other._teams = self._teams
+        other._redCapsules = self._redCapsules
+        other._blueCapsules = self._blueCapsules
+        other._redFood = self._redFood
+        other._blueFood = self._blueFood
+
+    def _splitFood(self):
         """
-        Apply the action to the context state (self).
+        Build the red and blue food grids from all the food.
         """
 
+        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+
+        for (x, y) in self._food.asList():
+            if (self.isOnRedSide((x, y))):
+                self._redFood.set(x, y, True)
+            else:
+                self._blueFood.set(x, y, True)
+
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
         # Find appropriate rules for the agent.
-        AgentRules.applyAction(self, action, agentIndex)
+        AgentRules.applyAction(self, action, agentIndex, checkLegal)
         AgentRules.checkDeath(self, agentIndex)
         AgentRules.decrementTimer(self.getAgentState(agentIndex))
 
@@ -346,13 +384,12 @@ class AgentRules:
                 state.getWalls())
 
     @staticmethod
-    def applyAction(state, action, agentIndex):
+    def applyAction(state, action, agentIndex, checkLegal = True):
         """
         Edits the state to reflect the results of the action.
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
-        if (action not in legal):
+        if (checkLegal and action not in AgentRules.getLegalActions(state, agentIndex)):
             raise ValueError('Illegal action: ' + str(action))
 
         agentState = state.getAgentState(agentIndex)
@@ -619,19 +656,7 @@ def readCommand(argv):
         args['agents'][index] = agent
 
     # Choose a layout.
-    if options.layout.startswith('RANDOM'):
-        layoutSeed = None
-        if (options.layout != 'RANDOM'):
-            layoutSeed = int(options.layout[6:])
-
-        args['layout'] = Layout(generateMaze(layoutSeed).split('\n'))
-    elif options.layout.lower().find('capture') == -1:
-        raise ValueError('You must use a capture layout with capture.py.')
-    else:
-        args['layout'] = getLayout(options.layout)
-
-    if (args['layout'] is None):
-        raise ValueError('The layout ' + options.layout + ' cannot be found.')
+    args['layout'] = loadLayout(options.layout)
 
     args['length'] = options.maxMoves
     args['numGames'] = options.numGames
@@ -639,9 +664,34 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['replay'] = options.replay
+    args['replayFrom'] = options.replayFrom
+    args['replayTo'] = options.replayTo
+    args['seed'] = seed
+    args['workers'] = options.workers
 
     return args
 
+def loadLayout(name):
+    """
+    Load a capture layout by name, or generate a random one for RANDOM<seed>.
+    """
+
+    if name.startswith('RANDOM'):
+        layoutSeed = None
+        if (name != 'RANDOM'):
+            layoutSeed = int(name[6:])
+
+        layout = Layout(generateMaze(layoutSeed).split('\n'))
+    elif name.lower().find('capture') == -1:
+        raise ValueError('You must use a capture layout with capture.py.')
+    else:
+        layout = getLayout(name)
+
+    if (layout is None):
+        raise ValueError('The layout ' + name + ' cannot be found.')
+
+    return layout
+
 def loadAgents(isRed, agentModule, textgraphics, args):
     """
     Calls agent factories and returns lists of agents.
@@ -660,13 +710,30 @@ def loadAgents(isRed, agentModule, textgraphics, args):
 
     return createTeamFunction(indices[0], indices[1], isRed, **args)
 
-def replayGame(layout, agents, actions, display, length, redTeamName, blueTeamName):
-    agents = [DummyAgent(index) for index in range(len(agents))]
+def newReplayGame(reader, display):
+    header = reader.getHeader()
+
+    agents = [DummyAgent(index) for index in range(reader.getNumAgents())]
     rules = CaptureRules()
-    game = rules.newGame(layout, agents, display, length, False)
-    state = game.state
-    display.redTeam = redTeamName
-    display.blueTeam = blueTeamName
+    game = rules.newGame(reader.getLayout(), agents, display, header['length'], False)
+
+    return rules, game
+
+def replayGame(reader, display, replayFrom = 0, replayTo = None):
+    """
+    Replay a game from a `pacai.core.replay.ReplayReader`.
+    The replay jumps straight to the replayFrom move, and stops after the replayTo move.
+    """
+
+    rules, game = newReplayGame(reader, display)
+    state, actions = replay.seekState(reader, game.state, replayFrom,
+            lambda state: rules.process(state, game))
+
+    if (replayTo is not None):
+        actions = itertools.islice(actions, max(0, replayTo - replayFrom))
+
+    display.redTeam = reader.getHeader()['redTeamName']
+    display.blueTeam = reader.getHeader()['blueTeamName']
     display.initialize(state)
 
     for action in actions:
@@ -679,51 +746,113 @@ def replayGame(layout, agents, actions, display, length, redTeamName, blueTeamNa
 
     display.finish()
 
+def recordGame(layout, agents, game, length, record, redTeamName, blueTeamName, seed = None):
+    metadata = {
+        'game': 'capture',
+        'agents': [agent.__class__.__name__ for agent in agents],
+        'length': length,
+        'redTeamName': redTeamName,
+        'blueTeamName': blueTeamName,
+        'seed': seed,
+    }
+
+    path = 'replay'
+    if (isinstance(record, str)):
+        path = record
+
+    buffer = io.BytesIO()
+    replay.writeReplay(buffer, layout, game.moveHistory, len(agents), metadata,
+            game.startingIndex, initialState = CaptureGameState(layout, length))
+
+    game.record = buffer.getvalue()
+    with open(path, 'wb') as file:
+        file.write(game.record)
+
+    logging.info("Game recorded to: '%s'." % (path))
+
+def getReplayState(path, moveIndex):
+    """
+    Get the game state after the first moveIndex moves of a recorded game.
+    Keyframes in the replay keep this from re-simulating the whole game.
+    """
+
+    with replay.ReplayReader(path) as reader:
+        rules, game = newReplayGame(reader, CaptureNullView())
+        state, actions = replay.seekState(reader, game.state, moveIndex)
+
+    return state
+
+def runParallelGame(layout, agents, length, seed, catchExceptions):
+    """
+    Play a single game inside a worker process (see `runGames`).
+    """
+
+    random.seed(seed)
+
+    rules = CaptureRules()
+    game = rules.newGame(layout, agents, CaptureNullView(), length, catchExceptions)
+    game.run()
+
+    # The agents and view stay in the worker, only the results need to come back.
+    game.agents = None
+    game.display = None
+
+    return game
+
 def runGames(layout, agents, display, length, numGames, record, numTraining,
-        redTeamName, blueTeamName, catchExceptions = False, **kwargs):
+        redTeamName, blueTeamName, catchExceptions = False, workers = 1, seed = None, **kwargs):
+    """
+    Play the games.
+    Each game gets a seed derived from the main seed (see `pacai.bin.parallel.getGameSeeds`),
+    so the same seed plays the same games with any number of workers.
+    With more than one worker, games are fanned out over a process pool.
+    Training games and learning agents are always played serially.
+    """
+
     rules = CaptureRules()
     games = []
 
-    nullView = None
-    if (numTraining > 0):
-        logging.info('Playing %d training games.' % numTraining)
-        nullView = CaptureNullView()
+    gameSeeds = parallel.getGameSeeds(seed, numGames)
 
-    for i in range(numGames):
-        isTraining = (i < numTraining)
+    if (parallel.canRunInParallel(workers, numTraining, agents)):
+        tasks = [(layout, agents, length, gameSeed, catchExceptions) for gameSeed in gameSeeds]
 
-        if (isTraining):
-            # Suppress graphics for training.
-            gameDisplay = nullView
-        else:
-            gameDisplay = display
+        results = parallel.runParallel(runParallelGame, tasks, workers)
+        for (g, gameSeed) in zip(results, gameSeeds):
+            g.agents = agents
+            g.display = display
+            games.append(g)
 
-        g = rules.newGame(layout, agents, gameDisplay, length, catchExceptions)
-        g.run()
+            g.record = None
+            if record:
+                recordGame(layout, agents, g, length, record, redTeamName, blueTeamName,
+                        gameSeed)
+    else:
+        nullView = None
+        if (numTraining > 0):
+            logging.info('Playing %d training games.' % numTraining)
+            nullView = CaptureNullView()
 
-        if (not isTraining):
-            games.append(g)
+        for i in range(numGames):
+            isTraining = (i < numTraining)
 
-        g.record = None
-        if record:
-            components = {
-                'layout': layout,
-                'agents': [agent.__class__.__name__ for agent in agents],
-                'actions': g.moveHistory,
-                'length': length,
-                'redTeamName': redTeamName,
-                'blueTeamName': blueTeamName
-            }
+            if (isTraining):
+                # Suppress graphics for training.
+                gameDisplay = nullView
+            else:
+                gameDisplay = display
 
-            path = 'replay'
-            if (isinstance(record, str)):
-                path = record
+            random.seed(gameSeeds[i])
+            g = rules.newGame(layout, agents, gameDisplay, length, catchExceptions)
+            g.run()
 
-            g.record = pickle.dumps(components)
-            with open(path, 'wb') as file:
-                file.write(g.record)
+            if (not isTraining):
+                games.append(g)
 
-            logging.info("Game recorded to: '%s'." % (path))
+            g.record = None
+            if record:
+                recordGame(layout, agents, g, length, record, redTeamName, blueTeamName,
+                        gameSeeds[i])
 
     if (numGames > 0):
         scores = [game.state.getScore() for game in games]
@@ -738,6 +867,10 @@ def runGames(layout, agents, display, length, numGames, record, numTraining,
         logging.info('Record: %s',
                 ', '.join([('Blue', 'Tie', 'Red')[max(0, min(2, 1 + s))] for s in scores]))
 
+        agentTimes = [sum(times) / len(games)
+                for times in zip(*[game.totalAgentTimes for game in games])]
+        logging.info('Agent Times: %s', ', '.join(['%.2f' % (time) for time in agentTimes]))
+
     return games
 
 
@@ -756,12 +889,8 @@ def main(argv):
     if (options['replay'] is not None):
         logging.info('Replaying recorded game %s.' % options['replay'])
 
-        recorded = None
-        with open(options['replay'], 'rb') as file:
-            recorded = pickle.load(file)
-
-        recorded['display'] = options['display']
-        replayGame(**recorded)
+        with replay.ReplayReader(options['replay']) as reader:
+            replayGame(reader, options['display'], options['replayFrom'], options['replayTo'])
 
         return
 
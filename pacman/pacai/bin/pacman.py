@@ -9,13 +9,14 @@ Have fun!
 
 import logging
 import os
-import pickle
+import itertools
 import random
 import sys
 
 from pacai.agents.base import BaseAgent
 from pacai.agents.ghost.random import RandomGhost
 from pacai.agents.greedy import GreedyAgent
+from pacai.bin import parallel
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
@@ -23,6 +24,7 @@ from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
 from pacai.core.layout import getLayout
+from pacai.core import replay
 from pacai.ui.pacman.null import PacmanNullView
 from pacai.ui.pacman.text import PacmanTextView
 from pacai.util.logs import initLogging
@@ -46,6 +48,8 @@ class PacmanGameState(AbstractGameState):
     Note that in classic Pacman, Pacman is always agent PACMAN_AGENT_INDEX.
     """
 
+    __slots__ = ()
+
     def __init__(self, layout):
         super().__init__(layout)
 
@@ -118,16 +122,13 @@ class PacmanGameState(AbstractGameState):
 
         return self._agentStates[PACMAN_AGENT_INDEX]
 
-    def _applySuccessorAction(self, agentIndex, action):
-        """
-        Apply the action to the context state (self).
-        """
-
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
         # Let the agent's logic deal with its action's effects on the board.
         if (agentIndex == PACMAN_AGENT_INDEX):
-            PacmanRules.applyAction(self, action)
+            PacmanRules.applyAction(self, action, checkLegal)
         else:
-            GhostRules.applyAction(self, action, agentIndex)
+            GhostRules.applyAction(self, action, agentIndex, checkLegal)
 
         # Time passes.
         if (agentIndex == PACMAN_AGENT_INDEX):
@@ -221,13 +222,12 @@ class PacmanRules:
                 state.getWalls())
 
     @staticmethod
-    def applyAction(state, action):
+    def applyAction(state, action, checkLegal = True):
         """
         Edits the state to reflect the results of the action.
         """
 
-        legal = PacmanRules.getLegalActions(state)
-        if (action not in legal):
+        if (checkLegal and action not in PacmanRules.getLegalActions(state)):
             raise ValueError('Illegal pacman action: ' + str(action))
 
         pacmanState = state.getPacmanState()
@@ -291,9 +291,8 @@ class GhostRules:
         return possibleActions
 
     @staticmethod
-    def applyAction(state, action, ghostIndex):
-        legal = GhostRules.getLegalActions(state, ghostIndex)
-        if (action not in legal):
+    def applyAction(state, action, ghostIndex, checkLegal = True):
+        if (checkLegal and action not in GhostRules.getLegalActions(state, ghostIndex)):
             raise ValueError('Illegal ghost action: ' + str(action))
 
         ghostState = state.getGhostState(ghostIndex)
@@ -480,15 +479,19 @@ def readCommand(argv):
 
     args['catchExceptions'] = options.catchExceptions
     args['gameToReplay'] = options.replay
+    args['replayFrom'] = options.replayFrom
+    args['replayTo'] = options.replayTo
     args['ghosts'] = [BaseAgent.loadAgent(options.ghost, i + 1) for i in range(options.numGhosts)]
     args['numGames'] = options.numGames
     args['pacman'] = BaseAgent.loadAgent(options.pacman, PACMAN_AGENT_INDEX, agentOpts)
     args['record'] = options.record
+    args['seed'] = seed
     args['timeout'] = options.timeout
+    args['workers'] = options.workers
 
     return args
 
-def replayGame(layout, actions, display):
+def newReplayGame(layout, display):
     rules = ClassicGameRules()
 
     agents = []
@@ -496,7 +499,22 @@ def replayGame(layout, actions, display):
     agents += [RandomGhost(i + 1) for i in range(layout.getNumGhosts())]
 
     game = rules.newGame(layout, agents[PACMAN_AGENT_INDEX], agents[1:], display)
-    state = game.state
+
+    return rules, game
+
+def replayGame(reader, display, replayFrom = 0, replayTo = None):
+    """
+    Replay a game from a `pacai.core.replay.ReplayReader`.
+    The replay jumps straight to the replayFrom move, and stops after the replayTo move.
+    """
+
+    rules, game = newReplayGame(reader.getLayout(), display)
+    state, actions = replay.seekState(reader, game.state, replayFrom,
+            lambda state: rules.process(state, game))
+
+    if (replayTo is not None):
+        actions = itertools.islice(actions, max(0, replayTo - replayFrom))
+
     display.initialize(state)
 
     for action in actions:
@@ -511,39 +529,95 @@ def replayGame(layout, actions, display):
 
     display.finish()
 
+def recordGame(layout, game, record, seed = None):
+    path = 'pacman.replay'
+    if (isinstance(record, str)):
+        path = record
+
+    metadata = {'game': 'pacman', 'seed': seed}
+    replay.writeReplay(path, layout, game.moveHistory, len(game.agents), metadata,
+            game.startingIndex, initialState = PacmanGameState(layout))
+
+def getReplayState(path, moveIndex):
+    """
+    Get the game state after the first moveIndex moves of a recorded game.
+    Keyframes in the replay keep this from re-simulating the whole game.
+    """
+
+    with replay.ReplayReader(path) as reader:
+        rules, game = newReplayGame(reader.getLayout(), PacmanNullView())
+        state, actions = replay.seekState(reader, game.state, moveIndex)
+
+    return state
+
+def runParallelGame(layout, pacman, ghosts, seed, catchExceptions, timeout):
+    """
+    Play a single game inside a worker process (see `runGames`).
+    """
+
+    random.seed(seed)
+
+    rules = ClassicGameRules(timeout)
+    game = rules.newGame(layout, pacman, ghosts, PacmanNullView(), catchExceptions)
+    game.run()
+
+    # The agents and view stay in the worker, only the results need to come back.
+    game.agents = None
+    game.display = None
+
+    return game
+
 def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraining = 0,
-        catchExceptions = False, timeout = 30, **kwargs):
+        catchExceptions = False, timeout = 30, workers = 1, seed = None, **kwargs):
+    """
+    Play the games.
+    Each game gets a seed derived from the main seed (see `pacai.bin.parallel.getGameSeeds`),
+    so the same seed plays the same games with any number of workers.
+    With more than one worker, games are fanned out over a process pool.
+    Training games and learning agents are always played serially.
+    """
+
     rules = ClassicGameRules(timeout)
     games = []
 
-    nullView = None
-    if (numTraining > 0):
-        logging.info('Playing %d training games.' % numTraining)
-        nullView = PacmanNullView()
+    gameSeeds = parallel.getGameSeeds(seed, numGames)
 
-    for i in range(numGames):
-        isTraining = (i < numTraining)
+    if (parallel.canRunInParallel(workers, numTraining, [pacman] + ghosts)):
+        tasks = [(layout, pacman, ghosts, gameSeed, catchExceptions, timeout)
+                for gameSeed in gameSeeds]
 
-        if (isTraining):
-            # Suppress graphics for training.
-            gameDisplay = nullView
-        else:
-            gameDisplay = display
+        results = parallel.runParallel(runParallelGame, tasks, workers)
+        for (game, gameSeed) in zip(results, gameSeeds):
+            game.agents = [pacman] + ghosts[:layout.getNumGhosts()]
+            game.display = display
+            games.append(game)
 
-        game = rules.newGame(layout, pacman, ghosts, gameDisplay, catchExceptions)
-        game.run()
+            if (record):
+                recordGame(layout, game, record, gameSeed)
+    else:
+        nullView = None
+        if (numTraining > 0):
+            logging.info('Playing %d training games.' % numTraining)
+            nullView = PacmanNullView()
 
-        if (not isTraining):
-            games.append(game)
+        for i in range(numGames):
+            isTraining = (i < numTraining)
 
-        if (record):
-            path = 'pacman.replay'
-            if (isinstance(record, str)):
-                path = record
+            if (isTraining):
+                # Suppress graphics for training.
+                gameDisplay = nullView
+            else:
+                gameDisplay = display
 
-            components = {'layout': layout, 'actions': game.moveHistory}
-            with open(path, 'wb') as file:
-                pickle.dump(components, file)
+            random.seed(gameSeeds[i])
+            game = rules.newGame(layout, pacman, ghosts, gameDisplay, catchExceptions)
+            game.run()
+
+            if (not isTraining):
+                games.append(game)
+
+            if (record):
+                recordGame(layout, game, record, gameSeeds[i])
 
     if ((numGames - numTraining) > 0):
         scores = [game.state.getScore() for game in games]
@@ -554,6 +628,10 @@ def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraini
         logging.info('Win Rate:      %d/%d (%.2f)' % (wins.count(True), len(wins), winRate))
         logging.info('Record:        %s', ', '.join([['Loss', 'Win'][int(w)] for w in wins]))
 
+        agentTimes = [sum(times) / len(games)
+                for times in zip(*[game.totalAgentTimes for game in games])]
+        logging.info('Agent Times:   %s', ', '.join(['%.2f' % (time) for time in agentTimes]))
+
     return games
 
 def main(argv):
@@ -571,12 +649,8 @@ def main(argv):
     if (args['gameToReplay'] is not None):
         logging.info('Replaying recorded game %s.' % args['gameToReplay'])
 
-        recorded = None
-        with open(args['gameToReplay'], 'rb') as file:
-            recorded = pickle.load(file)
-
-        recorded['display'] = args['display']
-        replayGame(**recorded)
+        with replay.ReplayReader(args['gameToReplay']) as reader:
+            replayGame(reader, args['display'], args['replayFrom'], args['replayTo'])
 
         return
 
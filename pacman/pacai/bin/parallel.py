@@ -0,0 +1,79 @@
+"""
+Helpers for the binaries to play independent games over a pool of processes.
+"""
+
+import logging
+import multiprocessing
+import pickle
+import random
+
+from pacai.agents.learning.value import ValueEstimationAgent
+
+def canRunInParallel(workers, numTraining, agents):
+    """
+    Check if the games can be fanned out over worker processes.
+    Training games and learning agents carry state from one game to the next,
+    so they have to be played serially in this process.
+    Agents also need to be picklable to travel to the workers.
+    """
+
+    if (workers <= 1):
+        return False
+
+    if (numTraining > 0):
+        logging.info('Training games are always played serially, ignoring workers.')
+        return False
+
+    for agent in agents:
+        if (isinstance(agent, ValueEstimationAgent)):
+            logging.info('Learning agents are always played serially, ignoring workers.')
+            return False
+
+    try:
+        pickle.dumps(agents)
+    except (pickle.PicklingError, AttributeError, TypeError) as ex:
+        logging.warning('Agents cannot be sent to workers, playing serially. -- %s' % (str(ex)))
+        return False
+
+    return True
+
+def getGameSeeds(seed, numGames):
+    """
+    Derive a deterministic seed for each game from the main seed,
+    so results do not depend on the number of workers (or which worker plays which game).
+    """
+
+    rng = random.Random(seed)
+    return [rng.randint(0, 2**32) for i in range(numGames)]
+
+def runParallel(function, tasks, workers):
+    """
+    Call the function on each tuple of arguments in tasks over a pool of workers.
+    Results are returned in the same order as the tasks.
+    """
+
+    logging.info('Playing %d games over %d workers.' % (len(tasks), workers))
+
+    with multiprocessing.Pool(processes = workers) as pool:
+        return pool.starmap(function, tasks)
+
+def iterParallel(function, tasks, workers):
+    """
+    Like `runParallel`, but yield (task index, result) pairs as soon as each task finishes.
+    With a single worker, tasks are run in this process (in order).
+    """
+
+    if (workers <= 1):
+        for index in range(len(tasks)):
+            yield index, function(*tasks[index])
+
+        return
+
+    with multiprocessing.Pool(processes = workers) as pool:
+        calls = [(function, index, tasks[index]) for index in range(len(tasks))]
+        for result in pool.imap_unordered(_callIndexed, calls):
+            yield result
+
+def _callIndexed(call):
+    function, index, args = call
+    return index, function(*args)
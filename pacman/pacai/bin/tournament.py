@@ -0,0 +1,372 @@
+"""
+A headless tournament between capture teams.
+
+Every pair of teams plays on every layout (round-robin), alternating colors between games.
+Matches are spread over a process pool, and results are checkpointed to disk as they finish
+so that a long tournament can pick up where it left off after a crash.
+At the end, a standings table (with Elo ratings) and a per-layout breakdown are logged.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import textwrap
+
+from pacai.bin import capture
+from pacai.bin import parallel
+from pacai.ui.capture.null import CaptureNullView
+from pacai.util.logs import initLogging
+from pacai.util.logs import updateLoggingLevel
+
+CHECKPOINT_VERSION = 1
+
+INITIAL_RATING = 1500.0
+RATING_K = 32.0
+
+class TournamentMatch(object):
+    """
+    A single scheduled game between two teams on a layout.
+    """
+
+    def __init__(self, matchId, layout, red, blue, seed):
+        self.matchId = matchId
+        self.layout = layout
+        self.red = red
+        self.blue = blue
+        self.seed = seed
+
+def scheduleMatches(teams, layouts, numGames, seed):
+    """
+    Build the round-robin schedule.
+    Each pair of teams plays numGames games on each layout, swapping colors every game.
+    Every match gets its own seed (derived from the tournament seed),
+    so the schedule is the same no matter how many times the tournament is resumed.
+    """
+
+    matches = []
+    pairs = [(teams[i], teams[j]) for i in range(len(teams)) for j in range(i + 1, len(teams))]
+
+    for layout in layouts:
+        for (first, second) in pairs:
+            for gameIndex in range(numGames):
+                red, blue = first, second
+                if (gameIndex % 2 == 1):
+                    red, blue = second, first
+
+                matchId = '%s|%s|%s|%d' % (layout, red, blue, gameIndex)
+                matches.append(TournamentMatch(matchId, layout, red, blue, None))
+
+    for match, matchSeed in zip(matches, parallel.getGameSeeds(seed, len(matches))):
+        match.seed = matchSeed
+
+    return matches
+
+def playMatch(matchId, layoutName, red, blue, length, seed, catchExceptions):
+    """
+    Play a single match (inside a worker process) and return a result dict.
+    """
+
+    random.seed(seed)
+
+    layout = capture.loadLayout(layoutName)
+    redAgents = capture.loadAgents(True, red, True, {})
+    blueAgents = capture.loadAgents(False, blue, True, {})
+    agents = sum([list(el) for el in zip(redAgents, blueAgents)], [])
+
+    rules = capture.CaptureRules()
+    game = rules.newGame(layout, agents, CaptureNullView(), length, catchExceptions)
+    game.run()
+
+    return {
+        'id': matchId,
+        'layout': layoutName,
+        'red': red,
+        'blue': blue,
+        'score': game.state.getScore(),
+        'moves': len(game.moveHistory),
+        'crashed': game.agentCrashed,
+        'timeout': game.agentTimeout,
+    }
+
+def loadCheckpoint(path):
+    """
+    Load a checkpoint, or return None if there is not one.
+    """
+
+    if (path is None or not os.path.isfile(path)):
+        return None
+
+    with open(path, 'r') as file:
+        checkpoint = json.load(file)
+
+    if (checkpoint.get('version') != CHECKPOINT_VERSION):
+        raise ValueError('Unsupported tournament checkpoint version: %s.' %
+                (checkpoint.get('version')))
+
+    return checkpoint
+
+def writeCheckpoint(path, config, results):
+    """
+    Atomically write the finished results.
+    """
+
+    if (path is None):
+        return
+
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'config': config,
+        'results': list(results.values()),
+    }
+
+    tempPath = '%s.tmp' % (path)
+    with open(tempPath, 'w') as file:
+        json.dump(checkpoint, file, indent = 4)
+
+    os.replace(tempPath, path)
+
+def computeRatings(teams, matches, results):
+    """
+    Compute Elo ratings by replaying the results in schedule order
+    (so the ratings do not depend on the order matches finished in).
+    """
+
+    ratings = {team: INITIAL_RATING for team in teams}
+
+    for match in matches:
+        result = results.get(match.matchId)
+        if (result is None):
+            continue
+
+        redActual = 0.5
+        if (result['score'] > 0):
+            redActual = 1.0
+        elif (result['score'] < 0):
+            redActual = 0.0
+
+        redExpected = 1.0 / (1.0 + 10.0 ** ((ratings[match.blue] - ratings[match.red]) / 400.0))
+        delta = RATING_K * (redActual - redExpected)
+
+        ratings[match.red] += delta
+        ratings[match.blue] -= delta
+
+    return ratings
+
+def computeStandings(teams, layouts, results):
+    """
+    Tally wins/losses/ties per team, both overall and per layout.
+    Returns {team: {'all': [wins, losses, ties], <layout>: [wins, losses, ties], ...}}.
+    """
+
+    standings = {team: {key: [0, 0, 0] for key in ['all'] + layouts} for team in teams}
+
+    for result in results.values():
+        if (result['score'] > 0):
+            outcomes = [(result['red'], 0), (result['blue'], 1)]
+        elif (result['score'] < 0):
+            outcomes = [(result['red'], 1), (result['blue'], 0)]
+        else:
+            outcomes = [(result['red'], 2), (result['blue'], 2)]
+
+        for team, outcome in outcomes:
+            standings[team]['all'][outcome] += 1
+            standings[team][result['layout']][outcome] += 1
+
+    return standings
+
+def logStandings(teams, layouts, ratings, standings):
+    rankedTeams = sorted(teams, key = lambda team: ratings[team], reverse = True)
+    nameWidth = max([len(team) for team in teams] + [len('Team')])
+
+    logging.info('Standings:')
+    logging.info('    %s  %7s  %5s  %5s  %5s  %6s' %
+            ('Team'.ljust(nameWidth), 'Elo', 'Win', 'Loss', 'Tie', 'Points'))
+
+    for team in rankedTeams:
+        wins, losses, ties = standings[team]['all']
+        logging.info('    %s  %7.1f  %5d  %5d  %5d  %6.1f' %
+                (team.ljust(nameWidth), ratings[team], wins, losses, ties, wins + 0.5 * ties))
+
+    for layout in layouts:
+        logging.info('Layout %s (Win/Loss/Tie):' % (layout))
+        for team in rankedTeams:
+            logging.info('    %s  %d/%d/%d' % ((team.ljust(nameWidth),) +
+                    tuple(standings[team][layout])))
+
+def runTournament(teams, layouts, numGames, length, seed = None, workers = 1,
+        checkpoint = None, catchExceptions = False, **kwargs):
+    """
+    Play (or resume) a full round-robin tournament.
+    When resuming without a seed, the checkpoint's seed is used.
+    Returns the results dict (keyed by match id), the ratings, and the standings.
+    """
+
+    if (len(teams) < 2):
+        raise ValueError('A tournament needs at least two teams.')
+
+    # Match ids (and standings) are keyed by names, so they have to be unique.
+    for (kind, names) in [('team', teams), ('layout', layouts)]:
+        duplicates = sorted(set([name for name in names if names.count(name) > 1]))
+        if (len(duplicates) > 0):
+            raise ValueError('Duplicate tournament %s(s): %s.' % (kind, ', '.join(duplicates)))
+
+    # Make sure that every team loads before committing to hours of games.
+    for team in teams:
+        capture.loadAgents(True, team, True, {})
+
+    previous = loadCheckpoint(checkpoint)
+
+    if (seed is None):
+        if (previous is not None):
+            seed = previous['config']['seed']
+        else:
+            seed = random.randint(0, 2**32)
+
+    logging.debug('Seed value: ' + str(seed))
+
+    config = {
+        'teams': teams,
+        'layouts': layouts,
+        'numGames': numGames,
+        'length': length,
+        'seed': seed,
+    }
+
+    results = {}
+    if (previous is not None):
+        if (previous['config'] != config):
+            raise ValueError("Checkpoint '%s' is for a different tournament configuration." %
+                    (checkpoint))
+
+        results = {result['id']: result for result in previous['results']}
+        logging.info('Resuming from checkpoint with %d finished matches.' % (len(results)))
+
+    matches = scheduleMatches(teams, layouts, numGames, seed)
+
+    remaining = [match for match in matches if match.matchId not in results]
+    logging.info('Playing %d of %d matches.' % (len(remaining), len(matches)))
+
+    tasks = [(match.matchId, match.layout, match.red, match.blue, length, match.seed,
+            catchExceptions) for match in remaining]
+
+    for (index, result) in parallel.iterParallel(playMatch, tasks, workers):
+        results[result['id']] = result
+        writeCheckpoint(checkpoint, config, results)
+
+        logging.info('[%d/%d] %s vs %s on %s: %d' % (len(results), len(matches),
+                result['red'], result['blue'], result['layout'], result['score']))
+
+    ratings = computeRatings(teams, matches, results)
+    standings = computeStandings(teams, layouts, results)
+    logStandings(teams, layouts, ratings, standings)
+
+    return results, ratings, standings
+
+def readCommand(argv):
+    """
+    Processes the command used to run a tournament from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program will run a round-robin tournament between capture teams without graphics.
+        Every pair of teams plays on every layout, and the final standings are logged.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.tournament -t pacai.core.baselineTeam,pacai.student.myTeam
+          - Plays the baseline team against pacai.student.myTeam on the default layout.
+        (2) python -m pacai.bin.tournament -t teamA,teamB,teamC -l defaultCapture,RANDOM1
+              --workers 8 --checkpoint tournament.json
+          - Plays three teams on two layouts using 8 processes,
+            resuming from tournament.json if it exists.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('-d', '--debug', dest = 'debug',
+            action = 'store_true', default = False,
+            help = 'set logging level to debug (default: %(default)s)')
+
+    parser.add_argument('-l', '--layouts', dest = 'layouts',
+            action = 'store', type = str, default = 'defaultCapture',
+            help = 'comma separated layouts to play on, RANDOM<seed> may be used for a seeded '
+                + 'random map (default: %(default)s)')
+
+    parser.add_argument('-n', '--num-games', dest = 'numGames',
+            action = 'store', type = int, default = 2,
+            help = 'games per pair of teams per layout, colors alternate between games '
+                + '(default: %(default)s)')
+
+    parser.add_argument('-q', '--quiet', dest = 'quiet',
+            action = 'store_true', default = False,
+            help = 'set logging level to warning (default: %(default)s)')
+
+    parser.add_argument('-s', '--seed', dest = 'seed',
+            action = 'store', type = int, default = None,
+            help = 'Enter seed value to randomize the tournament')
+
+    parser.add_argument('-t', '--teams', dest = 'teams',
+            action = 'store', type = str, required = True,
+            help = 'comma separated team modules (each with a createTeam function)')
+
+    parser.add_argument('--catch-exceptions', dest = 'catchExceptions',
+            action = 'store_true', default = False,
+            help = 'turns on exception handling and timeouts during games (default: %(default)s)')
+
+    parser.add_argument('--checkpoint', dest = 'checkpoint',
+            action = 'store', type = str, default = None,
+            help = 'save results to (and resume from) this file (default: %(default)s)')
+
+    parser.add_argument('--max-moves', dest = 'maxMoves',
+            action = 'store', type = int, default = 1200,
+            help = 'set maximum number of moves in a game (default: %(default)s)')
+
+    parser.add_argument('--workers', dest = 'workers',
+            action = 'store', type = int, default = 1,
+            help = 'play matches in parallel over this many processes (default: %(default)s)')
+
+    options, otherjunk = parser.parse_known_args(argv)
+    args = dict()
+
+    if len(otherjunk) != 0:
+        raise ValueError('Unrecognized options: \'%s\'.' % (str(otherjunk)))
+
+    # Set the logging level.
+    if options.quiet and options.debug:
+        raise ValueError('Logging cannont be set to both debug and quiet.')
+
+    if options.quiet:
+        updateLoggingLevel(logging.WARNING)
+    elif options.debug:
+        updateLoggingLevel(logging.DEBUG)
+
+    args['teams'] = [team.strip() for team in options.teams.split(',') if team.strip() != '']
+    args['layouts'] = [layout.strip() for layout in options.layouts.split(',')
+            if layout.strip() != '']
+    args['numGames'] = options.numGames
+    args['length'] = options.maxMoves
+    args['seed'] = options.seed
+    args['workers'] = options.workers
+    args['checkpoint'] = options.checkpoint
+    args['catchExceptions'] = options.catchExceptions
+
+    return args
+
+def main(argv):
+    """
+    Entry point for a capture tournament.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    args = readCommand(argv)
+
+    return runTournament(**args)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
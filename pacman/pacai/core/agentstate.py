@@ -1,4 +1,5 @@
 from pacai.core.actions import Actions
+from pacai.core import zobrist
 from pacai.core.directions import Directions
 from pacai.util import util
 
@@ -9,13 +10,17 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Search can make millions of these, so they are slotted
+    and copies skip the constructor (see `AgentState.copy`).
     """
 
+    __slots__ = ('_start', '_position', '_direction', '_isPacman', '_scaredTimer', '_zobristKey')
+
     def __init__(self, position, direction, isPacman):
-        # Save the starting information for later use.
-        self._startPosition = position
-        self._startDirection = direction
-        self._startIsPacman = isPacman
+        # Save the starting information (position, direction, isPacman) for later use.
+        # This never changes, so it is shared between all copies.
+        self._start = (position, direction, isPacman)
 
         self._position = position
         self._direction = direction
@@ -23,18 +28,25 @@ class AgentState:
         self._isPacman = isPacman
         self._scaredTimer = 0
 
+        # The Zobrist key for this configuration, computed lazily.
+        # Cleared any time the agent changes.
+        self._zobristKey = None
+
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        state = AgentState.__new__(AgentState)
 
+        state._start = self._start
         state._isPacman = self._isPacman
         state._position = self._position
         state._direction = self._direction
         state._scaredTimer = self._scaredTimer
+        state._zobristKey = self._zobristKey
 
         return state
 
     def decrementScaredTimer(self):
         self._scaredTimer = max(0, self._scaredTimer - 1)
+        self._zobristKey = None
 
     def getDirection(self):
         return self._direction
@@ -48,6 +60,29 @@ class AgentState:
     def getScaredTimer(self):
         return self._scaredTimer
 
+    def getSnapshot(self):
+        """
+        Get the changing parts of this agent as a JSON-able list (see `loadSnapshot`).
+        """
+
+        position = self._position
+        if (position is not None):
+            position = list(position)
+
+        return [position, self._direction, self._isPacman, self._scaredTimer]
+
+    def getZobristKey(self):
+        """
+        Get a Zobrist key (see `pacai.core.zobrist`) for the current position,
+        direction, type, and scared timer of this agent.
+        """
+
+        if (self._zobristKey is None):
+            self._zobristKey = zobrist.mixKey(zobrist.AGENT, self._position, self._direction,
+                    self._isPacman, self._scaredTimer)
+
+        return self._zobristKey
+
     def isBraveGhost(self):
         """
         A ghost that is not scared.
@@ -69,9 +104,11 @@ class AgentState:
 
     def setIsPacman(self, isPacman):
         self._isPacman = isPacman
+        self._zobristKey = None
 
     def setScaredTimer(self, timer):
         self._scaredTimer = timer
+        self._zobristKey = None
 
     def snapToNearestPoint(self):
         """
@@ -79,16 +116,29 @@ class AgentState:
         """
 
         self._position = util.nearestPoint(self._position)
+        self._zobristKey = None
+
+    def loadSnapshot(self, snapshot):
+        """
+        Restore this agent from a snapshot made by `getSnapshot`.
+        """
+
+        position, self._direction, self._isPacman, self._scaredTimer = snapshot
+
+        if (position is not None):
+            position = tuple(position)
+
+        self._position = position
+        self._zobristKey = None
 
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
-        self._direction = self._startDirection
-        self._isPacman = self._startIsPacman
+        self._position, self._direction, self._isPacman = self._start
         self._scaredTimer = 0
+        self._zobristKey = None
 
     def updatePosition(self, vector):
         """
@@ -105,6 +155,8 @@ class AgentState:
             # If this is a zero vector, face the same direction as before.
             self._direction = direction
 
+        self._zobristKey = None
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -115,7 +167,7 @@ class AgentState:
                 and self._scaredTimer == other._scaredTimer)
 
     def __hash__(self):
-        return util.buildHash(self._position, self._direction, self._isPacman, self._scaredTimer)
+        return self.getZobristKey()
 
     def __str__(self):
         typeString = 'Ghost'
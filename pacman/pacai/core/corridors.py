@@ -0,0 +1,295 @@
+"""
+A compressed graph of a maze's corridors, for single pair shortest paths.
+
+Most of a Pacman maze is one cell wide corridors, where a search can only keep going.
+The graph only has a node for each junction (three or more open neighbors) and dead end,
+and a weighted edge for each corridor between two nodes.
+A search from one cell to another starts and ends on the corridors those cells are in,
+and only expands nodes, so long corridors cost a single step.
+
+Graphs only depend on the walls and are kept in a process-wide store,
+so `pacai.core.distance.maze`, search agents (see `corridorSearch`) and anything else
+on the same walls share one graph.
+"""
+
+from pacai.core import distance
+from pacai.core.actions import Actions
+from pacai.core.search.queues import BucketQueue
+
+# The process-wide store of graphs, keyed by the walls.
+_graphs = {}
+
+class CorridorGraph(object):
+    """
+    The junctions and dead ends of a maze, and the corridors between them.
+    All moves cost one.
+    """
+
+    def __init__(self, walls):
+        self._cells = set(walls.asList(False))
+
+        # {node cell: [(other node cell, corridor index), ...]}
+        self._adjacent = {}
+
+        # Each corridor is the list of its cells, starting and ending with a node.
+        self._corridors = []
+
+        # {corridor cell (not a node): (corridor index, offset from the first cell)}
+        self._locations = {}
+
+        for cell in self._cells:
+            if (len(self._getNeighbors(cell)) != 2):
+                self._adjacent[cell] = []
+
+        for node in list(self._adjacent):
+            self._walkCorridors(node)
+
+        # Loops without any junctions get a node of their own.
+        for cell in sorted(self._cells):
+            if (cell not in self._adjacent and cell not in self._locations):
+                self._adjacent[cell] = []
+                self._walkCorridors(cell)
+
+    def findPath(self, start, goal):
+        """
+        Get the shortest path between two open cells.
+        Returns (actions, nodes expanded), the actions are None if the goal can not be reached.
+        """
+
+        cost, meeting, parents, expanded = self._search(start, goal)
+        if (cost is None):
+            return None, expanded
+
+        cells = self._getCells(start, goal, meeting, parents)
+
+        actions = []
+        for i in range(1, len(cells)):
+            vector = (cells[i][0] - cells[i - 1][0], cells[i][1] - cells[i - 1][1])
+            actions.append(Actions.vectorToDirection(vector))
+
+        return actions, expanded
+
+    def getDistance(self, start, goal):
+        """
+        Get the maze distance between two open cells, or None if the goal can not be reached.
+        """
+
+        return self._search(start, goal)[0]
+
+    def getNumCorridors(self):
+        return len(self._corridors)
+
+    def getNumNodes(self):
+        return len(self._adjacent)
+
+    def _getNeighbors(self, cell):
+        x, y = cell
+        return [neighbor for neighbor in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]
+                if neighbor in self._cells]
+
+    def _walkCorridors(self, node):
+        for neighbor in self._getNeighbors(node):
+            if (neighbor in self._locations):
+                # Already walked from the other end.
+                continue
+
+            corridor = [node]
+            previous, cell = node, neighbor
+
+            while (cell not in self._adjacent):
+                corridor.append(cell)
+
+                # Corridor cells have exactly two neighbors, keep going away from where we came.
+                following = [other for other in self._getNeighbors(cell) if other != previous]
+                previous, cell = cell, following[0]
+
+            corridor.append(cell)
+
+            if (len(corridor) == 2 and node > cell):
+                # Neighboring nodes, only keep one direction.
+                continue
+
+            index = len(self._corridors)
+            self._corridors.append(corridor)
+
+            for offset in range(1, len(corridor) - 1):
+                self._locations[corridor[offset]] = (index, offset)
+
+            self._adjacent[node].append((cell, index))
+            self._adjacent[cell].append((node, index))
+
+    def _getEnds(self, cell):
+        """
+        Get the nodes a cell can start (or end) at, as {node: (distance, corridor index)}.
+        """
+
+        if (cell in self._adjacent):
+            return {cell: (0, None)}
+
+        index, offset = self._locations[cell]
+        corridor = self._corridors[index]
+
+        ends = {corridor[0]: (offset, index)}
+
+        last = len(corridor) - 1
+        if (corridor[last] not in ends or last - offset < offset):
+            ends[corridor[last]] = (last - offset, index)
+
+        return ends
+
+    def _search(self, start, goal):
+        """
+        A* over the nodes (maze distances are never shorter than the manhattan distance).
+        Returns (cost, meeting node, parents, nodes expanded).
+        A meeting node of None means the path stays on one corridor.
+        """
+
+        if (start not in self._cells or goal not in self._cells):
+            raise ValueError('Both positions must be open cells: %s, %s.' % (start, goal))
+
+        bestCost = None
+        meeting = None
+
+        startLocation = self._locations.get(start)
+        goalLocation = self._locations.get(goal)
+
+        if (start == goal):
+            bestCost = 0
+        elif (startLocation is not None and goalLocation is not None
+                and startLocation[0] == goalLocation[0]):
+            bestCost = abs(startLocation[1] - goalLocation[1])
+
+        goalEnds = self._getEnds(goal)
+
+        # {node: (previous node, corridor index)}, the start's ends have no previous node.
+        parents = {}
+        costs = {}
+
+        # Lengths and the heuristic are small ints, so the open list can be a bucket queue.
+        queue = BucketQueue()
+
+        for (node, (cost, index)) in self._getEnds(start).items():
+            parents[node] = (None, index)
+            costs[node] = cost
+            queue.push(node, cost + distance.manhattan(node, goal))
+
+        expanded = 0
+
+        while (not queue.isEmpty()):
+            node, priority = queue.popWithPriority()
+            if (bestCost is not None and priority >= bestCost):
+                break
+
+            cost = costs[node]
+            expanded += 1
+
+            if (node in goalEnds):
+                total = cost + goalEnds[node][0]
+                if (bestCost is None or total < bestCost):
+                    bestCost = total
+                    meeting = node
+
+            for (other, index) in self._adjacent[node]:
+                otherCost = cost + len(self._corridors[index]) - 1
+                if (otherCost >= costs.get(other, float('inf'))):
+                    continue
+
+                costs[other] = otherCost
+                parents[other] = (node, index)
+                queue.push(other, otherCost + distance.manhattan(other, goal))
+
+        return bestCost, meeting, parents, expanded
+
+    def _getCells(self, start, goal, meeting, parents):
+        """
+        Get every cell along a path found by `_search`.
+        """
+
+        if (meeting is None):
+            return self._getCorridorCells(start, goal)
+
+        # Walk back over the nodes to the start.
+        nodes = [meeting]
+        while (parents[nodes[-1]][0] is not None):
+            nodes.append(parents[nodes[-1]][0])
+
+        nodes.reverse()
+
+        cells = self._getCorridorCells(start, nodes[0])
+        for i in range(1, len(nodes)):
+            cells += self._getCorridorCells(nodes[i - 1], nodes[i], parents[nodes[i]][1])[1:]
+
+        cells += self._getCorridorCells(meeting, goal)[1:]
+        return cells
+
+    def _getCorridorCells(self, fromCell, toCell, index = None):
+        """
+        Get the cells along a corridor from one cell to another (inclusive).
+        """
+
+        if (fromCell == toCell):
+            return [fromCell]
+
+        if (index is None):
+            location = self._locations.get(fromCell) or self._locations.get(toCell)
+            index = location[0]
+
+        corridor = self._corridors[index]
+
+        first = self._getOffset(corridor, index, fromCell, toCell)
+        last = self._getOffset(corridor, index, toCell, fromCell)
+
+        if (first <= last):
+            return corridor[first:(last + 1)]
+
+        return corridor[last:(first + 1)][::-1]
+
+    def _getOffset(self, corridor, index, cell, other):
+        location = self._locations.get(cell)
+        if (location is not None):
+            return location[1]
+
+        # A node, which end depends on where the other cell is (for loops, both ends are it).
+        if (corridor[0] != corridor[-1]):
+            if (corridor[0] == cell):
+                return 0
+
+            return len(corridor) - 1
+
+        otherLocation = self._locations.get(other)
+        if (otherLocation is None):
+            return 0
+
+        if (otherLocation[1] <= (len(corridor) - 1) / 2):
+            return 0
+
+        return len(corridor) - 1
+
+def corridorSearch(problem):
+    """
+    Search a problem with a single goal position and unit costs
+    (e.g. `pacai.core.search.position.PositionSearchProblem`) over its corridor graph.
+    Only nodes of the graph count towards the problem's expanded nodes.
+    """
+
+    actions, expanded = getCorridorGraph(problem.walls).findPath(problem.startingState(),
+            problem.goalState())
+
+    # Bookkeeping for display purposes (like the problem's own expansions).
+    problem._numExpanded += expanded
+
+    return actions
+
+def getCorridorGraph(walls):
+    """
+    Get the `CorridorGraph` for a set of walls from the process-wide store.
+    """
+
+    key = (walls.getWidth(), walls.getHeight(), walls.getBits())
+
+    graph = _graphs.get(key)
+    if (graph is None):
+        graph = CorridorGraph(walls)
+        _graphs[key] = graph
+
+    return graph
@@ -1,5 +1,4 @@
-from pacai.core.search.position import PositionSearchProblem
-from pacai.student import search
+from pacai.core import corridors
 
 def manhattan(position1, position2):
     """
@@ -18,9 +17,7 @@ def euclidean(position1, position2):
 def maze(position1, position2, gameState):
     """
     Returns the maze distance between any two positions,
-    using the search functions you have already built.
-
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    using a search over the corridors of the maze (see `pacai.core.corridors`).
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
@@ -36,6 +33,4 @@ def maze(position1, position2, gameState):
     if (walls[x2][y2]):
         raise ValueError('Position2 is a wall: ' + str(position2))
 
-    prob = PositionSearchProblem(gameState, start = position1, goal = position2)
-
-    return len(search.breadthFirstSearch(prob))
+    return corridors.getCorridorGraph(walls).getDistance(position1, position2)
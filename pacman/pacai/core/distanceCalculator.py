@@ -1,10 +1,31 @@
+import array
+import hashlib
+import logging
+import mmap
+import os
+import struct
 import sys
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
 
 DEFAULT_DISTANCE = 10000
 
+# Computed distance matrices can be cached on disk (keyed by the walls) so that later games
+# and other processes can just map them in.
+# The on-disk cache is off (None) by default,
+# set this to a directory (e.g. in `tempfile.gettempdir()`) to turn it on.
+DEFAULT_CACHE_DIR = None
+
+# The most bytes of matrices kept in a cache directory,
+# the least recently written ones are removed to make room for new ones.
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+CACHE_MAGIC = b'PACDIST1'
+CACHE_HEADER = struct.Struct('<8sII')
+
+# Marks a pair of cells that cannot reach each other.
+UNREACHABLE = 0xFFFF
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -48,11 +69,11 @@ class Distancer(object):
         return bestDistance
 
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        distance = self._distances.getDistance(pos1, pos2)
+        if (distance is not None):
+            return distance
 
-        raise Exception("Position not in grid: " + str(key))
+        raise Exception("Position not in grid: " + str((pos1, pos2)))
 
     def isReadyForMazeDistance(self):
         return (self._distances is not None)
@@ -78,79 +99,296 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
+# A process-wide store of computed distances, keyed by `getWallsKey`.
+# Every agent (in every game) that asks for distances on the same walls shares one matrix.
+# Across processes, the matrices are shared through the memory-mapped on-disk cache.
 distanceMap = {}
 
 class DistanceCalculator:
     def __init__(self, layout, distancer):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
 
     def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+        self.distancer._distances = getDistances(self.layout)
 
-        self.distancer._distances = self.cache[self.layout.walls]
+def clearDistanceMap():
+    """
+    Drop all the distances held in the process-wide store.
+    The on-disk cache is not affected.
+    """
 
-def computeDistances(layout):
+    distanceMap.clear()
+
+def getDistances(layout, cacheDir = None):
     """
-    Runs UCS to all other positions from each position.
+    Get the `MazeDistances` for a layout from the process-wide store,
+    only loading/computing them (see `computeDistances`) the first time the walls are seen.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    key = getWallsKey(layout.walls)
+
+    distances = distanceMap.get(key)
+    if (distances is None):
+        distances = computeDistances(layout, cacheDir)
+        distanceMap[key] = distances
+
+    return distances
+
+class MazeDistances(object):
+    """
+    All-pairs maze distances for a set of walls.
+
+    Every open cell is given an id (in the order of `pacai.core.grid.Grid.asList`),
+    and the distances are held in a dense N x N matrix of unsigned 16-bit ints
+    (either an `array.array` or a memory-mapped cache file).
+    """
+
+    def __init__(self, walls, distances = None):
+        """
+        Args:
+            walls: A `pacai.core.grid.Grid` of walls.
+            distances: A precomputed matrix (e.g. from the cache).
+                If None, the distances will be computed.
+        """
+
+        self._cells = walls.asList(False)
+        self._cellIds = {cell: index for (index, cell) in enumerate(self._cells)}
+        self._numCells = len(self._cells)
+
+        if (distances is None):
+            distances = _bfsAllPairs(self._cells, self._cellIds)
+
+        self._distances = distances
+
+    def getCellId(self, position):
+        """
+        Get the id (row/column in the matrix) of a cell, or None if it is not an open cell.
+        """
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+        return self._cellIds.get(position)
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+    def getCells(self):
+        return self._cells
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+    def getDistance(self, pos1, pos2):
+        """
+        Get the maze distance between two open cells.
+        Returns None if either position is not an open cell,
+        and DEFAULT_DISTANCE if the cells cannot reach each other.
+        """
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+        id1 = self._cellIds.get(pos1)
+        id2 = self._cellIds.get(pos2)
+        if (id1 is None or id2 is None):
+            return None
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+        distance = self._distances[id1 * self._numCells + id2]
+        if (distance == UNREACHABLE):
+            return DEFAULT_DISTANCE
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+        return distance
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+    def getDistanceById(self, id1, id2):
+        return self._distances[id1 * self._numCells + id2]
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+    def getMatrix(self):
+        """
+        Get the flat (row-major) distance matrix.
+        """
+
+        return self._distances
+
+    def getNumCells(self):
+        return self._numCells
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+def computeDistances(layout, cacheDir = None):
+    """
+    Get all-pairs maze distances for the layout as a `MazeDistances`.
+    With a cache directory (cacheDir, or else DEFAULT_CACHE_DIR),
+    distances are loaded from the on-disk cache when possible.
+    Otherwise they are computed with a BFS from each open cell (all moves cost one)
+    and then written to the cache (if there is one).
+    """
 
-            for other in adjacent:
-                if other not in dist:
-                    continue
+    if (cacheDir is None):
+        cacheDir = DEFAULT_CACHE_DIR
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+    walls = layout.walls
+    path = None
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+    if (cacheDir is not None):
+        path = os.path.join(cacheDir, getWallsKey(walls) + '.dist')
+
+        distances = _loadCachedDistances(path, walls.count(False))
+        if (distances is not None):
+            return MazeDistances(walls, distances)
+
+    distances = MazeDistances(walls)
+
+    if (path is not None):
+        _writeCachedDistances(path, distances.getMatrix())
 
     return distances
 
+def getWallsKey(walls):
+    """
+    Get a stable key that identifies a set of walls.
+    """
+
+    description = '%dx%d:%x' % (walls.getWidth(), walls.getHeight(), walls.getBits())
+    return hashlib.sha1(description.encode('ascii')).hexdigest()
+
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-        return distances[key]
+    distance = distances.getDistance(pos1, pos2)
+    if (distance is None):
+        return DEFAULT_DISTANCE
+
+    return distance
+
+def _bfsAllPairs(cells, cellIds):
+    """
+    Run a frontier-batched BFS over cell ids from every open cell.
+    """
+
+    numCells = len(cells)
+    if (numCells >= UNREACHABLE):
+        raise ValueError('Too many open cells for a 16-bit distance matrix: %d.' % (numCells))
+
+    # Adjacency lists over cell ids.
+    neighbors = []
+    for (x, y) in cells:
+        adjacent = []
+        for neighbor in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+            if (neighbor in cellIds):
+                adjacent.append(cellIds[neighbor])
+
+        neighbors.append(adjacent)
+
+    distances = array.array('H')
+
+    for source in range(numCells):
+        row = [UNREACHABLE] * numCells
+        row[source] = 0
+
+        frontier = [source]
+        depth = 0
+
+        while (len(frontier) > 0):
+            depth += 1
+            nextFrontier = []
+
+            for cell in frontier:
+                for neighbor in neighbors[cell]:
+                    if (row[neighbor] == UNREACHABLE):
+                        row[neighbor] = depth
+                        nextFrontier.append(neighbor)
+
+            frontier = nextFrontier
+
+        distances.extend(row)
+
+    return distances
+
+def _loadCachedDistances(path, numCells):
+    """
+    Map a cached distance matrix into memory.
+    Returns None if there is no usable cache file.
+    """
+
+    if (not os.path.isfile(path)):
+        return None
+
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(CACHE_HEADER.size)
+            if (len(header) != CACHE_HEADER.size):
+                return None
+
+            magic, cachedNumCells, _ = CACHE_HEADER.unpack(header)
+            expectedSize = CACHE_HEADER.size + (2 * numCells * numCells)
+            if (magic != CACHE_MAGIC or cachedNumCells != numCells
+                    or os.fstat(file.fileno()).st_size != expectedSize):
+                return None
+
+            if (numCells == 0):
+                return array.array('H')
+
+            if (sys.byteorder != 'little'):
+                # The cache is little-endian, so it can't be used in-place.
+                distances = array.array('H', file.read())
+                distances.byteswap()
+                return distances
+
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        logging.debug('Unable to load cached distances from %s: %s.' % (path, ex))
+        return None
+
+    return memoryview(data)[CACHE_HEADER.size:].cast('H')
+
+def _writeCachedDistances(path, distances):
+    """
+    Atomically write a distance matrix to the cache,
+    then make sure the cache stays within CACHE_MAX_BYTES.
+    Failures are not fatal, the distances just won't be cached.
+    """
+
+    numCells = int(len(distances) ** 0.5)
+    if (CACHE_HEADER.size + (2 * len(distances)) > CACHE_MAX_BYTES):
+        logging.debug('Distances for %d cells are too big to cache.' % (numCells))
+        return
+
+    data = distances
+    if (sys.byteorder != 'little'):
+        data = array.array('H', distances)
+        data.byteswap()
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        tempPath = '%s.%d.tmp' % (path, os.getpid())
+        with open(tempPath, 'wb') as file:
+            file.write(CACHE_HEADER.pack(CACHE_MAGIC, numCells, 0))
+            file.write(data.tobytes())
+
+        os.replace(tempPath, path)
+        _evictCachedDistances(os.path.dirname(path), path)
+    except OSError as ex:
+        logging.debug('Unable to cache distances to %s: %s.' % (path, ex))
+
+def _evictCachedDistances(cacheDir, keepPath):
+    """
+    Remove the least recently written matrices (other than keepPath)
+    until the cache directory holds at most CACHE_MAX_BYTES of them.
+    """
+
+    entries = []
+    for name in os.listdir(cacheDir):
+        if (not name.endswith('.dist')):
+            continue
+
+        path = os.path.join(cacheDir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Removed by another process.
+            continue
+
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    totalBytes = sum([size for (mtime, size, path) in entries])
+
+    for (mtime, size, path) in sorted(entries):
+        if (totalBytes <= CACHE_MAX_BYTES):
+            break
+
+        if (path == keepPath):
+            continue
+
+        try:
+            os.remove(path)
+        except OSError:
+            continue
 
-    return DEFAULT_DISTANCE
+        totalBytes -= size
@@ -0,0 +1,236 @@
+"""
+A framework for evaluation functions made of cached features.
+
+Each feature is a function of a few components of a state
+(e.g. Pacman's position and the food), which are declared when the feature is made.
+Feature values are memoized by the values of those components,
+so the many leaves of a search that share them (e.g. differ only in the ghosts or the score)
+share the work.
+Features also get an `EvaluationContext` with precomputed maze distances for the layout,
+so they can look up distances instead of searching for them.
+
+Example:
+```
+def closestFood(context, position, food):
+    return min([context.getDistance(position, dot) for dot in food], default = 0)
+
+evaluator = FeatureEvaluator([
+    Feature('closestFood', closestFood, [PACMAN_POSITION, FOOD]),
+    Feature('score', lambda context, score: score, [SCORE]),
+], {'closestFood': -1.0, 'score': 1.0})
+
+value = evaluator(state)
+```
+"""
+
+from pacai.core.distanceCalculator import Distancer
+from pacai.core.grid import Grid
+
+# The components of a state that features can depend on.
+PACMAN_POSITION = 'pacmanPosition'
+GHOST_POSITIONS = 'ghostPositions'
+SCARED_TIMERS = 'scaredTimers'
+FOOD = 'food'
+CAPSULES = 'capsules'
+SCORE = 'score'
+
+def _getGhostPositions(state):
+    # The exact positions, scared ghosts move at half speed and may be between cells.
+    return tuple([state.getAgentState(index).getPosition()
+            for index in range(1, state.getNumAgents())])
+
+def _getScaredTimers(state):
+    return tuple([state.getAgentState(index).getScaredTimer()
+            for index in range(1, state.getNumAgents())])
+
+# How to get the (hashable) key of each component from a state.
+COMPONENTS = {
+    PACMAN_POSITION: lambda state: state.getAgentPosition(0),
+    GHOST_POSITIONS: _getGhostPositions,
+    SCARED_TIMERS: _getScaredTimers,
+    FOOD: lambda state: state.getFoodBits(),
+    CAPSULES: lambda state: tuple(state.getCapsules()),
+    SCORE: lambda state: state.getScore(),
+}
+
+# Each feature's cache is emptied when it holds this many values.
+DEFAULT_CACHE_SIZE = 100000
+
+class EvaluationContext(object):
+    """
+    Everything about the layout that features may need,
+    and the decoding of component keys into the values that features get
+    (e.g. the food bits into a list of food positions).
+    """
+
+    def __init__(self, layout):
+        self._layout = layout
+
+        self._distancer = Distancer(layout)
+        self._distancer.getMazeDistances()
+
+        self._foodLists = {}
+
+    def decode(self, component, key):
+        """
+        Get the value a feature gets for a component's key.
+        """
+
+        if (component == FOOD):
+            return self.getFoodList(key)
+
+        return key
+
+    def getDistance(self, position1, position2):
+        """
+        Get the (precomputed) maze distance between two positions.
+        """
+
+        return self._distancer.getDistance(position1, position2)
+
+    def getFoodList(self, foodBits):
+        """
+        Get the positions of the food in a food bitboard (see `pacai.core.grid.Grid.getBits`).
+        """
+
+        food = self._foodLists.get(foodBits)
+        if (food is None):
+            grid = Grid(self._layout.getWidth(), self._layout.getHeight())
+            grid.setBits(foodBits)
+
+            if (len(self._foodLists) >= DEFAULT_CACHE_SIZE):
+                self._foodLists.clear()
+
+            food = grid.asList()
+            self._foodLists[foodBits] = food
+
+        return food
+
+    def getLayout(self):
+        return self._layout
+
+class Feature(object):
+    """
+    A feature of a state that only depends on the given components.
+    The function is called as `function(context, *componentValues)`
+    (in the same order as the components).
+    """
+
+    def __init__(self, name, function, components, cacheSize = DEFAULT_CACHE_SIZE):
+        for component in components:
+            if (component not in COMPONENTS):
+                raise ValueError("Unknown state component '%s', choose from: %s." %
+                        (component, ', '.join(sorted(COMPONENTS))))
+
+        self._name = name
+        self._function = function
+        self._components = list(components)
+        self._cacheSize = int(cacheSize)
+
+        self._cache = {}
+        self._hits = 0
+        self._misses = 0
+
+    def clear(self):
+        self._cache = {}
+
+    def compute(self, context, keys):
+        """
+        Get the value of the feature for a tuple of component keys (memoized).
+        """
+
+        value = self._cache.get(keys)
+        if (value is not None):
+            self._hits += 1
+            return value
+
+        self._misses += 1
+
+        values = [context.decode(self._components[i], keys[i]) for i in range(len(keys))]
+        value = self._function(context, *values)
+
+        if (len(self._cache) >= self._cacheSize):
+            self._cache.clear()
+
+        self._cache[keys] = value
+        return value
+
+    def getComponents(self):
+        return self._components
+
+    def getName(self):
+        return self._name
+
+    def getStats(self):
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'entries': len(self._cache),
+        }
+
+class FeatureEvaluator(object):
+    """
+    An evaluation function that is the weighted sum of features.
+    Evaluators can be called like any other evaluation function (with a state).
+    """
+
+    def __init__(self, features, weights):
+        self._features = list(features)
+        self._weights = dict(weights)
+        self._context = None
+
+    def __call__(self, state):
+        return self.evaluate(state)
+
+    def evaluate(self, state, overrides = {}):
+        """
+        Get the weighted sum of the features of a state.
+        See `FeatureEvaluator.getFeatures` for the overrides.
+        """
+
+        features = self.getFeatures(state, overrides)
+        return sum([self._weights.get(name, 0.0) * value for (name, value) in features.items()])
+
+    def getContext(self, state):
+        """
+        Get the context for the state's layout (the features' caches are for a single layout).
+        """
+
+        layout = state.getInitialLayout()
+        if (self._context is None or self._context.getLayout() is not layout):
+            self._context = EvaluationContext(layout)
+            for feature in self._features:
+                feature.clear()
+
+        return self._context
+
+    def getFeatures(self, state, overrides = {}):
+        """
+        Get the value of each feature of a state as a dict.
+        The overrides are component keys to use instead of the state's
+        (e.g. the food before a move was made).
+        """
+
+        context = self.getContext(state)
+
+        keys = dict(overrides)
+        features = {}
+
+        for feature in self._features:
+            featureKeys = []
+            for component in feature.getComponents():
+                if (component not in keys):
+                    keys[component] = COMPONENTS[component](state)
+
+                featureKeys.append(keys[component])
+
+            features[feature.getName()] = feature.compute(context, tuple(featureKeys))
+
+        return features
+
+    def getStats(self):
+        """
+        Get the cache stats of each feature.
+        """
+
+        return {feature.getName(): feature.getStats() for feature in self._features}
@@ -0,0 +1,127 @@
+"""
+A nearest food index (by maze distance).
+
+The index is built on the precomputed all-pairs maze distances of a layout
+(see `pacai.core.distanceCalculator.getDistances`) and is shared by every state on the same walls.
+The food itself is not part of the index, it is passed to each query as a bitboard
+(see `pacai.core.grid.Grid.getBits`),
+so eating food never has to update the index and states can share it freely.
+"""
+
+import heapq
+
+from pacai.core.distanceCalculator import UNREACHABLE
+from pacai.core.distanceCalculator import getDistances
+from pacai.core.distanceCalculator import getWallsKey
+
+# When there is less food than this fraction of the open cells,
+# the food is checked directly instead of walking the cells nearest first.
+SPARSE_FOOD_FRACTION = 0.1
+
+# The process-wide store of indexes, keyed by the walls.
+_indexes = {}
+
+class FoodIndex(object):
+    """
+    Answers nearest food queries for a set of walls.
+
+    For each cell, all the other (reachable) cells sorted by their distance
+    are built on the first query from that cell.
+    A query walks them until it has seen enough food,
+    or (if there is little food) checks the distance to each piece of food.
+    """
+
+    def __init__(self, walls, distances):
+        self._height = walls.getHeight()
+        self._distances = distances
+
+        self._cells = distances.getCells()
+        self._numCells = distances.getNumCells()
+        self._matrix = distances.getMatrix()
+
+        # The bit of each cell in a food bitboard, and the other way around.
+        self._cellBits = [(x * self._height + y) for (x, y) in self._cells]
+        self._bitCells = {bit: cellId for (cellId, bit) in enumerate(self._cellBits)}
+
+        # The cell ids ordered by distance from each cell (built lazily).
+        self._orders = [None] * self._numCells
+
+    def getDistance(self, position1, position2):
+        """
+        Get the maze distance between two open cells (see `MazeDistances.getDistance`).
+        """
+
+        return self._distances.getDistance(position1, position2)
+
+    def getNearest(self, foodBits, position, k = 1):
+        """
+        Get up to k of the nearest food to a position as a list of (distance, food position),
+        nearest first.
+        Unreachable food is never returned.
+        """
+
+        position = (int(position[0] + 0.5), int(position[1] + 0.5))
+        cellId = self._distances.getCellId(position)
+        if (cellId is None or foodBits == 0):
+            return []
+
+        numFood = bin(foodBits).count('1')
+        if (numFood < self._numCells * SPARSE_FOOD_FRACTION):
+            return self._getNearestSparse(foodBits, cellId, k)
+
+        order = self._orders[cellId]
+        if (order is None):
+            order = self._buildOrder(cellId)
+
+        offset = cellId * self._numCells
+        nearest = []
+
+        for otherId in order:
+            if ((foodBits >> self._cellBits[otherId]) & 1):
+                nearest.append((self._matrix[offset + otherId], self._cells[otherId]))
+                if (len(nearest) == k):
+                    break
+
+        return nearest
+
+    def _buildOrder(self, cellId):
+        offset = cellId * self._numCells
+        row = self._matrix[offset:(offset + self._numCells)]
+
+        order = [otherId for otherId in sorted(range(self._numCells), key = row.__getitem__)
+                if row[otherId] != UNREACHABLE]
+
+        self._orders[cellId] = order
+        return order
+
+    def _getNearestSparse(self, foodBits, cellId, k):
+        offset = cellId * self._numCells
+        candidates = []
+
+        while (foodBits):
+            lowest = foodBits & -foodBits
+            foodBits ^= lowest
+
+            otherId = self._bitCells.get(lowest.bit_length() - 1)
+            if (otherId is None):
+                continue
+
+            distance = self._matrix[offset + otherId]
+            if (distance != UNREACHABLE):
+                candidates.append((distance, self._cells[otherId]))
+
+        return heapq.nsmallest(k, candidates)
+
+def getFoodIndex(layout):
+    """
+    Get the `FoodIndex` for a layout's walls from the process-wide store.
+    """
+
+    key = getWallsKey(layout.walls)
+
+    index = _indexes.get(key)
+    if (index is None):
+        index = FoodIndex(layout.walls, getDistances(layout))
+        _indexes[key] = index
+
+    return index
@@ -168,6 +168,8 @@ class Game:
             startTime = time.time()
 
             try:
+                agent.setMoveTimeLimit(min(self.rules.getMoveWarningTime(agentIndex),
+                        self.rules.getMoveTimeout(agentIndex)))
                 agent.registerInitialState(self.state)
             except Exception as ex:
                 if (not self.catchExceptions):
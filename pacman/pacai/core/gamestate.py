@@ -1,9 +1,12 @@
 import abc
-import copy
 
+from pacai.core import foodindex
+from pacai.core import zobrist
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
-from pacai.util import util
+
+# The most nearest food queries that are cached (see `AbstractGameState.getNearestFood`).
+MAX_NEAREST_FOOD_CACHE = 10000
 
 class AbstractGameState(abc.ABC):
     """
@@ -13,8 +16,17 @@ class AbstractGameState(abc.ABC):
     and can be used by agents to reason about the game.
 
     Only use the accessor methods to get data about the game state.
+
+    Game states are slotted (children must declare their own `__slots__`),
+    and successors are cloned field by field (see `AbstractGameState._copyInto`).
     """
 
+    __slots__ = ('_lastAgentMoved', '_gameover', '_win', '_layout', '_hash',
+            '_foodCopied', '_food', '_lastFoodEaten',
+            '_capsulesCopied', '_capsules', '_lastCapsuleEaten',
+            '_highlightLocations', '_agentStates', '_score', '_boardHash',
+            '_foodIndex', '_nearestFood')
+
     def __init__(self, layout):
         self._lastAgentMoved = None
         self._gameover = False
@@ -22,7 +34,7 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
+        # Keep a copy of the hash.
         # Any children should be sure to clear the hash when modifications are made.
         self._hash = None
 
@@ -47,6 +59,18 @@ class AbstractGameState(abc.ABC):
 
         self._score = 0
 
+        # The Zobrist hash (see `pacai.core.zobrist`) of everything except the agents.
+        # Mutators XOR their changes into this, so it never needs to be fully recomputed.
+        self._boardHash = self._computeBoardHash()
+
+        # The nearest food index (see `pacai.core.foodindex`) is built on the first query,
+        # and is shared by all the successors.
+        self._foodIndex = None
+
+        # Nearest food queries, keyed by (food bits, position, k).
+        # This is shared with successors until they eat (or until it gets too big).
+        self._nearestFood = {}
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -56,6 +80,34 @@ class AbstractGameState(abc.ABC):
 
         pass
 
+    def generateSuccessors(self, agentIndex):
+        """
+        Returns (action, successor) pairs for every legal action of the specified agent
+        (in the same order as `getLegalActions`).
+        Terminal states have no successors.
+
+        This is cheaper than calling `generateSuccessor` for each legal action,
+        since the legal actions are only computed once (and not re-checked for every successor).
+        """
+
+        return list(self.iterSuccessors(agentIndex))
+
+    def iterSuccessors(self, agentIndex, actions = None):
+        """
+        Like `generateSuccessors`, but yield each (action, successor) pair
+        only when it is asked for,
+        so searches that stop early (e.g. alpha-beta cutoffs) never build the rest.
+        The actions (default: all the legal actions) must be legal, they are not checked.
+        """
+
+        if (actions is None):
+            actions = self.getLegalActions(agentIndex)
+
+        for action in actions:
+            successor = self._initSuccessor()
+            successor._applySuccessorAction(agentIndex, action, checkLegal = False)
+            yield (action, successor)
+
     @abc.abstractmethod
     def getLegalActions(self, agentIndex = 0):
         """
@@ -65,7 +117,7 @@ class AbstractGameState(abc.ABC):
         pass
 
     def addScore(self, score):
-        self._hash = None
+        self._setScoreHash(self._score + score)
         self._score += score
 
     def eatCapsule(self, x, y):
@@ -83,6 +135,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
+        self._boardHash ^= zobrist.getKey(zobrist.CAPSULE, x, y)
         self._hash = None
         return True
 
@@ -98,13 +151,18 @@ class AbstractGameState(abc.ABC):
             self._food = self._food.copy()
             self._foodCopied = True
 
-        self._food[x][y] = False
+        self._food.set(x, y, False)
         self._lastFoodEaten = (x, y)
+        self._nearestFood = {}
 
+        self._boardHash ^= zobrist.getKey(zobrist.FOOD, x, y)
         self._hash = None
         return True
 
     def endGame(self, win):
+        self._boardHash ^= (zobrist.getKey(zobrist.GAMEOVER, self._gameover, self._win)
+                ^ zobrist.getKey(zobrist.GAMEOVER, True, win))
+
         self._gameover = True
         self._win = win
 
@@ -149,6 +207,26 @@ class AbstractGameState(abc.ABC):
 
         return self._food.copy()
 
+    def getFoodBits(self):
+        """
+        Get the food as a bitboard (see `pacai.core.grid.Grid.getBits`), without copying the grid.
+        Handy as a cheap key for caching anything that depends on the food.
+        """
+
+        return self._food.getBits()
+
+    def getFoodDistance(self, position, food = None):
+        """
+        Get the maze distance from a position to the nearest food (see `getNearestFood`),
+        or None if there is no (reachable) food.
+        """
+
+        nearest = self.getNearestFood(position, 1, food)
+        if (len(nearest) == 0):
+            return None
+
+        return nearest[0][0]
+
     def getHighlightLocations(self):
         return self._highlightLocations
 
@@ -173,6 +251,35 @@ class AbstractGameState(abc.ABC):
     def getLastFoodEaten(self):
         return self._lastFoodEaten
 
+    def getNearestFood(self, position, k = 1, food = None):
+        """
+        Get up to k of the nearest food to a position (by maze distance)
+        as a list of (distance, food position), nearest first.
+        The food can be limited to a grid (e.g. one side's food in capture).
+
+        Answers are cached until food is eaten, and the cache is shared with successors.
+        """
+
+        foodBits = self._food.getBits()
+        if (food is not None):
+            foodBits = food.getBits()
+
+        key = (foodBits, position, k)
+        nearest = self._nearestFood.get(key)
+        if (nearest is not None):
+            return nearest
+
+        if (self._foodIndex is None):
+            self._foodIndex = foodindex.getFoodIndex(self._layout)
+
+        nearest = self._foodIndex.getNearest(foodBits, position, k)
+
+        if (len(self._nearestFood) >= MAX_NEAREST_FOOD_CACHE):
+            self._nearestFood = {}
+
+        self._nearestFood[key] = nearest
+        return nearest
+
     def getNumAgents(self):
         return len(self._agentStates)
 
@@ -190,6 +297,25 @@ class AbstractGameState(abc.ABC):
 
         return self._food.count()
 
+    def getSnapshot(self):
+        """
+        Get everything about this state that changes during a game as a JSON-able dict.
+        Together with the layout, this is enough to restore the state (see `loadSnapshot`).
+        Children with more state should extend the snapshot.
+        """
+
+        return {
+            'score': self._score,
+            'gameover': self._gameover,
+            'win': self._win,
+            'lastAgentMoved': self._lastAgentMoved,
+            'food': '%x' % (self._food.getBits()),
+            'lastFoodEaten': self._lastFoodEaten,
+            'capsules': self._capsules,
+            'lastCapsuleEaten': self._lastCapsuleEaten,
+            'agents': [agentState.getSnapshot() for agentState in self._agentStates],
+        }
+
     def getScore(self):
         return self._score
 
@@ -217,14 +343,46 @@ class AbstractGameState(abc.ABC):
         Returns true if the location (x, y) has food.
         """
 
-        return self._food[x][y]
+        return self._food.get(x, y)
 
     def hasWall(self, x, y):
         """
         Returns true if (x, y) has a wall, false otherwise.
         """
 
-        return self._layout.walls[x][y]
+        return self._layout.walls.get(x, y)
+
+    def loadSnapshot(self, snapshot):
+        """
+        Restore a snapshot made by `getSnapshot` (on a state made from the same layout).
+        This state is modified in-place.
+        """
+
+        if (len(snapshot['agents']) != len(self._agentStates)):
+            raise ValueError('Snapshot has %d agents, but the state has %d.' %
+                    (len(snapshot['agents']), len(self._agentStates)))
+
+        self._score = snapshot['score']
+        self._gameover = snapshot['gameover']
+        self._win = snapshot['win']
+        self._lastAgentMoved = snapshot['lastAgentMoved']
+
+        self._food = self._food.copy()
+        self._food.setBits(int(snapshot['food'], 16))
+        self._foodCopied = True
+        self._lastFoodEaten = _toPosition(snapshot['lastFoodEaten'])
+
+        self._capsules = [tuple(capsule) for capsule in snapshot['capsules']]
+        self._capsulesCopied = True
+        self._lastCapsuleEaten = _toPosition(snapshot['lastCapsuleEaten'])
+
+        self._agentStates = [agentState.copy() for agentState in self._agentStates]
+        for (agentState, agentSnapshot) in zip(self._agentStates, snapshot['agents']):
+            agentState.loadSnapshot(agentSnapshot)
+
+        self._boardHash = self._computeBoardHash()
+        self._hash = None
+        self._nearestFood = {}
 
     def isLose(self):
         return self.isOver() and not self._win
@@ -239,17 +397,77 @@ class AbstractGameState(abc.ABC):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        self._setScoreHash(score)
         self._score = score
+
+    def _setScoreHash(self, score):
+        """
+        Swap the current score's key in the board hash for the key of the new score.
+        """
+
+        self._boardHash ^= (zobrist.mixKey(zobrist.SCORE, self._score)
+                ^ zobrist.mixKey(zobrist.SCORE, score))
         self._hash = None
 
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action, checkLegal = True):
+        """
+        Apply the action to the context state (self).
+        The legality check can be skipped if the action is already known to be legal.
+        """
+
+        pass
+
+    def _computeBoardHash(self):
+        """
+        Compute the board hash from scratch.
+        """
+
+        boardHash = ((hash(self._layout) & zobrist.KEY_MASK)
+                ^ zobrist.mixKey(zobrist.SCORE, self._score)
+                ^ zobrist.getKey(zobrist.GAMEOVER, self._gameover, self._win))
+
+        for (x, y) in self._food.asList():
+            boardHash ^= zobrist.getKey(zobrist.FOOD, x, y)
+
+        for (x, y) in self._capsules:
+            boardHash ^= zobrist.getKey(zobrist.CAPSULE, x, y)
+
+        return boardHash
+
+    def _copyInto(self, other):
+        """
+        Shallow copy all the fields of this state into another (uninitialized) state.
+        Children with more fields should extend this.
+        """
+
+        other._lastAgentMoved = self._lastAgentMoved
+        other._gameover = self._gameover
+        other._win = self._win
+        other._layout = self._layout
+        other._hash = self._hash
+        other._foodCopied = self._foodCopied
+        other._food = self._food
+        other._lastFoodEaten = self._lastFoodEaten
+        other._capsulesCopied = self._capsulesCopied
+        other._capsules = self._capsules
+        other._lastCapsuleEaten = self._lastCapsuleEaten
+        other._highlightLocations = self._highlightLocations
+        other._agentStates = self._agentStates
+        other._score = self._score
+        other._boardHash = self._boardHash
+        other._foodIndex = self._foodIndex
+        other._nearestFood = self._nearestFood
+
     def _initSuccessor(self):
         """
         Get a state that will eventually serve as a successor.
         Initialize the successor to look like this state.
         """
 
-        # Start with a shallow copy.
-        successor = copy.copy(self)
+        # Start with a shallow copy (without going through the constructor).
+        successor = object.__new__(self.__class__)
+        self._copyInto(successor)
         successor._hash = None
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
@@ -288,8 +506,20 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
+        # The board components are already hashed incrementally,
+        # only the agents (which are modified in-place by the rules) need to be folded in.
         if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+            hashValue = self._boardHash
+            for agentIndex in range(len(self._agentStates)):
+                agentKey = self._agentStates[agentIndex].getZobristKey()
+                hashValue ^= zobrist.getAgentKey(agentIndex, agentKey)
+
+            self._hash = hashValue
 
         return self._hash
+
+def _toPosition(value):
+    if (value is None):
+        return None
+
+    return tuple(value)
@@ -1,52 +1,116 @@
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.
+    A 2-dimensional array of booleans backed by a single bitboard (an arbitrary-precision int).
     Data is accessed via grid[x][y] where (x, y) are positions on a Pacman map with x horizontal,
     y vertical and the origin (0, 0) in the bottom left corner.
+
+    The cell (x, y) is stored in bit (x * height + y).
+    Since ints are immutable, copies are O(1) and only pay for a new int when they are written to.
+    Counting is a popcount, and equality/hashing are single int operations.
     """
 
+    __slots__ = ('_width', '_height', '_bits', '_columns')
+
     def __init__(self, width, height, initialValue = False):
         if (not isinstance(initialValue, bool)):
             raise ValueError('Grids can only contain booleans')
 
         self._width = width
         self._height = height
-        self._data = [[initialValue for y in range(height)] for x in range(width)]
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = (1 << (width * height)) - 1
+
+        # Column views are built lazily, since most copies are never indexed.
+        self._columns = None
 
     def asList(self, key = True):
         values = []
 
-        for x in range(self._width):
-            for y in range(self._height):
-                if self[x][y] == key:
-                    values.append((x, y))
+        bits = self._bits
+        if (not key):
+            bits = ~bits & ((1 << (self._width * self._height)) - 1)
+
+        # Walk the set bits from lowest to highest, which is x-major order.
+        while (bits):
+            lowest = bits & -bits
+            values.append(self._cellIndexToPosition(lowest.bit_length() - 1))
+            bits ^= lowest
 
         return values
 
     def copy(self):
         grid = Grid(self._width, self._height)
-        grid._data = [row.copy() for row in self._data]
+        grid._bits = self._bits
         return grid
 
-    def count(self, item =True):
-        return sum([x.count(item) for x in self._data])
+    def count(self, item = True):
+        numSet = bin(self._bits).count('1')
+
+        if (item):
+            return numSet
+
+        return (self._width * self._height) - numSet
 
     def deepCopy(self):
         return self.copy()
 
+    def get(self, x, y):
+        """
+        Get the value at (x, y) without going through a column view.
+        """
+
+        self._checkPosition(x, y)
+        return bool((self._bits >> (x * self._height + y)) & 1)
+
+    def getBits(self):
+        """
+        Get the raw bitboard, where the cell (x, y) is bit (x * height + y).
+        """
+
+        return self._bits
+
     def getHeight(self):
         return self._height
 
     def getWidth(self):
         return self._width
 
+    def setBits(self, bits):
+        """
+        Replace the raw bitboard (see `getBits`).
+        """
+
+        if (bits < 0 or bits >> (self._width * self._height) != 0):
+            raise ValueError('Bits do not fit in a %dx%d grid.' % (self._width, self._height))
+
+        self._bits = bits
+
+    def set(self, x, y, value):
+        """
+        Set the value at (x, y) without going through a column view.
+        """
+
+        self._checkPosition(x, y)
+        mask = 1 << (x * self._height + y)
+
+        if (value):
+            self._bits |= mask
+        else:
+            self._bits &= ~mask
+
     def shallowCopy(self):
-        grid = Grid(self._width, self._height)
-        grid._data = self._data
-        return grid
+        # The backing int is immutable, so a shallow copy is the same as a full copy.
+        return self.copy()
+
+    def _checkPosition(self, x, y):
+        # Without this, an out of range y would silently read or write the next column's bits.
+        if (not (0 <= x < self._width and 0 <= y < self._height)):
+            raise IndexError('Grid position out of range: ' + str((x, y)))
 
     def _cellIndexToPosition(self, index):
-        x = index / self._height
+        x = index // self._height
         y = index % self._height
 
         return x, y
@@ -55,30 +119,67 @@ class Grid:
         if (other is None):
             return False
 
-        return self._data == other._data
+        return (self._bits == other._bits
+                and self._width == other._width
+                and self._height == other._height)
 
     def __getitem__(self, i):
-        return self._data[i]
-
-    def __hash__(self):
-        hashcode = 0
-        base = 1
+        if (self._columns is None):
+            self._columns = [_GridColumn(self, x) for x in range(self._width)]
 
-        for row in self._data:
-            for value in row:
-                if (value):
-                    hashcode += base
-                base *= 2
+        return self._columns[i]
 
-        return hash(hashcode)
+    def __hash__(self):
+        return hash(self._bits)
 
     def __lt__(self, other):
         return self.__hash__() < other.__hash__()
 
     def __setitem__(self, key, item):
-        self._data[key] = item
+        for y, value in enumerate(item):
+            self.set(key, y, value)
 
     def __str__(self):
-        out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
+        out = [[str(self.get(x, y))[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class _GridColumn:
+    """
+    A view of a single column of a `Grid`, so that grid[x][y] reads and writes the bitboard.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def __getitem__(self, y):
+        height = self._grid._height
+
+        if (y < 0):
+            y += height
+
+        if (y < 0 or y >= height):
+            raise IndexError('Grid column index out of range: ' + str(y))
+
+        return bool((self._grid._bits >> (self._x * height + y)) & 1)
+
+    def __iter__(self):
+        for y in range(self._grid._height):
+            yield self[y]
+
+    def __len__(self):
+        return self._grid._height
+
+    def __setitem__(self, y, value):
+        height = self._grid._height
+
+        if (y < 0):
+            y += height
+
+        if (y < 0 or y >= height):
+            raise IndexError('Grid column index out of range: ' + str(y))
+
+        self._grid.set(self._x, y, value)
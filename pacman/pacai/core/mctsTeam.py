@@ -0,0 +1,17 @@
+from pacai.agents.search.mcts import MCTSAgent
+
+def createTeam(firstIndex, secondIndex, isRed, **args):
+    """
+    This function should return a list of two agents that will form the capture team,
+    initialized using firstIndex and secondIndex as their agent indexed.
+    isRed is True if the red team is being created,
+    and will be False if the blue team is being created.
+
+    Both agents are `pacai.agents.search.mcts.MCTSAgent`s made with the team's args,
+    e.g. `--red pacai.core.mctsTeam --red-args timeBudget=auto`.
+    """
+
+    return [
+        MCTSAgent(firstIndex, **args),
+        MCTSAgent(secondIndex, **args),
+    ]
@@ -0,0 +1,547 @@
+"""
+A compact binary format for recorded games.
+
+A replay file is laid out as:
+```
+magic (8 bytes) | version (u8) | compression (u8) | body
+```
+The body (compressed as a single stream when compression is on) holds:
+```
+header length (u32) | header (UTF-8 JSON)
+layout length (u32) | layout text (UTF-8)
+chunk | chunk | ... | end chunk
+```
+The header holds the seed, team names, number of agents, starting agent, etc.
+Agents always move in turn, so only the direction of each move is stored (3 bits a move),
+packed into action chunks of up to `CHUNK_MOVES` moves:
+```
+ACTIONS (u8) | number of moves (u16) | packed directions (ceil(3 * moves / 8) bytes)
+```
+Every `KEYFRAME_INTERVAL` moves, a snapshot of the game state
+(see `pacai.core.gamestate.AbstractGameState.getSnapshot`) is written as a keyframe chunk:
+```
+KEYFRAME (u8) | number of moves before the snapshot (u32) | length (u32) | snapshot (UTF-8 JSON)
+```
+Keyframes let a replay jump to any move (see `seekState`)
+while only re-simulating at most `KEYFRAME_INTERVAL` moves.
+Chunks are written as the game goes and read back one at a time,
+so a replay can start before the whole file has been read.
+All integers are little-endian.
+"""
+
+import json
+import struct
+import zlib
+
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+
+REPLAY_MAGIC = b'PACREPLY'
+REPLAY_VERSION = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+COMPRESSION_NAMES = {
+    'none': COMPRESSION_NONE,
+    'zlib': COMPRESSION_ZLIB,
+    'zstd': COMPRESSION_ZSTD,
+}
+
+DEFAULT_COMPRESSION = 'zlib'
+
+CHUNK_END = 0
+CHUNK_ACTIONS = 1
+CHUNK_KEYFRAME = 2
+
+# The most moves that go into a single action chunk.
+CHUNK_MOVES = 512
+
+# The number of moves between keyframes.
+KEYFRAME_INTERVAL = 100
+
+ACTION_BITS = 3
+ACTION_MASK = (1 << ACTION_BITS) - 1
+
+DIRECTION_CODES = [
+    Directions.NORTH,
+    Directions.SOUTH,
+    Directions.EAST,
+    Directions.WEST,
+    Directions.STOP,
+]
+DIRECTION_IDS = {direction: code for (code, direction) in enumerate(DIRECTION_CODES)}
+
+FILE_HEADER = struct.Struct('<8sBB')
+LENGTH = struct.Struct('<I')
+CHUNK_TYPE = struct.Struct('<B')
+MOVE_COUNT = struct.Struct('<H')
+
+READ_SIZE = 64 * 1024
+
+class ReplayWriter(object):
+    """
+    Writes a replay, one move at a time.
+
+    Example:
+    ```
+    with ReplayWriter('game.replay', layout, numAgents, {'seed': 4}) as writer:
+        for (agentIndex, action) in game.moveHistory:
+            state = state.generateSuccessor(agentIndex, action)
+            writer.write(agentIndex, action, state)
+    ```
+    """
+
+    def __init__(self, file, layout, numAgents, metadata = None, startingIndex = 0,
+            compression = DEFAULT_COMPRESSION, keyframeInterval = KEYFRAME_INTERVAL):
+        """
+        Args:
+            file: A path or a binary file object (which is not closed by the writer).
+            layout: The `pacai.core.layout.Layout` the game is played on.
+            numAgents: The number of agents that take turns in the game.
+            metadata: Any extra JSON-able information to keep in the header
+                (e.g. the seed and team names).
+            startingIndex: The index of the agent that moves first.
+            compression: One of the keys of `COMPRESSION_NAMES`.
+            keyframeInterval: Write a keyframe every this many moves
+                (when states are given to `write`).
+        """
+
+        if (compression not in COMPRESSION_NAMES):
+            raise ValueError("Unknown replay compression '%s', choose from: %s." %
+                    (compression, ', '.join(sorted(COMPRESSION_NAMES))))
+
+        self._ownsFile = isinstance(file, str)
+        if (self._ownsFile):
+            file = open(file, 'wb')
+
+        self._file = file
+        self._numAgents = numAgents
+        self._nextAgentIndex = startingIndex
+        self._pending = []
+        self._numMoves = 0
+        self._keyframeInterval = keyframeInterval
+        self._closed = False
+
+        compressionId = COMPRESSION_NAMES[compression]
+        self._file.write(FILE_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, compressionId))
+        self._body = _getBodyWriter(self._file, compressionId)
+
+        header = dict(metadata or {})
+        header['numAgents'] = numAgents
+        header['startingIndex'] = startingIndex
+        header['maxGhosts'] = layout.getNumGhosts()
+
+        self._writeBlock(json.dumps(header, sort_keys = True).encode('utf-8'))
+        self._writeBlock(str(layout).encode('utf-8'))
+
+    def write(self, agentIndex, action, state = None):
+        """
+        Add a single move.
+        Moves have to come in turn order (the same order `pacai.core.game.Game` plays them in).
+        If the state after the move is given, it will be used for keyframes.
+        """
+
+        if (agentIndex != self._nextAgentIndex):
+            raise ValueError('Replay moves must be in turn order. Expected agent %d, got %d.' %
+                    (self._nextAgentIndex, agentIndex))
+
+        if (action not in DIRECTION_IDS):
+            raise ValueError('Unknown action for replay: %s.' % (action))
+
+        self._pending.append(DIRECTION_IDS[action])
+        self._nextAgentIndex = (agentIndex + 1) % self._numAgents
+        self._numMoves += 1
+
+        if (len(self._pending) >= CHUNK_MOVES):
+            self.flush()
+
+        if (state is not None and self._numMoves % self._keyframeInterval == 0):
+            self.writeKeyframe(state)
+
+    def writeAll(self, moves, initialState = None):
+        """
+        Write all the moves.
+        If the initial state is given, the moves are re-simulated on it to write keyframes.
+        """
+
+        state = initialState
+        for (agentIndex, action) in moves:
+            if (state is not None):
+                state = state.generateSuccessor(agentIndex, action)
+
+            self.write(agentIndex, action, state)
+
+    def writeKeyframe(self, state):
+        """
+        Write a snapshot of the state after all the moves written so far.
+        """
+
+        self.flush()
+
+        snapshot = json.dumps(state.getSnapshot(), sort_keys = True).encode('utf-8')
+
+        self._body.write(CHUNK_TYPE.pack(CHUNK_KEYFRAME))
+        self._body.write(LENGTH.pack(self._numMoves))
+        self._writeBlock(snapshot)
+
+    def flush(self):
+        """
+        Write out any buffered moves as an action chunk.
+        """
+
+        if (len(self._pending) == 0):
+            return
+
+        self._body.write(CHUNK_TYPE.pack(CHUNK_ACTIONS))
+        self._body.write(MOVE_COUNT.pack(len(self._pending)))
+        self._body.write(packActions(self._pending))
+        self._pending = []
+
+    def close(self):
+        if (self._closed):
+            return
+
+        self.flush()
+        self._body.write(CHUNK_TYPE.pack(CHUNK_END))
+        self._body.close()
+
+        if (self._ownsFile):
+            self._file.close()
+
+        self._closed = True
+
+    def getNumMoves(self):
+        return self._numMoves
+
+    def _writeBlock(self, data):
+        self._body.write(LENGTH.pack(len(data)))
+        self._body.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.close()
+
+class ReplayReader(object):
+    """
+    Reads a replay written by `ReplayWriter`.
+    The header and layout are read right away, moves are read lazily as they are iterated.
+
+    Example:
+    ```
+    with ReplayReader('game.replay') as reader:
+        state = startFrom(reader.getLayout())
+        for (agentIndex, action) in reader.actions():
+            state = state.generateSuccessor(agentIndex, action)
+    ```
+
+    Moves (or a seek) can only be read once.
+    """
+
+    def __init__(self, file):
+        self._ownsFile = isinstance(file, str)
+        if (self._ownsFile):
+            file = open(file, 'rb')
+
+        self._file = file
+
+        try:
+            fileHeader = self._file.read(FILE_HEADER.size)
+            if (len(fileHeader) != FILE_HEADER.size):
+                raise ValueError('Replay file is too short.')
+
+            magic, version, compressionId = FILE_HEADER.unpack(fileHeader)
+            if (magic != REPLAY_MAGIC):
+                raise ValueError('Not a pacai replay file.')
+
+            if (version != REPLAY_VERSION):
+                raise ValueError('Unsupported replay version: %d.' % (version))
+
+            self._body = _getBodyReader(self._file, compressionId)
+
+            self._header = json.loads(self._readBlock().decode('utf-8'))
+            self._layoutText = self._readBlock().decode('utf-8').split('\n')
+        except Exception:
+            self.close()
+            raise
+
+        self._read = False
+
+    def getHeader(self):
+        """
+        Get the header dict (the metadata given to the writer along with
+        numAgents, startingIndex, and maxGhosts).
+        """
+
+        return self._header
+
+    def getLayout(self):
+        return Layout(self._layoutText, maxGhosts = self._header['maxGhosts'])
+
+    def getNumAgents(self):
+        return self._header['numAgents']
+
+    def actions(self):
+        """
+        Yield each (agentIndex, action) move, reading the file as it goes.
+        """
+
+        for (chunkType, moveIndex, value) in self._records():
+            if (chunkType == CHUNK_ACTIONS):
+                yield value
+
+    def seek(self, moveIndex):
+        """
+        Find the last keyframe at or before moveIndex.
+        Returns the keyframe as a (number of moves, snapshot) pair
+        (None for the start of the game),
+        and an iterator over all the (agentIndex, action) moves after the keyframe.
+        Only the moves since the keyframe are held in memory.
+        """
+
+        records = self._records()
+
+        keyframe = None
+        moves = []
+        nextMove = None
+
+        for (chunkType, index, value) in records:
+            if (chunkType == CHUNK_KEYFRAME):
+                keyframe = (index, value)
+                moves = []
+            elif (index < moveIndex):
+                moves.append(value)
+            else:
+                nextMove = value
+                break
+
+        def remainingMoves():
+            yield from moves
+
+            if (nextMove is not None):
+                yield nextMove
+
+            for (chunkType, index, value) in records:
+                if (chunkType == CHUNK_ACTIONS):
+                    yield value
+
+        return keyframe, remainingMoves()
+
+    def close(self):
+        if (self._ownsFile and self._file is not None):
+            self._file.close()
+
+        self._file = None
+
+    def _records(self):
+        """
+        Yield a (chunk type, move index, value) record for every move and keyframe in the file.
+        Moves have a value of (agentIndex, action), and keyframes have their snapshot.
+        """
+
+        if (self._read):
+            raise ValueError('Replay moves have already been read.')
+
+        self._read = True
+
+        numAgents = self._header['numAgents']
+        agentIndex = self._header['startingIndex']
+        moveIndex = 0
+
+        while (True):
+            chunkType, = CHUNK_TYPE.unpack(self._readExactly(CHUNK_TYPE.size))
+
+            if (chunkType == CHUNK_END):
+                return
+            elif (chunkType == CHUNK_KEYFRAME):
+                index, = LENGTH.unpack(self._readExactly(LENGTH.size))
+                snapshot = json.loads(self._readBlock().decode('utf-8'))
+                yield CHUNK_KEYFRAME, index, snapshot
+            elif (chunkType == CHUNK_ACTIONS):
+                numMoves, = MOVE_COUNT.unpack(self._readExactly(MOVE_COUNT.size))
+                packed = self._readExactly(getPackedSize(numMoves))
+
+                for code in unpackActions(packed, numMoves):
+                    yield CHUNK_ACTIONS, moveIndex, (agentIndex, DIRECTION_CODES[code])
+                    agentIndex = (agentIndex + 1) % numAgents
+                    moveIndex += 1
+            else:
+                raise ValueError('Unknown replay chunk type: %d.' % (chunkType))
+
+    def _readBlock(self):
+        size, = LENGTH.unpack(self._readExactly(LENGTH.size))
+        return self._readExactly(size)
+
+    def _readExactly(self, size):
+        data = self._body.read(size)
+        if (len(data) != size):
+            raise ValueError('Replay file is truncated.')
+
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.close()
+
+def writeReplay(path, layout, moves, numAgents, metadata = None, startingIndex = 0,
+        compression = DEFAULT_COMPRESSION, initialState = None):
+    """
+    Write a whole list of (agentIndex, action) moves to a replay file.
+    If the initial state is given, keyframes will be written as well.
+    """
+
+    with ReplayWriter(path, layout, numAgents, metadata, startingIndex, compression) as writer:
+        writer.writeAll(moves, initialState)
+
+def seekState(reader, initialState, moveIndex, process = None):
+    """
+    Get the state after the first moveIndex moves of a replay.
+    The closest keyframe is loaded into the initial state (which is modified),
+    and the remaining moves (at most `KEYFRAME_INTERVAL`) are re-simulated.
+    If given, process(state) is called after loading the keyframe and after each move
+    (e.g. to let the rules end the game).
+    Returns the state and an iterator over the rest of the moves.
+    """
+
+    if (moveIndex < 0):
+        raise ValueError('Replay move index must be non-negative, got %d.' % (moveIndex))
+
+    keyframe, moves = reader.seek(moveIndex)
+
+    state = initialState
+    position = 0
+
+    if (keyframe is not None):
+        position, snapshot = keyframe
+        state.loadSnapshot(snapshot)
+
+        if (process is not None):
+            process(state)
+
+    while (position < moveIndex):
+        move = next(moves, None)
+        if (move is None):
+            raise ValueError('Replay only has %d moves, cannot seek to move %d.' %
+                    (position, moveIndex))
+
+        state = state.generateSuccessor(*move)
+        position += 1
+
+        if (process is not None):
+            process(state)
+
+    return state, moves
+
+def getPackedSize(numMoves):
+    return (numMoves * ACTION_BITS + 7) // 8
+
+def packActions(codes):
+    """
+    Pack a list of direction codes into bytes, 3 bits each (first move in the low bits).
+    """
+
+    packed = 0
+    for code in reversed(codes):
+        packed = (packed << ACTION_BITS) | code
+
+    return packed.to_bytes(getPackedSize(len(codes)), 'little')
+
+def unpackActions(data, numMoves):
+    packed = int.from_bytes(data, 'little')
+
+    codes = []
+    for i in range(numMoves):
+        code = packed & ACTION_MASK
+        if (code >= len(DIRECTION_CODES)):
+            raise ValueError('Invalid action code in replay: %d.' % (code))
+
+        codes.append(code)
+        packed >>= ACTION_BITS
+
+    return codes
+
+def _getZstandard():
+    # zstd support is optional, so only import it when it is asked for.
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError('zstd replays require the zstandard package (or use zlib).')
+
+    return zstandard
+
+def _getBodyWriter(file, compressionId):
+    if (compressionId == COMPRESSION_NONE):
+        return _PlainWriter(file)
+    elif (compressionId == COMPRESSION_ZLIB):
+        return _ZlibWriter(file)
+    elif (compressionId == COMPRESSION_ZSTD):
+        return _ZstdWriter(file)
+
+    raise ValueError('Unknown replay compression: %d.' % (compressionId))
+
+def _getBodyReader(file, compressionId):
+    if (compressionId == COMPRESSION_NONE):
+        return file
+    elif (compressionId == COMPRESSION_ZLIB):
+        return _StreamReader(file, zlib.decompressobj())
+    elif (compressionId == COMPRESSION_ZSTD):
+        return _StreamReader(file, _getZstandard().ZstdDecompressor().decompressobj())
+
+    raise ValueError('Unknown replay compression: %d.' % (compressionId))
+
+class _PlainWriter(object):
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, data):
+        self._file.write(data)
+
+    def close(self):
+        self._file.flush()
+
+class _ZlibWriter(object):
+    def __init__(self, file):
+        self._file = file
+        self._compressor = zlib.compressobj(9)
+
+    def write(self, data):
+        self._file.write(self._compressor.compress(data))
+
+    def close(self):
+        self._file.write(self._compressor.flush())
+        self._file.flush()
+
+class _ZstdWriter(_ZlibWriter):
+    def __init__(self, file):
+        self._file = file
+        self._compressor = _getZstandard().ZstdCompressor().compressobj()
+
+class _StreamReader(object):
+    """
+    Read decompressed bytes on demand from a compressed file.
+    """
+
+    def __init__(self, file, decompressor):
+        self._file = file
+        self._decompressor = decompressor
+        self._buffer = bytearray()
+        self._done = False
+
+    def read(self, size):
+        while (len(self._buffer) < size and not self._done):
+            data = self._file.read(READ_SIZE)
+            if (len(data) == 0):
+                self._done = True
+                self._buffer += self._decompressor.flush()
+            else:
+                self._buffer += self._decompressor.decompress(data)
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return data
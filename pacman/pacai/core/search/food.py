@@ -1,5 +1,6 @@
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
+from pacai.core.grid import Grid
 from pacai.core.search.problem import SearchProblem
 
 class FoodSearchProblem(SearchProblem):
@@ -7,43 +8,71 @@ class FoodSearchProblem(SearchProblem):
     A search problem associated with finding the a path that collects all of the
     food in a pacman game.
 
-    A search state in this problem is a tuple (pacmanPosition, foodGrid).
-    Wwhere pacmanPosition is a tuple (x, y) of integers specifying Pacman's position,
-    and foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`,
-    specifying remaining food.
+    A search state in this problem is a tuple (positionIndex, foodMask) of two ints.
+    Where positionIndex is the index of Pacman's position in the open cells of the maze,
+    and foodMask has a bit for each piece of food at the start that is still remaining
+    (bit i is the i-th position of `FoodSearchProblem.getStartingFood`).
+    States are small and cheap to hash, successors never copy a grid.
+
+    Use `FoodSearchProblem.getPosition` and `FoodSearchProblem.getFoodList` to query a state,
+    or `FoodSearchProblem.decodeState` to get the (pacmanPosition, foodGrid) tuple
+    where foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`.
     """
 
     def __init__(self, startingGameState):
         super().__init__()
 
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
+        self._cells = self.walls.asList(False)
+        cellIds = {cell: index for (index, cell) in enumerate(self._cells)}
+
+        self._food = startingGameState.getFood().asList()
+        foodIds = {food: index for (index, food) in enumerate(self._food)}
+
+        # The bit of each piece of food in a food grid (see `pacai.core.grid.Grid.getBits`).
+        height = self.walls.getHeight()
+        self._foodGridBits = [(x * height + y) for (x, y) in self._food]
+
+        # The moves from each cell: [(next cell index, direction, mask of the food that is left)].
+        # The masks are negative (all ones above the food), so `&` works for any amount of food.
+        self._moves = []
+        for (x, y) in self._cells:
+            moves = []
+            for direction in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(direction)
+                nextCell = (int(x + dx), int(y + dy))
+                if (nextCell not in cellIds):
+                    continue
+
+                keep = -1
+                if (nextCell in foodIds):
+                    keep = ~(1 << foodIds[nextCell])
+
+                moves.append((cellIds[nextCell], direction, keep))
+
+            self._moves.append(moves)
+
+        self.start = (cellIds[startingGameState.getPacmanPosition()], (1 << len(self._food)) - 1)
+
     def startingState(self):
         return self.start
 
     def isGoal(self, state):
-        return state[1].count() == 0
+        return state[1] == 0
 
     def successorStates(self, state):
         """
         Returns successor states, the actions they require, and a cost of 1.
         """
 
-        successors = []
         self._numExpanded += 1
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append((((nextx, nexty), nextFood), direction, 1))
 
-        return successors
+        index, foodMask = state
+        return [((nextIndex, foodMask & keep), direction, 1)
+                for (nextIndex, direction, keep) in self._moves[index]]
 
     def actionsCost(self, actions):
         """
@@ -51,7 +80,10 @@ class FoodSearchProblem(SearchProblem):
         If those actions include an illegal move, return 999999.
         """
 
-        x, y = self.startingState()[0]
+        if (actions is None):
+            return 999999
+
+        x, y = self.getPosition(self.startingState())
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -62,3 +94,61 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+    def decodeState(self, state):
+        """
+        Get the (pacmanPosition, foodGrid) tuple for a state.
+        """
+
+        return (self.getPosition(state), self.getFoodGrid(state))
+
+    def getFoodCount(self, state):
+        return bin(state[1]).count('1')
+
+    def getFoodGrid(self, state):
+        """
+        Get the remaining food of a state as a `pacai.core.grid.Grid`.
+        """
+
+        bits = 0
+        for index in self._getFoodIndexes(state[1]):
+            bits |= 1 << self._foodGridBits[index]
+
+        grid = Grid(self.walls.getWidth(), self.walls.getHeight())
+        grid.setBits(bits)
+
+        return grid
+
+    def getFoodList(self, state):
+        """
+        Get the positions of the remaining food of a state.
+        """
+
+        return [self._food[index] for index in self._getFoodIndexes(state[1])]
+
+    def getPosition(self, state):
+        return self._cells[state[0]]
+
+    def getStartingFood(self):
+        """
+        Get the positions of all the food at the start (in the order of the food mask bits).
+        """
+
+        return self._food
+
+    def _getFoodIndexes(self, foodMask):
+        while (foodMask):
+            lowest = foodMask & -foodMask
+            foodMask ^= lowest
+            yield lowest.bit_length() - 1
+
+def adaptHeuristic(heuristic):
+    """
+    Wrap a heuristic written for (pacmanPosition, foodGrid) states
+    so that it works on the states of a `FoodSearchProblem`.
+    """
+
+    def adaptedHeuristic(state, problem):
+        return heuristic(problem.decodeState(state), problem)
+
+    return adaptedHeuristic
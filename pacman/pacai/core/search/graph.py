@@ -0,0 +1,516 @@
+"""
+A generic graph search engine for `pacai.core.search.problem.SearchProblem`.
+
+Every search keeps its closed states in hashed structures (instead of lists)
+and remembers paths as a map of parent pointers ({state: (parent state, action)}),
+so frontier entries only hold a state and the path is only built once a goal is found.
+
+Bidirectional search runs breadth first search from both ends of a problem with a single goal
+(and reversible moves) and joins the two halves where they meet.
+
+Best first searches (uniform cost and A*) use a binary heap with lazy deletion,
+or any of the indexed queues from `pacai.core.search.queues` (with decrease-key).
+Weighted A* is best first search with a weight over 1 on the heuristic,
+which expands far fewer nodes for a path that costs at most `weight` times the optimal one.
+
+For when a full best first search is too slow or too big, there are also
+beam search (a fixed number of states per layer),
+Anytime Repairing A* (weighted A* that keeps improving its path until a time budget runs out),
+and IDA* (memory linear in the depth of the solution).
+Every search records how many nodes it stored at most
+(see `pacai.core.search.problem.SearchProblem.getMaxStoredNodes`).
+"""
+
+import heapq
+import itertools
+import logging
+import time
+
+from pacai.core.search.queues import IndexedPriorityQueue
+
+def reconstructPath(parents, state):
+    """
+    Get the actions from the start to a state by following the parent pointers back.
+    The start is the state with no parent (None).
+    """
+
+    actions = []
+
+    parent = parents[state]
+    while (parent is not None):
+        state, action = parent
+        actions.append(action)
+        parent = parents[state]
+
+    actions.reverse()
+    return actions
+
+def depthFirst(problem):
+    """
+    Search the deepest nodes first.
+    States are closed when they are expanded, so a state may be on the stack more than once
+    (the path through the latest push wins).
+    Returns a list of actions, or None if no goal can be reached.
+    """
+
+    start = problem.startingState()
+
+    parents = {}
+    stack = [(start, None)]
+
+    while (len(stack) > 0):
+        state, parent = stack.pop()
+        if (state in parents):
+            continue
+
+        parents[state] = parent
+        if (problem.isGoal(state)):
+            problem.recordStoredNodes(len(parents) + len(stack))
+            return reconstructPath(parents, state)
+
+        for (successor, action, cost) in problem.successorStates(state):
+            if (successor not in parents):
+                stack.append((successor, (state, action)))
+
+    problem.recordStoredNodes(len(parents) + len(stack))
+    return None
+
+def breadthFirst(problem):
+    """
+    Search the shallowest nodes first.
+    States are closed as soon as they are reached (the first path to a state is a shortest one).
+    Returns a list of actions, or None if no goal can be reached.
+    """
+
+    start = problem.startingState()
+
+    parents = {start: None}
+    frontier = [start]
+
+    # Walk the frontier one layer at a time (cheaper than a deque for these small states).
+    while (len(frontier) > 0):
+        nextFrontier = []
+
+        for state in frontier:
+            if (problem.isGoal(state)):
+                problem.recordStoredNodes(len(parents))
+                return reconstructPath(parents, state)
+
+            for (successor, action, cost) in problem.successorStates(state):
+                if (successor not in parents):
+                    parents[successor] = (state, action)
+                    nextFrontier.append(successor)
+
+        frontier = nextFrontier
+
+    problem.recordStoredNodes(len(parents))
+    return None
+
+def bidirectional(problem):
+    """
+    Breadth first search from both the start and the goal
+    (see `pacai.core.search.problem.SearchProblem.predecessorStates`),
+    expanding a layer of whichever side has the smaller frontier until they meet.
+    Each side only has to search about half as deep,
+    so far fewer nodes are expanded in open mazes.
+    Finds the path with the fewest actions (like breadth first search),
+    so it is only for problems with a single goal and unit costs.
+    Returns a list of actions, or None if the goal can not be reached.
+    """
+
+    start = problem.startingState()
+    goal = problem.goalState()
+
+    if (problem.isGoal(start)):
+        return []
+
+    # {state: (parent, action)} with the depth of each state on its side.
+    # For the backward side, the action leads from the state towards the goal.
+    forwardParents = {start: None}
+    forwardDepths = {start: 0}
+    backwardParents = {goal: None}
+    backwardDepths = {goal: 0}
+
+    forwardFrontier = [start]
+    backwardFrontier = [goal]
+
+    while (len(forwardFrontier) > 0 and len(backwardFrontier) > 0):
+        forward = (len(forwardFrontier) <= len(backwardFrontier))
+        if (forward):
+            frontier, parents, depths = forwardFrontier, forwardParents, forwardDepths
+            otherDepths = backwardDepths
+            expand = problem.successorStates
+        else:
+            frontier, parents, depths = backwardFrontier, backwardParents, backwardDepths
+            otherDepths = forwardDepths
+            expand = problem.predecessorStates
+
+        # Finish the whole layer, since a later meeting in it may be shorter.
+        meeting = None
+        meetingLength = None
+        nextFrontier = []
+
+        for state in frontier:
+            depth = depths[state] + 1
+
+            for (neighbor, action, cost) in expand(state):
+                if (neighbor in otherDepths):
+                    length = depth + otherDepths[neighbor]
+                    if (meeting is None or length < meetingLength):
+                        meeting = (neighbor, state, action)
+                        meetingLength = length
+
+                if (neighbor not in parents):
+                    parents[neighbor] = (state, action)
+                    depths[neighbor] = depth
+                    nextFrontier.append(neighbor)
+
+        if (meeting is not None):
+            neighbor, state, action = meeting
+
+            # The meeting state may have been reached through a different parent on this side.
+            parents[neighbor] = (state, action)
+
+            problem.recordStoredNodes(len(forwardParents) + len(backwardParents))
+            return _joinPaths(forwardParents, backwardParents, neighbor)
+
+        if (forward):
+            forwardFrontier = nextFrontier
+        else:
+            backwardFrontier = nextFrontier
+
+    problem.recordStoredNodes(len(forwardParents) + len(backwardParents))
+    return None
+
+def bestFirst(problem, heuristic = None, weight = 1.0, queue = None):
+    """
+    Search the node with the lowest `cost + weight * heuristic` first
+    (uniform cost search without a heuristic, A* with a weight of 1).
+    A state is expanded again if a cheaper path to it is found after it was expanded
+    (which only happens with an inconsistent heuristic).
+
+    By default the open list is a `heapq` heap with lazy deletion:
+    a state is pushed again whenever a cheaper path to it is found,
+    and stale entries (with a worse cost than the best known) are skipped when they are popped.
+    In CPython this beats a pure Python decrease-key heap, since stale entries are rare.
+    Any queue from `pacai.core.search.queues` can be given instead
+    (e.g. a `pacai.core.search.queues.BucketQueue` for int costs and heuristics),
+    then cheaper paths to queued states just lower their priority.
+
+    Returns a list of actions, or None if no goal can be reached.
+    """
+
+    if (queue is None):
+        return _bestFirstHeap(problem, heuristic, weight)
+
+    start = problem.startingState()
+
+    parents = {start: None}
+    costs = {start: 0}
+
+    queue.push(start, _estimate(heuristic, weight, start, problem))
+
+    while (not queue.isEmpty()):
+        state = queue.pop()
+        cost = costs[state]
+
+        if (problem.isGoal(state)):
+            problem.recordStoredNodes(len(parents) + len(queue))
+            return reconstructPath(parents, state)
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            successorCost = cost + stepCost
+            if (successorCost >= costs.get(successor, float('inf'))):
+                continue
+
+            costs[successor] = successorCost
+            parents[successor] = (state, action)
+
+            queue.push(successor, successorCost + _estimate(heuristic, weight, successor, problem))
+
+    problem.recordStoredNodes(len(parents) + len(queue))
+    return None
+
+def _bestFirstHeap(problem, heuristic, weight):
+    start = problem.startingState()
+
+    parents = {start: None}
+    costs = {start: 0}
+
+    # Ties are broken by insertion order, so states themselves are never compared.
+    counter = itertools.count()
+    heap = [(_estimate(heuristic, weight, start, problem), next(counter), 0, start)]
+
+    while (len(heap) > 0):
+        priority, _, cost, state = heapq.heappop(heap)
+        if (cost > costs[state]):
+            # A stale entry, the state was reached more cheaply since this was pushed.
+            continue
+
+        if (problem.isGoal(state)):
+            problem.recordStoredNodes(len(parents) + len(heap))
+            return reconstructPath(parents, state)
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            successorCost = cost + stepCost
+            if (successorCost >= costs.get(successor, float('inf'))):
+                continue
+
+            costs[successor] = successorCost
+            parents[successor] = (state, action)
+
+            priority = successorCost + _estimate(heuristic, weight, successor, problem)
+            heapq.heappush(heap, (priority, next(counter), successorCost, successor))
+
+    problem.recordStoredNodes(len(parents) + len(heap))
+    return None
+
+def beam(problem, heuristic = None, width = 100):
+    """
+    Beam search: a breadth first search over layers that only keeps the `width` states
+    with the lowest `cost + heuristic` of each new layer.
+    New states that do not make the beam are forgotten (they may be reached again later),
+    so only O(width * depth) states are ever stored.
+    States from earlier layers that are reached again more cheaply but do not make the beam
+    keep their old path (other kept states may lead back through it).
+    It is neither complete nor optimal, but is fast with a small width.
+    Returns a list of actions, or None if no goal was found.
+    """
+
+    width = int(width)
+    if (width < 1):
+        raise ValueError('Beam width must be at least 1, got: %d.' % (width))
+
+    start = problem.startingState()
+
+    parents = {start: None}
+    costs = {start: 0}
+
+    layer = [start]
+
+    while (len(layer) > 0):
+        # {successor: (cost + heuristic, order)}, a state is only a candidate once per layer.
+        candidates = {}
+        counter = itertools.count()
+
+        # {state from an earlier layer: (its old cost, its old parent)}, restored if pruned.
+        previous = {}
+
+        for state in layer:
+            if (problem.isGoal(state)):
+                problem.recordStoredNodes(len(parents))
+                return reconstructPath(parents, state)
+
+            cost = costs[state]
+            for (successor, action, stepCost) in problem.successorStates(state):
+                successorCost = cost + stepCost
+                if (successorCost >= costs.get(successor, float('inf'))):
+                    continue
+
+                if (successor in costs and successor not in candidates):
+                    previous[successor] = (costs[successor], parents[successor])
+
+                costs[successor] = successorCost
+                parents[successor] = (state, action)
+
+                priority = successorCost + _estimate(heuristic, 1, successor, problem)
+                candidates[successor] = (priority, next(counter))
+
+        problem.recordStoredNodes(len(parents))
+
+        layer = heapq.nsmallest(width, candidates, key = candidates.get)
+        if (len(layer) < len(candidates)):
+            for state in set(candidates).difference(layer):
+                if (state in previous):
+                    costs[state], parents[state] = previous[state]
+                else:
+                    del costs[state]
+                    del parents[state]
+
+    return None
+
+def anytimeRepairing(problem, heuristic = None, weight = 3.0, weightStep = 0.5, timeBudget = 1.0):
+    """
+    Anytime Repairing A* (ARA*, Likhachev et al.):
+    a weighted A* search (see `bestFirst`) that quickly finds a first path,
+    then keeps lowering the weight by `weightStep` (down to 1) and improving the path
+    until it is optimal (with an admissible heuristic) or `timeBudget` seconds have passed.
+    Each improvement reuses the costs of the last one, only states that got cheaper after
+    they were expanded (the inconsistent ones) are searched again.
+    The budget is only checked once a path has been found,
+    so a search always returns a path if there is one.
+    Returns a list of actions, or None if no goal can be reached.
+    """
+
+    weight = float(weight)
+    weightStep = float(weightStep)
+    if (weight < 1.0):
+        raise ValueError('ARA* weights must be at least 1, got: %f.' % (weight))
+
+    if (weightStep <= 0.0):
+        raise ValueError('ARA* weight steps must be positive, got: %f.' % (weightStep))
+
+    deadline = time.time() + float(timeBudget)
+
+    start = problem.startingState()
+
+    parents = {start: None}
+    costs = {start: 0}
+
+    openStates = IndexedPriorityQueue()
+    openStates.push(start, _estimate(heuristic, weight, start, problem))
+
+    closed = set()
+    inconsistent = set()
+
+    path = None
+    pathCost = float('inf')
+
+    while (True):
+        # Improve the path with the current weight.
+        while (not openStates.isEmpty() and openStates.peek()[1] < pathCost):
+            if (path is not None and time.time() > deadline):
+                break
+
+            state = openStates.pop()
+            closed.add(state)
+
+            cost = costs[state]
+            if (problem.isGoal(state)):
+                # Parents will keep changing, so build the path now.
+                path = reconstructPath(parents, state)
+                pathCost = cost
+                continue
+
+            for (successor, action, stepCost) in problem.successorStates(state):
+                successorCost = cost + stepCost
+                if (successorCost >= costs.get(successor, float('inf'))):
+                    continue
+
+                costs[successor] = successorCost
+                parents[successor] = (state, action)
+
+                if (successor in closed):
+                    inconsistent.add(successor)
+                else:
+                    priority = successorCost + _estimate(heuristic, weight, successor, problem)
+                    openStates.push(successor, priority)
+
+        problem.recordStoredNodes(len(parents) + len(openStates) + len(closed))
+        logging.debug('ARA* with a weight of %.2f found a path with a cost of %s.',
+                weight, str(pathCost))
+
+        if (path is None or weight <= 1.0 or time.time() > deadline):
+            return path
+
+        weight = max(1.0, weight - weightStep)
+
+        # Search the inconsistent states again, and reorder everything for the new weight.
+        states = [openStates.pop() for i in range(len(openStates))]
+        states += inconsistent
+
+        openStates.pushMany([(state, costs[state] + _estimate(heuristic, weight, state, problem))
+                for state in states])
+
+        closed = set()
+        inconsistent = set()
+
+def iterativeDeepeningAStar(problem, heuristic = None):
+    """
+    Iterative Deepening A* (IDA*, Korf):
+    depth first searches that skip any node with a `cost + heuristic` over a bound,
+    starting with the heuristic of the start and raising the bound to the lowest
+    value that was skipped, until a goal is found.
+    Only the current path is stored, so memory is linear in the depth of the solution.
+    Nothing is remembered between paths (only cycles along the current path are skipped),
+    so states that can be reached by many paths (like the cells of an open maze)
+    are expanded many times.
+    Finds an optimal path with an admissible heuristic.
+    Returns a list of actions, or None if no goal can be reached.
+    """
+
+    start = problem.startingState()
+    if (problem.isGoal(start)):
+        return []
+
+    bound = _estimate(heuristic, 1, start, problem)
+
+    while (True):
+        path, bound = _boundedDepthFirst(problem, heuristic, start, bound)
+        if (path is not None):
+            return path
+
+        if (bound is None):
+            return None
+
+def _estimate(heuristic, weight, state, problem):
+    if (heuristic is None):
+        return 0
+
+    if (weight == 1):
+        # Keep int estimates ints (e.g. for a `pacai.core.search.queues.BucketQueue`).
+        return heuristic(state, problem)
+
+    return weight * heuristic(state, problem)
+
+def _joinPaths(forwardParents, backwardParents, meeting):
+    actions = reconstructPath(forwardParents, meeting)
+
+    parent = backwardParents[meeting]
+    while (parent is not None):
+        state, action = parent
+        actions.append(action)
+        parent = backwardParents[state]
+
+    return actions
+
+def _boundedDepthFirst(problem, heuristic, start, bound):
+    """
+    A single depth first pass of `iterativeDeepeningAStar`.
+    Returns (the path to a goal or None, the next bound or None if nothing was skipped).
+    """
+
+    nextBound = float('inf')
+
+    # The path as a stack of (state, cost, remaining successors), and the actions along it.
+    stack = [(start, 0, iter(problem.successorStates(start)))]
+    onPath = {start}
+    actions = []
+    deepest = 1
+
+    while (len(stack) > 0):
+        state, cost, successors = stack[-1]
+
+        for (successor, action, stepCost) in successors:
+            if (successor in onPath):
+                continue
+
+            successorCost = cost + stepCost
+            estimate = successorCost + _estimate(heuristic, 1, successor, problem)
+            if (estimate > bound):
+                nextBound = min(nextBound, estimate)
+                continue
+
+            actions.append(action)
+
+            if (problem.isGoal(successor)):
+                problem.recordStoredNodes(len(stack) + 1)
+                return actions, bound
+
+            onPath.add(successor)
+            stack.append((successor, successorCost, iter(problem.successorStates(successor))))
+            deepest = max(deepest, len(stack))
+            break
+        else:
+            # Every successor is done, back up.
+            stack.pop()
+            onPath.discard(state)
+            if (len(actions) > 0):
+                actions.pop()
+
+    problem.recordStoredNodes(deepest)
+
+    if (nextBound == float('inf')):
+        return None, None
+
+    return None, nextBound
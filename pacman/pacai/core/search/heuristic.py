@@ -1,9 +1,14 @@
 """
 A heuristic function estimates the cost from the current state to the nearest
 goal in the provided `pacai.core.search.problem.SearchProblem`.
+
+The food heuristics (for `pacai.core.search.food.FoodSearchProblem`) use the precomputed maze
+distances of the layout, and keep their work in the problem's `heuristicInfo`
+memoized by the food bitmask of the states.
 """
 
 from pacai.core import distance
+from pacai.core.distanceCalculator import getDistances
 
 def null(state, problem = None):
     """
@@ -37,4 +42,186 @@ def numFood(state, problem):
     This heuristic is the amount of food left to on the board.
     """
 
-    return state[1].count()
+    return problem.getFoodCount(state)
+
+def foodFarthestPair(state, problem):
+    """
+    This heuristic is the maze distance between the two pieces of food that are farthest apart,
+    plus the distance from Pacman to the closer of the two.
+    """
+
+    info = _getFoodInfo(problem)
+    index, foodMask = state
+
+    pair = info['farthestPair'].get(foodMask)
+    if (pair is None):
+        pair = _getFarthestPair(info['foodDistances'], _getFoodIndexes(foodMask))
+        info['farthestPair'][foodMask] = pair
+
+    if (len(pair) == 0):
+        return 0
+
+    first, second = pair
+    pacmanDistances = info['pacmanDistances'][index]
+
+    return (info['foodDistances'][first][second]
+            + min(pacmanDistances[first], pacmanDistances[second]))
+
+def foodMatching(state, problem):
+    """
+    This heuristic is a 2-matching (degree) lower bound.
+    Along a path through all of the food, Pacman has one edge,
+    the last food has one edge and every other food has two edges,
+    each at least as long as the distances to its closest positions (Pacman or other food).
+    Every edge has two ends, so the path is at least half of the sum of those distances.
+
+    It is admissible but NOT consistent:
+    a single move can lower it by more than one
+    (e.g. when eating a food changes which food is closest to the others).
+    Only use it with searches that reopen states when they find a cheaper path
+    (like `pacai.core.search.graph.bestFirst`),
+    not with an A* that closes states for good when they are expanded.
+    """
+
+    info = _getFoodInfo(problem)
+    index, foodMask = state
+
+    closest = info['closestFood'].get(foodMask)
+    if (closest is None):
+        closest = _getClosestFood(info['foodDistances'], _getFoodIndexes(foodMask))
+        info['closestFood'][foodMask] = closest
+
+    if (len(closest) == 0):
+        return 0
+
+    pacmanDistances = info['pacmanDistances'][index]
+    if (len(closest) == 1):
+        return pacmanDistances[closest[0][0]]
+
+    total = min([pacmanDistances[food] for (food, first, second) in closest])
+    longestSecond = 0
+
+    for (food, first, second) in closest:
+        pacmanDistance = pacmanDistances[food]
+        if (pacmanDistance < first):
+            first, second = pacmanDistance, first
+        elif (pacmanDistance < second):
+            second = pacmanDistance
+
+        total += first + second
+        longestSecond = max(longestSecond, second)
+
+    # The last food only has one edge.
+    total -= longestSecond
+
+    return (total + 1) // 2
+
+def foodMST(state, problem):
+    """
+    This heuristic is the weight of the minimum spanning tree over the remaining food
+    (by maze distance), plus the distance from Pacman to the closest food.
+    Any path through all of the food is a spanning tree of it.
+    """
+
+    info = _getFoodInfo(problem)
+    index, foodMask = state
+
+    weight = info['mst'].get(foodMask)
+    if (weight is None):
+        weight = _getMSTWeight(info['foodDistances'], _getFoodIndexes(foodMask))
+        info['mst'][foodMask] = weight
+
+    pacmanDistances = info['pacmanDistances'][index]
+    return weight + min([pacmanDistances[food] for food in _getFoodIndexes(foodMask)],
+            default = 0)
+
+def _getFoodInfo(problem):
+    """
+    Get (and build the first time) the distances the food heuristics share:
+    between each pair of food, and from each open cell to each food.
+    """
+
+    info = problem.heuristicInfo.get('food')
+    if (info is not None):
+        return info
+
+    distances = getDistances(problem.startingGameState.getInitialLayout())
+    numCells = distances.getNumCells()
+    foodIds = [distances.getCellId(food) for food in problem.getStartingFood()]
+
+    info = {
+        'foodDistances': [[distances.getDistanceById(food, other) for other in foodIds]
+                for food in foodIds],
+        # Rows are by cell id, which are the position indexes of the problem's states.
+        'pacmanDistances': [[distances.getDistanceById(cell, food) for food in foodIds]
+                for cell in range(numCells)],
+        'closestFood': {},
+        'farthestPair': {},
+        'mst': {},
+    }
+
+    problem.heuristicInfo['food'] = info
+    return info
+
+def _getFoodIndexes(foodMask):
+    indexes = []
+    while (foodMask):
+        lowest = foodMask & -foodMask
+        foodMask ^= lowest
+        indexes.append(lowest.bit_length() - 1)
+
+    return indexes
+
+def _getClosestFood(foodDistances, foods):
+    """
+    Get [(food, distance to the closest other food, distance to the second closest)].
+    """
+
+    closest = []
+    for food in foods:
+        row = foodDistances[food]
+        first, second = sorted([row[other] for other in foods if other != food]
+                + [float('inf'), float('inf')])[:2]
+        closest.append((food, first, second))
+
+    return closest
+
+def _getFarthestPair(foodDistances, foods):
+    if (len(foods) == 0):
+        return ()
+
+    pair = (foods[0], foods[0])
+    farthest = 0
+
+    for i in range(len(foods)):
+        row = foodDistances[foods[i]]
+        for j in range(i + 1, len(foods)):
+            if (row[foods[j]] > farthest):
+                farthest = row[foods[j]]
+                pair = (foods[i], foods[j])
+
+    return pair
+
+def _getMSTWeight(foodDistances, foods):
+    """
+    Prim's algorithm over the (dense) food distances.
+    """
+
+    if (len(foods) == 0):
+        return 0
+
+    weight = 0
+
+    row = foodDistances[foods[0]]
+    remaining = {food: row[food] for food in foods[1:]}
+
+    while (len(remaining) > 0):
+        food = min(remaining, key = remaining.__getitem__)
+        weight += remaining.pop(food)
+
+        row = foodDistances[food]
+        for other in remaining:
+            if (row[other] < remaining[other]):
+                remaining[other] = row[other]
+
+    return weight
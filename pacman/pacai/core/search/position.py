@@ -34,6 +34,19 @@ class PositionSearchProblem(SearchProblem):
         if (self.startState is None):
             raise ValueError("Could not find starting location.")
 
+    def goalState(self):
+        return self.goal
+
+    def predecessorStates(self, state):
+        """
+        Moves are reversible, so the predecessors are the successors
+        (with the reverse actions and the cost of entering this state).
+        """
+
+        cost = self.costFn(state)
+        return [(previousState, Actions.reverseDirection(action), cost)
+                for (previousState, action, _) in self.successorStates(state)]
+
     def startingState(self):
         return self.startState
 
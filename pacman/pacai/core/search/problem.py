@@ -32,6 +32,9 @@ class SearchProblem(abc.ABC):
         self._visitedLocations = set()
         self._visitHistory = []
 
+        # The most search nodes (states) a search held at once (its memory high-water mark).
+        self._maxStoredNodes = 0
+
     @abc.abstractmethod
     def actionsCost(self, actions):
         """
@@ -46,9 +49,22 @@ class SearchProblem(abc.ABC):
     def getExpandedCount(self):
         return self._numExpanded
 
+    def getMaxStoredNodes(self):
+        return self._maxStoredNodes
+
     def getVisitHistory(self):
         return self._visitHistory
 
+    def goalState(self):
+        """
+        Returns the single goal state of the problem.
+        Only problems with a single goal (that can search backwards) need to implement this,
+        see `pacai.core.search.graph.bidirectional`.
+        """
+
+        raise NotImplementedError('%s does not have a single goal state.' %
+                (type(self).__name__))
+
     @abc.abstractmethod
     def isGoal(self, state):
         """
@@ -60,6 +76,27 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def predecessorStates(self, state):
+        """
+        Answers the question:
+        What moves lead to this state?
+
+        Returns a list of tuples with three values:
+        (predecessor state, action from the predecessor to this state, cost of taking the action).
+        Only problems that can search backwards need to implement this,
+        see `pacai.core.search.graph.bidirectional`.
+        """
+
+        raise NotImplementedError('%s can not be searched backwards.' % (type(self).__name__))
+
+    def recordStoredNodes(self, count):
+        """
+        Searches call this with the number of search nodes they are holding
+        (e.g. open and closed states), the largest count is kept.
+        """
+
+        self._maxStoredNodes = max(self._maxStoredNodes, count)
+
     @abc.abstractmethod
     def startingState(self):
         """
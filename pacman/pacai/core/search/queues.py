@@ -0,0 +1,277 @@
+"""
+Priority queues for best first searches.
+
+Both queues have the same interface as `pacai.util.priorityQueue.PriorityQueue`
+(`push`, `pop`, `isEmpty` and `len`), and are indexed by item so they also support
+`contains` (`in`), `getPriority`, `decreaseKey` and `pushMany`.
+An item is in a queue at most once: pushing an item that is already queued changes its priority,
+so searches never have stale duplicates to skip.
+Items with the same priority are popped in the order they were pushed.
+
+ - `IndexedPriorityQueue`: A binary heap with a position index, for any priorities.
+ - `BucketQueue`: An array of buckets (Dial's algorithm) for small non-negative int priorities,
+   like the step costs (and maze distance heuristics) of Pacman.
+   Every operation is O(1), plus a single sweep over the priorities,
+   so Dijkstra/UCS runs in O(N + C) (N states, C the largest cost).
+"""
+
+import collections
+import itertools
+
+class IndexedPriorityQueue(object):
+    """
+    A binary min heap of [priority, order, item] entries,
+    with the position of each item's entry kept in a dict.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._positions = {}
+        self._counter = itertools.count()
+
+    def contains(self, item):
+        return item in self._positions
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of a queued item.
+        Returns False (and does nothing) if the item already has a priority that is no higher.
+        """
+
+        position = self._positions[item]
+        entry = self._heap[position]
+        if (priority >= entry[0]):
+            return False
+
+        entry[0] = priority
+        self._siftUp(position)
+
+        return True
+
+    def getPriority(self, item):
+        return self._heap[self._positions[item]][0]
+
+    def isEmpty(self):
+        return len(self._heap) == 0
+
+    def peek(self):
+        """
+        Get the (item, priority) that will be popped next.
+        """
+
+        priority, _, item = self._heap[0]
+        return item, priority
+
+    def pop(self):
+        item, priority = self.popWithPriority()
+        return item
+
+    def popWithPriority(self):
+        heap = self._heap
+
+        last = heap.pop()
+        if (len(heap) == 0):
+            del self._positions[last[2]]
+            return last[2], last[0]
+
+        priority, _, item = heap[0]
+        del self._positions[item]
+
+        heap[0] = last
+        self._positions[last[2]] = 0
+        self._siftDown(0)
+
+        return item, priority
+
+    def push(self, item, priority):
+        """
+        Add an item, or change the priority of an item that is already queued.
+        """
+
+        position = self._positions.get(item)
+        if (position is not None):
+            entry = self._heap[position]
+            oldPriority = entry[0]
+            entry[0] = priority
+
+            if (priority < oldPriority):
+                self._siftUp(position)
+            elif (priority > oldPriority):
+                self._siftDown(position)
+
+            return
+
+        self._heap.append([priority, next(self._counter), item])
+        self._positions[item] = len(self._heap) - 1
+        self._siftUp(len(self._heap) - 1)
+
+    def pushMany(self, pairs):
+        """
+        Push many (item, priority) pairs.
+        New items are added all at once and the heap is rebuilt in O(n)
+        (instead of sifting each one up).
+        """
+
+        updates = []
+        for (item, priority) in pairs:
+            if (item in self._positions):
+                updates.append((item, priority))
+                continue
+
+            self._positions[item] = len(self._heap)
+            self._heap.append([priority, next(self._counter), item])
+
+        for i in reversed(range(len(self._heap) // 2)):
+            self._siftDown(i)
+
+        for (item, priority) in updates:
+            self.push(item, priority)
+
+    def _siftDown(self, position):
+        # Entries are lists of [priority, order, item] and orders are unique,
+        # so entries compare by priority then order (items are never compared).
+        heap = self._heap
+        positions = self._positions
+        size = len(heap)
+
+        entry = heap[position]
+
+        while (True):
+            child = 2 * position + 1
+            if (child >= size):
+                break
+
+            right = child + 1
+            if (right < size and heap[right] < heap[child]):
+                child = right
+
+            childEntry = heap[child]
+            if (not childEntry < entry):
+                break
+
+            heap[position] = childEntry
+            positions[childEntry[2]] = position
+            position = child
+
+        heap[position] = entry
+        positions[entry[2]] = position
+
+    def _siftUp(self, position):
+        heap = self._heap
+        positions = self._positions
+
+        entry = heap[position]
+
+        while (position > 0):
+            parent = (position - 1) // 2
+            parentEntry = heap[parent]
+            if (not entry < parentEntry):
+                break
+
+            heap[position] = parentEntry
+            positions[parentEntry[2]] = position
+            position = parent
+
+        heap[position] = entry
+        positions[entry[2]] = position
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __len__(self):
+        return len(self._heap)
+
+class BucketQueue(object):
+    """
+    A list of FIFO buckets indexed by (int) priority, and the lowest bucket that may have items.
+    Items that change priority leave their old entry behind.
+    Each entry is stamped with a count of the item's pushes,
+    so old entries are skipped (in O(1)) even if the item is back at the same priority.
+    """
+
+    def __init__(self):
+        self._buckets = []
+        self._priorities = {}
+        self._stamps = {}
+        self._lowest = 0
+
+    def contains(self, item):
+        return item in self._priorities
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of a queued item.
+        Returns False (and does nothing) if the item already has a priority that is no higher.
+        """
+
+        if (priority >= self._priorities[item]):
+            return False
+
+        self._add(item, priority)
+        return True
+
+    def getPriority(self, item):
+        return self._priorities[item]
+
+    def isEmpty(self):
+        return len(self._priorities) == 0
+
+    def pop(self):
+        item, priority = self.popWithPriority()
+        return item
+
+    def popWithPriority(self):
+        if (len(self._priorities) == 0):
+            raise IndexError('pop from an empty queue')
+
+        buckets = self._buckets
+        priorities = self._priorities
+        stamps = self._stamps
+
+        while (True):
+            bucket = buckets[self._lowest]
+            while (len(bucket) > 0):
+                item, stamp = bucket.popleft()
+                if (item in priorities and stamps[item] == stamp):
+                    del priorities[item]
+                    return item, self._lowest
+
+            self._lowest += 1
+
+    def push(self, item, priority):
+        """
+        Add an item, or change the priority of an item that is already queued.
+        """
+
+        if (self._priorities.get(item) == priority):
+            return
+
+        self._add(item, priority)
+
+    def pushMany(self, pairs):
+        for (item, priority) in pairs:
+            self.push(item, priority)
+
+    def _add(self, item, priority):
+        if (not isinstance(priority, int) or priority < 0):
+            raise ValueError('Bucket queue priorities must be non-negative ints, got: %s.' %
+                    (str(priority)))
+
+        while (len(self._buckets) <= priority):
+            self._buckets.append(collections.deque())
+
+        # Stamps are kept after a pop, so entries from before the pop never match again.
+        stamp = self._stamps.get(item, 0) + 1
+        self._stamps[item] = stamp
+
+        self._buckets[priority].append((item, stamp))
+        self._priorities[item] = priority
+
+        if (priority < self._lowest):
+            self._lowest = priority
+
+    def __contains__(self, item):
+        return item in self._priorities
+
+    def __len__(self):
+        return len(self._priorities)
@@ -18,11 +18,29 @@ def tinyMazeSearch(problem):
 breadthFirstSearch = search.breadthFirstSearch
 bfs = search.breadthFirstSearch
 
+bidirectionalSearch = search.bidirectionalSearch
+bds = search.bidirectionalSearch
+
+corridorSearch = search.corridorSearch
+cs = search.corridorSearch
+
 depthFirstSearch = search.depthFirstSearch
 dfs = search.depthFirstSearch
 
 aStarSearch = search.aStarSearch
 astar = search.aStarSearch
 
+anytimeAStarSearch = search.anytimeAStarSearch
+arastar = search.anytimeAStarSearch
+
+beamSearch = search.beamSearch
+beam = search.beamSearch
+
+iterativeDeepeningAStarSearch = search.iterativeDeepeningAStarSearch
+idastar = search.iterativeDeepeningAStarSearch
+
 uniformCostSearch = search.uniformCostSearch
 ucs = search.uniformCostSearch
+
+weightedAStarSearch = search.weightedAStarSearch
+wastar = search.weightedAStarSearch
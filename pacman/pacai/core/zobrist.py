@@ -0,0 +1,68 @@
+"""
+Zobrist keys for incrementally hashing game states.
+
+Every component of a state (a food cell, a capsule cell, an agent configuration, the score, ...)
+is assigned a random 64-bit key.
+The hash of a state is the XOR of the keys of all its components,
+so adding or removing a single component is just a single XOR.
+
+Keys for components with a few values (cells, the game over flags) are generated lazily
+from a dedicated random number generator
+(so the global `random` module, and therefore seeded games, are unaffected) and kept.
+Components with unbounded values (the score, agent configurations) get keys mixed from the hash
+of their values instead (see `mixKey`), so the stored keys stay bounded by the layout size.
+Keys are only stable within a single process.
+"""
+
+import random
+
+KEY_BITS = 64
+KEY_MASK = (1 << KEY_BITS) - 1
+
+ZOBRIST_SEED = 0x5EED
+
+# Components that are not just a cell.
+FOOD = 'food'
+CAPSULE = 'capsule'
+AGENT = 'agent'
+SCORE = 'score'
+GAMEOVER = 'gameover'
+
+_random = random.Random(ZOBRIST_SEED)
+_keys = {}
+
+def getKey(*components):
+    """
+    Get the key for the component identified by the given (hashable) values.
+    E.g. `getKey(FOOD, x, y)`.
+    """
+
+    key = _keys.get(components)
+    if (key is None):
+        key = _random.getrandbits(KEY_BITS)
+        _keys[components] = key
+
+    return key
+
+def mixKey(*components):
+    """
+    Get the key for a component with unbounded values (e.g. `mixKey(SCORE, score)`)
+    by scrambling the hash of the values (the splitmix64 finalizer), without storing it.
+    Equal values (e.g. a score of 10 and 10.0) get the same key.
+    """
+
+    value = (hash(components) + ZOBRIST_SEED + 0x9E3779B97F4A7C15) & KEY_MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & KEY_MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & KEY_MASK
+
+    return value ^ (value >> 31)
+
+def getAgentKey(agentIndex, agentKey):
+    """
+    Place an agent's key (see `pacai.core.agentstate.AgentState.getZobristKey`)
+    in the slot for the given agent index.
+    Agent keys are rotated by the index so that swapping two agents changes the hash.
+    """
+
+    shift = (agentIndex * 7) % KEY_BITS
+    return ((agentKey << shift) | (agentKey >> (KEY_BITS - shift))) & KEY_MASK
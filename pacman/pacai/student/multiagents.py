@@ -1,8 +1,10 @@
 import random
 
 from pacai.agents.base import BaseAgent
+from pacai.agents.search import transposition
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
 from pacai.core import distance
+from pacai.core import features
 
 class ReflexAgent(BaseAgent):
     """
@@ -59,35 +61,10 @@ class ReflexAgent(BaseAgent):
 
         # *** Your Code Here ***
 
-        newGhostStates = successorGameState.getGhostStates()
-        ghostPositions = [ghost.getPosition() for ghost in newGhostStates]
-        foodPositions = currentGameState.getFood().asList()
-        newPosition = successorGameState.getPacmanPosition()
-
-        def man(goal):
-            return distance.manhattan(newPosition, goal)
-
-        ghostDistances = list(map(man, ghostPositions))
-        foodDistances = list(map(man, foodPositions))
-
-        # manhattan dist estimate of closest ghost
-        closestGhostDist = min(ghostDistances)
-        if closestGhostDist == 0:
-            closestGhostDist = 0.001
-
-        # get true distance to closest food to avoid progress loss
-        closestFood = newPosition
-        closestFoodDist = min(foodDistances, default=0)
-        for i in range(len(foodPositions)):
-            if foodDistances[i] == closestFoodDist:
-                closestFood = foodPositions[i]
-
-        closestFoodDist = distance.maze(newPosition, closestFood, currentGameState)
-        if closestFoodDist == 0:
-            closestFoodDist = 0.001
-
-        # return 1 - reciprocal of closest ghost loc + reciprocal of closest food
-        return (1 - (1 / closestGhostDist)) + (1 / closestFoodDist)
+        # return 1 - reciprocal of closest ghost loc + reciprocal of closest food,
+        # using the food from before the move (so eating a dot is as good as it gets)
+        return reflexEvaluator.evaluate(successorGameState,
+                {features.FOOD: currentGameState.getFoodBits()})
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -105,6 +82,9 @@ class MinimaxAgent(MultiAgentSearchAgent):
     `pacai.core.gamestate.AbstractGameState.generateSuccessor`:
     Get the successor game state after an agent takes an action.
 
+    `pacai.core.gamestate.AbstractGameState.generateSuccessors`:
+    Get (action, successor) pairs for all the legal actions of an agent.
+
     `pacai.core.directions.Directions.STOP`:
     The stop direction, which is always legal, but you may not want to include in your search.
 
@@ -120,58 +100,78 @@ class MinimaxAgent(MultiAgentSearchAgent):
         super().__init__(index, **kwargs)
 
     def getAction(self, gamestate):
-
-        numAgents = gamestate.getNumAgents()
-
-        # minimax recursive function
-        def minimax(self, state, agent, depth, prevAction):
-            # if leaf node, return static eval fcn
-            # leaf if game over or depth limit hit
-            if state.isOver() or depth == self.getTreeDepth():
-                return (self.getEvaluationFunction()(state), prevAction)
-
-            # maxValue function for max nodes
-            def maxValue(self, state, agent, depth):
-                maximum = float('-inf')
-                # default return action
-                returnAction = 'STOP'
-                # loop through actions to find max
-                for action in state.getLegalActions(agentIndex=agent):
-                    succ = state.generateSuccessor(agent, action)
-                    cost, move = minimax(self, succ, agent + 1, depth, action)
-                    maximum = max(maximum, cost)
-                    if maximum == cost:
-                        returnAction = action
-                # return max, action pair
-                return (maximum, returnAction)
-
-            # minValue function for min nodes
-            def minValue(self, state, agent, depth):
-                minimum = float('inf')
-                # default return action
-                returnAction = 'STOP'
-                # loop through actions to find min
-                for action in state.getLegalActions(agentIndex=agent):
-                    succ = state.generateSuccessor(agent, action)
-                    if agent + 1 == numAgents:
-                        cost, move = minimax(self, succ, 0, depth + 1, action)
-                        minimum = min(minimum, cost)
-                    else:
-                        cost, move = minimax(self, succ, agent + 1, depth, action)
-                        minimum = min(minimum, cost)
-                    if minimum == cost:
-                        returnAction = action
-                # return min, action pair
-                return (minimum, returnAction)
-
-            if agent == 0:
-                return maxValue(self, state, agent, depth)
-            else:
-                return minValue(self, state, agent, depth)
-
-        # run maxValue if max, else run minValue
-        evaluation, action = minimax(self, gamestate, 0, 0, 'STOP')
-        return action
+        def search():
+            evaluation, action = self.minimax(gamestate, 0, 0, 'STOP')
+            return action
+
+        # search to the tree depth, or deeper and deeper if there is a time budget
+        return self.runSearch(gamestate, search)
+
+    def getSubtreeValue(self, state, agentIndex, depth, alpha, beta):
+        # no pruning in plain minimax, so the window is not used
+        value, action = self.minimax(state, agentIndex, depth, None)
+        return value
+
+    # minimax recursive function
+    def minimax(self, state, agent, depth, prevAction):
+        numAgents = state.getNumAgents()
+        table = self.getTranspositionTable()
+
+        # count the node, and give up on this search if out of time
+        self.visitNode()
+
+        # if leaf node, return static eval fcn
+        # leaf if game over or depth limit hit
+        if state.isOver() or depth == self.getTreeDepth():
+            return (self.getEvaluationFunction()(state), prevAction)
+
+        # reuse the value if this position was already searched to the same depth
+        remaining = self.getTreeDepth() - depth
+        if table is not None:
+            entry = table.probe(state, agent, remaining)
+            if entry is not None:
+                return (entry.value, entry.move)
+
+        # maxValue function for max nodes
+        def maxValue(self, state, agent, depth):
+            maximum = float('-inf')
+            # default return action
+            returnAction = 'STOP'
+            # loop through actions to find max
+            for action, succ in state.generateSuccessors(agent):
+                cost, move = self.minimax(succ, agent + 1, depth, action)
+                maximum = max(maximum, cost)
+                if maximum == cost:
+                    returnAction = action
+            # return max, action pair
+            return (maximum, returnAction)
+
+        # minValue function for min nodes
+        def minValue(self, state, agent, depth):
+            minimum = float('inf')
+            # default return action
+            returnAction = 'STOP'
+            # loop through actions to find min
+            for action, succ in state.generateSuccessors(agent):
+                if agent + 1 == numAgents:
+                    cost, move = self.minimax(succ, 0, depth + 1, action)
+                    minimum = min(minimum, cost)
+                else:
+                    cost, move = self.minimax(succ, agent + 1, depth, action)
+                    minimum = min(minimum, cost)
+                if minimum == cost:
+                    returnAction = action
+            # return min, action pair
+            return (minimum, returnAction)
+
+        if agent == 0:
+            value, action = maxValue(self, state, agent, depth)
+        else:
+            value, action = minValue(self, state, agent, depth)
+
+        if table is not None:
+            table.store(state, agent, remaining, value, move = action)
+        return (value, action)
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
@@ -189,70 +189,105 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
         super().__init__(index, **kwargs)
 
     def getAction(self, gamestate):
+        def search():
+            evaluation, action = self.minimax(gamestate, 0, 0, 'STOP',
+                    float('-inf'), float('inf'))
+            return action
+
+        # search to the tree depth, or deeper and deeper if there is a time budget
+        return self.runSearch(gamestate, search)
+
+    def canPrune(self):
+        return True
+
+    def getSubtreeValue(self, state, agentIndex, depth, alpha, beta):
+        value, action = self.minimax(state, agentIndex, depth, None, alpha, beta)
+        return value
+
+    # minimax recursive function, with alpha/beta pruning
+    def minimax(self, state, agent, depth, prevAction, alpha, beta):
+        numAgents = state.getNumAgents()
+        table = self.getTranspositionTable()
+
+        # count the node, and give up on this search if out of time
+        self.visitNode()
+
+        # if leaf node, return static eval fcn
+        # leaf if game over or depth limit hit
+        if state.isOver() or depth == self.getTreeDepth():
+            return (self.getEvaluationFunction()(state), prevAction)
+
+        # use what is known about this position from earlier searches to the same depth,
+        # an exact value can be used as is and a bound narrows the window
+        remaining = self.getTreeDepth() - depth
+        if table is not None:
+            entry = table.probe(state, agent, remaining)
+            if entry is not None:
+                if entry.bound == transposition.EXACT:
+                    return (entry.value, entry.move)
+                elif entry.bound == transposition.LOWER:
+                    alpha = max(alpha, entry.value)
+                else:
+                    beta = min(beta, entry.value)
+                if alpha >= beta:
+                    return (entry.value, entry.move)
+
+        # maxValue function for max nodes
+        def maxValue(self, state, agent, depth, alpha, beta):
+            maximum = float('-inf')
+            # default return action
+            returnAction = 'STOP'
+            # loop through actions to find max, most promising first
+            for action, succ in self.getOrderedSuccessors(state, agent, depth):
+                cost, move = self.minimax(succ, agent + 1, depth, action, alpha, beta)
+                maximum = max(maximum, cost)
+                # set alpha if max > alpha
+                alpha = max(alpha, maximum)
+                if maximum == cost:
+                    returnAction = action
+                # stop exploring if cond met, and remember the move that caused it
+                if alpha >= beta:
+                    self.recordCutoff(state, agent, depth, action)
+                    break
+            # return max, action pair
+            return (maximum, returnAction)
+
+        def minValue(self, state, agent, depth, alpha, beta):
+            minimum = float('inf')
+            # default return action
+            returnAction = 'STOP'
+            # loop through actions to find min, most promising first
+            for action, succ in self.getOrderedSuccessors(state, agent, depth):
+                # if last agent, go back to 0 increment depth, else go next
+                if agent + 1 == numAgents:
+                    cost, move = self.minimax(succ, 0, depth + 1, action, alpha, beta)
+                    minimum = min(minimum, cost)
+                    # update beta if min < beta
+                    beta = min(beta, minimum)
+                else:
+                    cost, move = self.minimax(succ, agent + 1, depth, action, alpha, beta)
+                    minimum = min(minimum, cost)
+                    # update beta if min < beta
+                    beta = min(beta, minimum)
+                if minimum == cost:
+                    returnAction = action
+                # if cond met, stop exploring, and remember the move that caused it
+                if alpha >= beta:
+                    self.recordCutoff(state, agent, depth, action)
+                    break
+            # return min action pair
+            return (minimum, returnAction)
 
-        numAgents = gamestate.getNumAgents()
-
-        # minimax recursive function, with alpha/beta pruning
-        def minimax(self, state, agent, depth, prevAction, alpha, beta):
-            # if leaf node, return static eval fcn
-            # leaf if game over or depth limit hit
-            if state.isOver() or depth == self.getTreeDepth():
-                return (self.getEvaluationFunction()(state), prevAction)
-
-            # maxValue function for max nodes
-            def maxValue(self, state, agent, depth, alpha, beta):
-                maximum = float('-inf')
-                # default return action
-                returnAction = 'STOP'
-                # loop through actions to find max
-                for action in state.getLegalActions(agentIndex=agent):
-                    succ = state.generateSuccessor(agent, action)
-                    cost, move = minimax(self, succ, agent + 1, depth, action, alpha, beta)
-                    maximum = max(maximum, cost)
-                    # set alpha if max > alpha
-                    alpha = max(alpha, maximum)
-                    if maximum == cost:
-                        returnAction = action
-                    # stop exploring if cond met
-                    if alpha >= beta:
-                        break
-                # return max, action pair
-                return (maximum, returnAction)
-
-            def minValue(self, state, agent, depth, alpha, beta):
-                minimum = float('inf')
-                # default return action
-                returnAction = 'STOP'
-                # loop through actions to find min
-                for action in state.getLegalActions(agentIndex=agent):
-                    succ = state.generateSuccessor(agent, action)
-                    # if last agent, go back to 0 increment depth, else go next
-                    if agent + 1 == numAgents:
-                        cost, move = minimax(self, succ, 0, depth + 1, action, alpha, beta)
-                        minimum = min(minimum, cost)
-                        # update beta if min < beta
-                        beta = min(beta, minimum)
-                    else:
-                        cost, move = minimax(self, succ, agent + 1, depth, action, alpha, beta)
-                        minimum = min(minimum, cost)
-                        # update beta if min < beta
-                        beta = min(beta, minimum)
-                    if minimum == cost:
-                        returnAction = action
-                    # if cond met, stop exploring
-                    if alpha >= beta:
-                        break
-                # return min action pair
-                return (minimum, returnAction)
-
-            # run maxValue if max, else run minValue
-            if agent == 0:
-                return maxValue(self, state, agent, depth, alpha, beta)
-            else:
-                return minValue(self, state, agent, depth, alpha, beta)
-
-        evaluation, action = minimax(self, gamestate, 0, 0, 'STOP', float('-inf'), float('inf'))
-        return action
+        # run maxValue if max, else run minValue
+        if agent == 0:
+            value, action = maxValue(self, state, agent, depth, alpha, beta)
+        else:
+            value, action = minValue(self, state, agent, depth, alpha, beta)
+
+        if table is not None:
+            bound = transposition.getBound(value, alpha, beta)
+            table.store(state, agent, remaining, value, bound, action)
+        return (value, action)
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
@@ -272,63 +307,128 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         super().__init__(index, **kwargs)
 
     def getAction(self, gamestate):
+        def search():
+            evaluation, action = self.expectimax(gamestate, 0, 0, 'STOP')
+            return action
+
+        # search to the tree depth, or deeper and deeper if there is a time budget
+        return self.runSearch(gamestate, search)
+
+    def getSubtreeValue(self, state, agentIndex, depth, alpha, beta):
+        # chance nodes cannot be pruned, so the window is not used
+        value, action = self.expectimax(state, agentIndex, depth, None)
+        return value
+
+    # expectimax recursive function
+    def expectimax(self, state, agent, depth, prevAction):
+        numAgents = state.getNumAgents()
+        table = self.getTranspositionTable()
+
+        # count the node, and give up on this search if out of time
+        self.visitNode()
+
+        # if leaf node, return static eval fcn
+        # leaf if game over or depth limit hit
+        if state.isOver() or depth == self.getTreeDepth():
+            return (self.getEvaluationFunction()(state), prevAction)
+
+        # reuse the value if this position was already searched to the same depth
+        remaining = self.getTreeDepth() - depth
+        if table is not None:
+            entry = table.probe(state, agent, remaining)
+            if entry is not None:
+                return (entry.value, entry.move)
+
+        # maxValue function for max nodes
+        def maxValue(self, state, agent, depth):
+            maximum = float('-inf')
+            # default placeholder action
+            returnAction = 'STOP'
+            # loop through actions calculate max
+            for action, succ in state.generateSuccessors(agent):
+                cost, move = self.expectimax(succ, agent + 1, depth, action)
+                maximum = max(maximum, cost)
+                if maximum == cost:
+                    returnAction = action
+            # return max, action pair
+            return (maximum, returnAction)
+
+        # chanceValue function for chance nodes
+        def chanceValue(self, state, agent, depth):
+            returnAction = 'STOP'
+            # store actions and costs list for calculating avg
+            # and what action to return
+            actions = []
+            costs = []
+            # loop through actions to calulate avg prob
+            for action, succ in state.generateSuccessors(agent):
+                actions.append(action)
+                # if last agent, go back to 0 increment depth, else go next
+                if agent + 1 == numAgents:
+                    cost, move = self.expectimax(succ, 0, depth + 1, action)
+                    costs.append(cost)
+                else:
+                    cost, move = self.expectimax(succ, agent + 1, depth, action)
+                    costs.append(cost)
+            # avg of action probs
+            expectValue = sum(costs) / len(costs)
+            # equal chance of all actions, return 1 at random
+            returnAction = random.choice(actions)
+            return (expectValue, returnAction)
+        # run maxValue if max, else run chanceValue
+        if agent == 0:
+            value, action = maxValue(self, state, agent, depth)
+        else:
+            value, action = chanceValue(self, state, agent, depth)
+
+        if table is not None:
+            table.store(state, agent, remaining, value, move = action)
+        return (value, action)
+
+
+def closestGhostFeature(context, position, ghostPositions):
+    # manhattan dist estimate of closest ghost
+    closestGhostDist = min([distance.manhattan(position, ghost) for ghost in ghostPositions])
+    if closestGhostDist == 0:
+        closestGhostDist = 0.001
 
-        numAgents = gamestate.getNumAgents()
-
-        # expectimax recursive function
-        def expectimax(self, state, agent, depth, prevAction):
-            # if leaf node, return static eval fcn
-            # leaf if game over or depth limit hit
-            if state.isOver() or depth == self.getTreeDepth():
-                return (self.getEvaluationFunction()(state), prevAction)
-
-            # maxValue function for max nodes
-            def maxValue(self, state, agent, depth):
-                maximum = float('-inf')
-                # default placeholder action
-                returnAction = 'STOP'
-                # loop through actions calculate max
-                for action in state.getLegalActions(agentIndex=agent):
-                    succ = state.generateSuccessor(agent, action)
-                    cost, move = expectimax(self, succ, agent + 1, depth, action)
-                    maximum = max(maximum, cost)
-                    if maximum == cost:
-                        returnAction = action
-                # return max, action pair
-                return (maximum, returnAction)
-
-            # chanceValue function for chance nodes
-            def chanceValue(self, state, agent, depth):
-                returnAction = 'STOP'
-                # store actions and costs list for calculating avg
-                # and what action to return
-                actions = []
-                costs = []
-                # loop through actions to calulate avg prob
-                for action in state.getLegalActions(agentIndex=agent):
-                    succ = state.generateSuccessor(agent, action)
-                    actions.append(action)
-                    # if last agent, go back to 0 increment depth, else go next
-                    if agent + 1 == numAgents:
-                        cost, move = expectimax(self, succ, 0, depth + 1, action)
-                        costs.append(cost)
-                    else:
-                        cost, move = expectimax(self, succ, agent + 1, depth, action)
-                        costs.append(cost)
-                # avg of action probs
-                expectValue = sum(costs) / len(costs)
-                # equal chance of all actions, return 1 at random
-                returnAction = random.choice(actions)
-                return (expectValue, returnAction)
-            # run maxValue if max, else run chanceValue
-            if agent == 0:
-                return maxValue(self, state, agent, depth)
-            else:
-                return chanceValue(self, state, agent, depth)
-
-        evaluation, action = expectimax(self, gamestate, 0, 0, 'STOP')
-        return action
+    # 1 - reciprocal of closest ghost loc
+    return 1 - (1 / closestGhostDist)
 
+def closestFoodFeature(context, position, food):
+    foodDistances = [distance.manhattan(position, dot) for dot in food]
+
+    # get true distance to closest food to avoid progress loss
+    closestFood = position
+    closestFoodDist = min(foodDistances, default=0)
+    for i in range(len(food)):
+        if foodDistances[i] == closestFoodDist:
+            closestFood = food[i]
+
+    # precomputed maze distance, instead of a search each time
+    closestFoodDist = context.getDistance(position, closestFood)
+    if closestFoodDist == 0:
+        closestFoodDist = 0.001
+
+    # reciprocal of closest food
+    return 1 / closestFoodDist
+
+def scoreFeature(context, score):
+    return score
+
+# evaluation functions made of the features above
+reflexEvaluator = features.FeatureEvaluator([
+    features.Feature('ghost', closestGhostFeature,
+            [features.PACMAN_POSITION, features.GHOST_POSITIONS]),
+    features.Feature('food', closestFoodFeature, [features.PACMAN_POSITION, features.FOOD]),
+], {'ghost': 1.0, 'food': 1.0})
+
+betterEvaluator = features.FeatureEvaluator([
+    features.Feature('ghost', closestGhostFeature,
+            [features.PACMAN_POSITION, features.GHOST_POSITIONS]),
+    features.Feature('food', closestFoodFeature, [features.PACMAN_POSITION, features.FOOD]),
+    features.Feature('score', scoreFeature, [features.SCORE]),
+], {'ghost': 0.1, 'food': 0.8, 'score': 0.1})
 
 def betterEvaluationFunction(currentGameState):
     """
@@ -346,37 +446,12 @@ def betterEvaluationFunction(currentGameState):
         getScore() default return
             weight: 0.1 wanted to include it
 
+    The features are cached on the parts of the state they use (see `pacai.core.features`),
+    so most leaves of a search are just a few dict lookups.
     """
-    ghostStates = currentGameState.getGhostStates()
-    ghostPositions = [ghost.getPosition() for ghost in ghostStates]
-    foodPositions = currentGameState.getFood().asList()
-    currentPosition = currentGameState.getPacmanPosition()
-
-    def man(goal):
-        return distance.manhattan(currentPosition, goal)
-
-    ghostDistances = list(map(man, ghostPositions))
-    foodDistances = list(map(man, foodPositions))
-
-    # manhattan dist estimate of closest ghost
-    closestGhostDist = min(ghostDistances)
-    if closestGhostDist == 0:
-        closestGhostDist = 0.001
-
-    # get true distance to closest food to avoid progress loss
-    closestFood = currentPosition
-    closestFoodDist = min(foodDistances, default=0)
-    for i in range(len(foodPositions)):
-        if foodDistances[i] == closestFoodDist:
-            closestFood = foodPositions[i]
-
-    closestFoodDist = distance.maze(currentPosition, closestFood, currentGameState)
-    if closestFoodDist == 0:
-        closestFoodDist = 0.001
 
     # return 1 - reciprocal of closest ghost loc + reciprocal of closest food + score(weighted)
-    return ((0.1 * (1 - (1 / closestGhostDist)))
-        + (0.8 * (1 / closestFoodDist)) + (0.1 * currentGameState.getScore()))
+    return betterEvaluator(currentGameState)
 
 class ContestAgent(MultiAgentSearchAgent):
     """
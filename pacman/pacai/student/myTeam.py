@@ -53,9 +53,9 @@ class AttackAgent(CaptureAgent):
 
         features['successorScore'] = self.getScore(successor)
 
-        foodList = self.getFood(successor).asList()
-        if (len(foodList) > 0):
-            minDistance = min([self.getMazeDistance(myPos, food) for food in foodList])
+        # distance to the closest food, from the state's nearest food index
+        minDistance = successor.getFoodDistance(myPos, self.getFood(successor))
+        if (minDistance is not None):
             features['distanceToFood'] = minDistance
 
         enemies = [successor.getAgentState(i) for i in self.getOpponents(successor)]
@@ -267,9 +267,9 @@ class HybridAgent1(CaptureAgent):
 
         features['successorScore'] = self.getScore(successor)
 
-        foodList = self.getFood(successor).asList()
-        if (len(foodList) > 0):
-            minDistance = min([self.getMazeDistance(myPos, food) for food in foodList])
+        # distance to the closest food, from the state's nearest food index
+        minDistance = successor.getFoodDistance(myPos, self.getFood(successor))
+        if (minDistance is not None):
             features['distanceToFood'] = minDistance
 
         enemies = [successor.getAgentState(i) for i in self.getOpponents(successor)]
@@ -1,9 +1,18 @@
 """
 In this file, you will implement generic search algorithms which are called by Pacman agents.
 """
-from pacai.util.stack import Stack
-from pacai.util.queue import Queue
-from pacai.util.priorityQueue import PriorityQueue
+
+from pacai.core import corridors
+from pacai.core.search import graph
+
+def corridorSearch(problem):
+    """
+    Search only the junctions and dead ends of the maze, moving along whole corridors at once,
+    for problems with a single goal position and unit costs.
+    """
+
+    # *** Your Code Here ***
+    return corridors.corridorSearch(problem)
 
 def depthFirstSearch(problem):
     """
@@ -22,38 +31,8 @@ def depthFirstSearch(problem):
     """
 
     # *** Your Code Here ***
-    # initialize structures
-    stack = Stack()
-    visited = []
-    actionList = []
-
-    # initialize stack and visited list with start node,
-    # parent node, and previous action
-    stack.push((problem.startingState(), None, None))
-    visited.append(problem.startingState())
-
-    while (not stack.isEmpty()):
-        currentState, sourceState, prevAction = stack.pop()
-        # trace back ancestors to form path if goal reached
-        if problem.isGoal(currentState):
-            actionList.append(prevAction)
-            while sourceState:
-                s, ss, p = sourceState
-                actionList.append(p)
-                sourceState = ss
-            break
-        # push succesor nodes to stack
-        for (state, action, cost) in problem.successorStates(currentState):
-            if state not in visited:
-                stack.push((state, (currentState, sourceState, prevAction), action))
-                visited.append(state)
-
-    # reverse list to get start->goal
-    # remove first filler action (None)
-    list.reverse(actionList)
-    actionList.pop(0)
-
-    return actionList
+    # closed states and parent pointers are hashed (see pacai.core.search.graph)
+    return graph.depthFirst(problem)
 
 def breadthFirstSearch(problem):
     """
@@ -61,37 +40,16 @@ def breadthFirstSearch(problem):
     """
 
     # *** Your Code Here ***
-    # initialize structures
-    queue = Queue()
-    visited = []
-    actionList = []
-
-    # initialize queue and visited list with start node,
-    # parent node, and previous action
-    queue.push((problem.startingState(), None, None))
-    visited.append(problem.startingState())
-
-    while (not queue.isEmpty()):
-        currentState, sourceState, prevAction = queue.pop()
-        # trace back ancestors to form path if goal reached
-        if problem.isGoal(currentState):
-            actionList.append(prevAction)
-            while sourceState:
-                s, ss, p = sourceState
-                actionList.append(p)
-                sourceState = ss
-            break
-        # push succesor nodes to queue
-        for (state, action, cost) in problem.successorStates(currentState):
-            if state not in visited:
-                queue.push((state, (currentState, sourceState, prevAction), action))
-                visited.append(state)
-
-    # reverse list to get start->goal
-    # remove first filler action (None)
-    list.reverse(actionList)
-    actionList.pop(0)
-    return actionList
+    return graph.breadthFirst(problem)
+
+def bidirectionalSearch(problem):
+    """
+    Search the shallowest nodes from both the start and the goal,
+    for problems with a single goal and unit costs (e.g. finding a position).
+    """
+
+    # *** Your Code Here ***
+    return graph.bidirectional(problem)
 
 def uniformCostSearch(problem):
     """
@@ -99,38 +57,8 @@ def uniformCostSearch(problem):
     """
 
     # *** Your Code Here ***
-    # initialize structures
-    pQueue = PriorityQueue()
-    visited = []
-    actionList = []
-
-    # initialize pQueue and visited list with start node,
-    # parent node, previous action, path cost, and priority=0
-    pQueue.push((problem.startingState(), None, None, 0), 0)
-    visited.append(problem.startingState())
-
-    while (not pQueue.isEmpty()):
-        (currentState, sourceState, prevAction, currentCost) = pQueue.pop()
-        # trace back ancestors to form path if goal reached
-        if problem.isGoal(currentState):
-            actionList.append(prevAction)
-            while sourceState:
-                s, ss, p = sourceState
-                actionList.append(p)
-                sourceState = ss
-            break
-        # push succesor nodes to pQueue
-        for (state, action, cost) in problem.successorStates(currentState):
-            if state not in visited:
-                pQueue.push((state, (currentState, sourceState, prevAction),
-                    action, cost + currentCost), cost + currentCost)
-                visited.append(state)
-
-    # reverse list to get start->goal
-    # remove first filler action (None)
-    list.reverse(actionList)
-    actionList.pop(0)
-    return actionList
+    # a heap with lazy deletion of stale (more costly) entries
+    return graph.bestFirst(problem)
 
 def aStarSearch(problem, heuristic):
     """
@@ -138,37 +66,40 @@ def aStarSearch(problem, heuristic):
     """
 
     # *** Your Code Here ***
-    # initialize structures
-    pQueue = PriorityQueue()
-    visited = []
-    actionList = []
-
-    # initialize pQueue and visited list with start node,
-    # parent node, previous action, path cost, and priority=heuristic
-    pQueue.push((problem.startingState(), None, None,
-        0), heuristic(problem.startingState(), problem))
-    visited.append(problem.startingState())
-
-    while (not pQueue.isEmpty()):
-        currentState, sourceState, prevAction, currentCost = pQueue.pop()
-        # trace back ancestors to form path if goal reached
-        if problem.isGoal(currentState):
-            actionList.append(prevAction)
-            while sourceState:
-                s, ss, p = sourceState
-                actionList.append(p)
-                sourceState = ss
-            break
-        # push succesor nodes to pQueue, priority = path cost + heuristic
-        for (state, action, cost) in problem.successorStates(currentState):
-            if state not in visited:
-                pQueue.push((state, (currentState, sourceState, prevAction), action,
-                    cost + currentCost),
-                    cost + currentCost + heuristic(state, problem))
-                visited.append(state)
-
-    # reverse list to get start->goal
-    # remove first filler action (None)
-    list.reverse(actionList)
-    actionList.pop(0)
-    return actionList
+    return graph.bestFirst(problem, heuristic = heuristic)
+
+def weightedAStarSearch(problem, heuristic, weight = 2.0):
+    """
+    A* with the heuristic scaled up by a weight,
+    which trades a path at most `weight` times longer for far fewer expanded nodes.
+    """
+
+    # *** Your Code Here ***
+    return graph.bestFirst(problem, heuristic = heuristic, weight = float(weight))
+
+def beamSearch(problem, heuristic, width = 100):
+    """
+    Only keep the best `width` nodes (by cost and heuristic) of each layer of the search tree.
+    """
+
+    # *** Your Code Here ***
+    return graph.beam(problem, heuristic = heuristic, width = width)
+
+def anytimeAStarSearch(problem, heuristic, weight = 3.0, timeBudget = 1.0):
+    """
+    Find a path quickly with weighted A*,
+    then keep improving it until it is optimal or the time budget (in seconds) runs out.
+    """
+
+    # *** Your Code Here ***
+    return graph.anytimeRepairing(problem, heuristic = heuristic, weight = weight,
+            timeBudget = timeBudget)
+
+def iterativeDeepeningAStarSearch(problem, heuristic):
+    """
+    Depth first searches with a growing bound on the combined cost and heuristic,
+    which only ever store the current path.
+    """
+
+    # *** Your Code Here ***
+    return graph.iterativeDeepeningAStar(problem, heuristic = heuristic)
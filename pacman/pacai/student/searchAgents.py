@@ -8,13 +8,13 @@ Good luck and happy searching!
 import logging
 
 from pacai.core.actions import Actions
-# from pacai.core.search import heuristic
+from pacai.core.search import heuristic
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
 from pacai.agents.base import BaseAgent
 from pacai.agents.search.base import SearchAgent
 from pacai.core.directions import Directions
-from pacai.core import distance
+from pacai.core import distanceCalculator
 from pacai.student import search
 
 class CornersProblem(SearchProblem):
@@ -70,28 +70,34 @@ class CornersProblem(SearchProblem):
         # allow distance fcns to query for gameState
         self.startingGameState = startingGameState
 
-        # initialize boolean visited list of corners
-        self.cornersVisisted = []
-        for corner in self.corners:
-            if self.startingPosition == corner:
-                self.cornersVisisted.append(True)
-            else:
-                self.cornersVisisted.append(False)
+        # a dictionary for the heuristic to store information
+        self.heuristicInfo = {}
+
+        # bit i of a state's mask is set once corner i is visited (states are immutable)
+        self.cornerBits = {}
+        for i in range(len(self.corners)):
+            self.cornerBits[self.corners[i]] = self.cornerBits.get(self.corners[i], 0) | (1 << i)
+
+        self.allCornersMask = (1 << len(self.corners)) - 1
+
+        # precomputed maze distances between every pair of cells (shared by the whole process),
+        # and between the corners for the heuristic
+        self.distances = distanceCalculator.getDistances(startingGameState.getInitialLayout())
+        self.cornerDistances = [
+                [distanceCalculator.getDistanceOnGrid(self.distances, corner, other)
+                    for other in self.corners]
+                for corner in self.corners]
 
     def startingState(self):
-        # state defined by position and corners visited list
-        return (self.startingPosition, self.cornersVisisted)
+        # state defined by position and a mask of the corners visited
+        return (self.startingPosition, self.cornerBits.get(self.startingPosition, 0))
 
     def isGoal(self, state):
-        (loc, CV) = state
-        for goals in CV:
-            if not goals:
-                return False
-        return True
+        return state[1] == self.allCornersMask
 
     def successorStates(self, state):
         successors = []
-        (loc, CV) = state
+        (loc, visited) = state
         for action in Directions.CARDINAL:
             x, y = loc
             dx, dy = Actions.directionToVector(action)
@@ -100,16 +106,9 @@ class CornersProblem(SearchProblem):
 
             if (not hitsWall):
                 # Construct the successor.
-                # index for corners list
-                i = 0
-                nextCV = CV.copy()
-
-                # construct succesors corners list based on new pos
-                for corner in self.corners:
-                    if (nextx, nexty) == corner:
-                        nextCV[i] = True
-                    i += 1
-                nextState = ((nextx, nexty), nextCV)
+                # mark the corner (if any) as visited
+                nextVisited = visited | self.cornerBits.get((nextx, nexty), 0)
+                nextState = ((nextx, nexty), nextVisited)
                 successors.append((nextState, action, 1))
 
         # so the script shows search nodes expanded
@@ -151,33 +150,49 @@ def cornersHeuristic(state, problem):
     # walls = problem.walls  # These are the walls of the maze, as a Grid.
 
     # *** Your Code Here ***
-    (loc, CV) = state
+    (loc, visited) = state
 
-    # initialize unvisited goals and distances lists
-    unvisitedGoals = []
-    goalDist = []
+    # the exact cost of visiting the remaining corners in the best order,
+    # using the precomputed maze distances (there are at most 4! orders)
+    remaining = problem.allCornersMask & ~visited
+    if remaining == 0:
+        return 0
 
-    # add corner to unvisites list if unvisited
-    # add manhattan dist estimate to distances list
+    best = None
     for i in range(len(problem.corners)):
-        if CV[i] is False:
-            unvisitedGoals.append(problem.corners[i])
-            goalDist.append(distance.manhattan(loc, problem.corners[i]))
+        if remaining & (1 << i):
+            toCorner = distanceCalculator.getDistanceOnGrid(problem.distances, loc,
+                problem.corners[i])
+            cost = toCorner + cornerTour(problem, i, remaining & ~(1 << i))
+            if best is None or cost < best:
+                best = cost
 
-    # set closest dist to min of distances, 0 if empty
-    # temp initialize closest goal to current location
-    closestGoalDist = min(goalDist, default=0)
-    closestGoal = loc
+    return best
 
-    # find which goal corresponds to the closest distance,
-    # set closest goal
-    for i in range(len(unvisitedGoals)):
-        if goalDist[i] == closestGoalDist:
-            closestGoal = unvisitedGoals[i]
+def cornerTour(problem, first, remaining):
+    """
+    The shortest distance from one corner through all of the remaining corners
+    (a mask of corner bits), cached in `problem.heuristicInfo`.
+    """
 
-    # use manhattan estimate to find approx closest goal
-    # calculate true dist from current loc to that goal
-    return distance.maze(loc, closestGoal, problem.startingGameState)
+    tours = problem.heuristicInfo.setdefault('cornerTours', {})
+    key = (first, remaining)
+    if key in tours:
+        return tours[key]
+
+    if remaining == 0:
+        return 0
+
+    best = None
+    for i in range(len(problem.corners)):
+        if remaining & (1 << i):
+            cost = (problem.cornerDistances[first][i]
+                + cornerTour(problem, i, remaining & ~(1 << i)))
+            if best is None or cost < best:
+                best = cost
+
+    tours[key] = best
+    return best
 
 def foodHeuristic(state, problem):
     """
@@ -192,9 +207,12 @@ def foodHeuristic(state, problem):
     On the other hand, inadmissible or inconsistent heuristics may find optimal solutions,
     so be careful.
 
-    The state is a tuple (pacmanPosition, foodGrid) where foodGrid is a
-    `pacai.core.grid.Grid` of either True or False.
-    You can call `foodGrid.asList()` to get a list of food coordinates instead.
+    The state is a compact tuple (positionIndex, foodMask),
+    see `pacai.core.search.food.FoodSearchProblem`.
+    You can call `problem.getPosition(state)` to get Pacman's position
+    and `problem.getFoodList(state)` to get a list of food coordinates.
+    (`problem.decodeState(state)` gives the tuple (pacmanPosition, foodGrid) where foodGrid is a
+    `pacai.core.grid.Grid` of either True or False.)
 
     If you want access to info like walls, capsules, etc., you can query the problem.
     For example, `problem.walls` gives you a Grid of where the walls are.
@@ -208,32 +226,12 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount'].
     """
 
-    position, foodGrid = state
-
     # *** Your Code Here ***
     # return heuristic.null(state, problem)  # Default to the null heuristic.
 
-    # manhattan dist function for map
-    def man(goal):
-        return distance.manhattan(position, goal)
-
-    # get food list, create list of manhattan distances to each food
-    food = foodGrid.asList()
-    distances = list(map(man, food))
-
-    # set closest dist to closest food dist, default to 0 if empty
-    # set closest temp goal to current position
-    closestGoalDist = min(distances, default=0)
-    closestGoal = position
-
-    # find food that corresponds to the closest goal dist
-    for i in range(len(food)):
-        if distances[i] == closestGoalDist:
-            closestGoal = food[i]
-
-    # use manhattan estimate to find closest food->
-    # find true distance from current pos to that food
-    return distance.maze(position, closestGoal, problem.startingGameState)
+    # the larger of two admissible bounds over the precomputed maze distances between food
+    # (both are memoized by the food bitmask in problem.heuristicInfo)
+    return max(heuristic.foodMST(state, problem), heuristic.foodFarthestPair(state, problem))
 
 class ClosestDotSearchAgent(SearchAgent):
     """
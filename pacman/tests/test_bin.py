@@ -1,8 +1,14 @@
+import json
+import os
+import tempfile
 import unittest
+from unittest import mock
 
+from pacai.bin import benchmark
 from pacai.bin import capture
 from pacai.bin import gridworld
 from pacai.bin import pacman
+from pacai.bin import tournament
 
 """
 This is a test class to assess the executables of this project.
@@ -29,6 +35,46 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_benchmark_corners(self):
+        results = benchmark.main(['corners', '--layouts', 'mediumCorners'])
+
+        # Every heuristic finds an optimal path, the corners heuristic with fewer expansions.
+        null, corners = [results[('mediumCorners', heuristic)] for heuristic in [
+                'pacai.core.search.heuristic.null', 'pacai.student.searchAgents.cornersHeuristic']]
+
+        self.assertEqual(null['cost'], corners['cost'])
+        self.assertLess(corners['expanded'], null['expanded'])
+
+        # The reference (before) problem and heuristic are measured on the same layouts.
+        reference = results[('mediumCorners', benchmark.REFERENCE_NAME)]
+        self.assertEqual(reference['cost'], corners['cost'])
+        self.assertLess(corners['expanded'], reference['expanded'])
+
+    def test_benchmark_search(self):
+        functions = ['pacai.core.search.search.astar', 'pacai.core.search.search.wastar']
+        results = benchmark.main(['search', '--functions', ','.join(functions),
+                '--options', 'weight=3'])
+
+        optimal, weighted = [results[('trickySearch', function)] for function in functions]
+
+        self.assertLessEqual(optimal['cost'], weighted['cost'])
+        self.assertLess(weighted['expanded'], optimal['expanded'])
+        self.assertGreater(weighted['stored'], 0)
+
+    def test_benchmark_memory(self):
+        numNodes, bytesPerNode, timePerNode = benchmark.main(['memory', '--depth', '1'])
+
+        self.assertGreater(numNodes, 1)
+        self.assertGreater(bytesPerNode, 0)
+
+    def test_benchmark_ordering(self):
+        results = benchmark.main(['ordering', '--layouts', 'mediumClassic',
+                '--orderings', 'none,killer+history', '--num-positions', '2'])
+
+        self.assertEqual(2, len(results))
+        for stats in results.values():
+            self.assertEqual(2, stats['searches'])
+
     def test_capture(self):
         # Run game of capture with default agents.
         capture.main(['--null-graphics'])
@@ -53,6 +99,74 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_tournament(self):
+        # Run a short round-robin between two teams.
+        results, ratings, standings = tournament.main(['-t',
+                'pacai.core.baselineTeam,pacai.student.myTeam', '-n', '2', '--max-moves', '100'])
+
+        self.assertEqual(2, len(results))
+        self.assertEqual(2, len(ratings))
+
+    def test_tournament_resume(self):
+        args = ['-t', 'pacai.core.baselineTeam,pacai.student.myTeam', '-n', '4',
+                '--max-moves', '100', '-s', '7']
+
+        expected, ratings, standings = tournament.main(args)
+
+        played = []
+        playMatch = tournament.playMatch
+
+        def crashingMatch(*matchArgs):
+            if (len(played) == 2):
+                raise KeyboardInterrupt()
+
+            played.append(matchArgs[0])
+            return playMatch(*matchArgs)
+
+        def countingMatch(*matchArgs):
+            played.append(matchArgs[0])
+            return playMatch(*matchArgs)
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            checkpoint = os.path.join(tempDir, 'tournament.json')
+
+            # Kill the tournament after two matches.
+            with mock.patch.object(tournament, 'playMatch', crashingMatch):
+                self.assertRaises(KeyboardInterrupt, tournament.main,
+                        args + ['--checkpoint', checkpoint])
+
+            with open(checkpoint, 'r') as file:
+                self.assertEqual(played, [result['id'] for result in json.load(file)['results']])
+
+            # Resuming only plays the rest, and ends up with the same results.
+            finished = list(played)
+            played.clear()
+
+            with mock.patch.object(tournament, 'playMatch', countingMatch):
+                results, ratings, standings = tournament.main(args + ['--checkpoint', checkpoint])
+
+            self.assertEqual(2, len(played))
+            self.assertEqual(set(expected), set(finished + played))
+            self.assertEqual(expected, results)
+
+            # A different tournament can not resume from the checkpoint.
+            self.assertRaises(ValueError, tournament.main,
+                    args + ['-n', '2', '--checkpoint', checkpoint])
+
+        # Duplicate names would share match ids.
+        self.assertRaises(ValueError, tournament.main,
+                ['-t', 'pacai.core.baselineTeam,pacai.core.baselineTeam'])
+        self.assertRaises(ValueError, tournament.main,
+                ['-t', 'pacai.core.baselineTeam,pacai.student.myTeam', '-l', 'RANDOM1,RANDOM1'])
+
+    def test_tournament_help(self):
+        # Show all tournament arguments.
+        try:
+            tournament.main(['--help'])
+        except SystemExit as status:
+            if status.code != 0:
+                self.fail("Error occured when running --help.")
+
     def test_seeded_runs(self):
         # Run game of capture with seed entry.
         capture.main(['--null-graphics', '--seed', '1234'])
@@ -60,6 +174,26 @@ class BinTest(unittest.TestCase):
         # Run game of pacman with seed value entry.
         pacman.main(['-p', 'GreedyAgent', '--null-graphics', '--seed', '1234'])
 
+    def test_parallel_runs(self):
+        # Games played over workers should match regardless of the number of workers.
+        # Serial games (one worker) are seeded the same way.
+        args = ['-p', 'GreedyAgent', '--null-graphics', '--seed', '1234', '-n', '4']
+        oneWorker = pacman.main(args + ['--workers', '1'])
+        twoWorkers = pacman.main(args + ['--workers', '2'])
+        threeWorkers = pacman.main(args + ['--workers', '3'])
+
+        scores = [game.state.getScore() for game in oneWorker]
+        self.assertEqual(scores, [game.state.getScore() for game in twoWorkers])
+        self.assertEqual(scores, [game.state.getScore() for game in threeWorkers])
+
+        # Run games of capture over workers.
+        args = ['--null-graphics', '--seed', '1234', '-n', '2']
+        oneWorker = capture.main(args + ['--workers', '1'])
+        twoWorkers = capture.main(args + ['--workers', '2'])
+
+        self.assertEqual([game.state.getScore() for game in oneWorker],
+                [game.state.getScore() for game in twoWorkers])
+
     def test_capture_seeded_maze_generations(self):
         # Run game of capture with random generated map without seed value.
         capture.main(['--null-graphics', '--layout', 'RANDOM']) 
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+
+from pacai.core import distanceCalculator
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+# Two rooms with no way between them.
+SPLIT_LAYOUT = [
+    '%%%%%%%',
+    '%P.%..%',
+    '%..%.G%',
+    '%%%%%%%',
+]
+
+"""
+Test the all-pairs maze distances and their on-disk cache.
+"""
+class DistanceCalculatorTest(unittest.TestCase):
+
+    def test_bfs_matrix(self):
+        layout = getLayout('mediumClassic')
+        distances = distanceCalculator.computeDistances(layout)
+        cells = layout.walls.asList(False)
+
+        self.assertEqual(len(cells), distances.getNumCells())
+        self.assertEqual(len(cells) ** 2, len(distances.getMatrix()))
+
+        for source in cells[::17]:
+            expected = _bfs(layout.walls, source)
+            for cell in cells:
+                self.assertEqual(expected[cell], distances.getDistance(source, cell))
+
+        # Walls are not cells.
+        self.assertIsNone(distances.getDistance((0, 0), cells[0]))
+
+    def test_unreachable(self):
+        layout = Layout(SPLIT_LAYOUT)
+        distances = distanceCalculator.computeDistances(layout)
+
+        self.assertEqual(2, distances.getDistance((1, 1), (2, 2)))
+        self.assertEqual(distanceCalculator.DEFAULT_DISTANCE,
+                distances.getDistance((1, 1), (5, 1)))
+
+        id1 = distances.getCellId((1, 1))
+        id2 = distances.getCellId((5, 1))
+        self.assertEqual(distanceCalculator.UNREACHABLE, distances.getDistanceById(id1, id2))
+
+    def test_shared_distances(self):
+        distanceCalculator.clearDistanceMap()
+
+        first = distanceCalculator.Distancer(getLayout('mediumClassic'))
+        first.getMazeDistances()
+
+        # A separately loaded layout with the same walls shares the matrix.
+        second = distanceCalculator.Distancer(getLayout('mediumClassic'))
+        second.getMazeDistances()
+
+        self.assertIs(first._distances, second._distances)
+        self.assertEqual(1, len(distanceCalculator.distanceMap))
+
+        other = distanceCalculator.Distancer(getLayout('tinyMaze'))
+        other.getMazeDistances()
+        self.assertIsNot(first._distances, other._distances)
+        self.assertEqual(2, len(distanceCalculator.distanceMap))
+
+        # After clearing, the distances are computed again (and still correct).
+        distanceCalculator.clearDistanceMap()
+        self.assertEqual(0, len(distanceCalculator.distanceMap))
+
+        third = distanceCalculator.Distancer(getLayout('mediumClassic'))
+        third.getMazeDistances()
+
+        self.assertIsNot(first._distances, third._distances)
+        self.assertEqual(list(first._distances.getMatrix()),
+                list(third._distances.getMatrix()))
+
+    def test_cache(self):
+        layout = getLayout('mediumClassic')
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            computed = distanceCalculator.computeDistances(layout, cacheDir)
+
+            path = os.path.join(cacheDir,
+                    distanceCalculator.getWallsKey(layout.walls) + '.dist')
+            self.assertTrue(os.path.isfile(path))
+
+            # The second time, the matrix is mapped in from the cache.
+            cached = distanceCalculator.computeDistances(layout, cacheDir)
+            self.assertIsInstance(cached.getMatrix(), memoryview)
+            self.assertEqual(list(computed.getMatrix()), list(cached.getMatrix()))
+
+            # Release the mapping before the directory is removed.
+            cached.getMatrix().release()
+
+    def test_bad_cache(self):
+        layout = getLayout('mediumClassic')
+        expected = list(distanceCalculator.computeDistances(layout).getMatrix())
+
+        numCells = layout.walls.count(False)
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            path = os.path.join(cacheDir,
+                    distanceCalculator.getWallsKey(layout.walls) + '.dist')
+
+            # Garbage, a truncated file, and a matrix for a different number of cells.
+            badFiles = [
+                b'garbage',
+                distanceCalculator.CACHE_HEADER.pack(distanceCalculator.CACHE_MAGIC,
+                        numCells, 0) + b'\x00\x00',
+                distanceCalculator.CACHE_HEADER.pack(distanceCalculator.CACHE_MAGIC,
+                        numCells - 1, 0) + (b'\x00\x00' * ((numCells - 1) ** 2)),
+            ]
+
+            for data in badFiles:
+                with open(path, 'wb') as file:
+                    file.write(data)
+
+                distances = distanceCalculator.computeDistances(layout, cacheDir)
+                self.assertNotIsInstance(distances.getMatrix(), memoryview)
+                self.assertEqual(expected, list(distances.getMatrix()))
+
+                # The bad file was replaced with a good one.
+                self.assertEqual(distanceCalculator.CACHE_HEADER.size + (2 * numCells * numCells),
+                        os.path.getsize(path))
+
+    def test_cache_limit(self):
+        oldMaxBytes = distanceCalculator.CACHE_MAX_BYTES
+
+        try:
+            with tempfile.TemporaryDirectory() as cacheDir:
+                distanceCalculator.CACHE_MAX_BYTES = 0
+                distanceCalculator.computeDistances(getLayout('mediumClassic'), cacheDir)
+                self.assertEqual([], os.listdir(cacheDir))
+
+                # Only room for one of the two matrices.
+                numCells = getLayout('mediumClassic').walls.count(False)
+                distanceCalculator.CACHE_MAX_BYTES = (distanceCalculator.CACHE_HEADER.size
+                        + (2 * numCells * numCells) + 16)
+
+                distanceCalculator.computeDistances(getLayout('mediumClassic'), cacheDir)
+                distanceCalculator.computeDistances(getLayout('tinyMaze'), cacheDir)
+
+                names = os.listdir(cacheDir)
+                self.assertEqual(1, len(names))
+                self.assertEqual(distanceCalculator.getWallsKey(getLayout('tinyMaze').walls)
+                        + '.dist', names[0])
+        finally:
+            distanceCalculator.CACHE_MAX_BYTES = oldMaxBytes
+
+def _bfs(walls, source):
+    distances = {source: 0}
+    frontier = [source]
+
+    while (len(frontier) > 0):
+        nextFrontier = []
+
+        for (x, y) in frontier:
+            for neighbor in [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]:
+                if (not walls[neighbor[0]][neighbor[1]] and neighbor not in distances):
+                    distances[neighbor] = distances[(x, y)] + 1
+                    nextFrontier.append(neighbor)
+
+        frontier = nextFrontier
+
+    return distances
+
+if __name__ == '__main__':
+    unittest.main()
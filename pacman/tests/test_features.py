@@ -0,0 +1,69 @@
+import unittest
+
+from pacai.bin import pacman
+from pacai.core import features
+from pacai.core.layout import getLayout
+
+"""
+Test the cached evaluation features.
+"""
+class FeaturesTest(unittest.TestCase):
+
+    def test_feature_cache(self):
+        calls = []
+
+        def numFood(context, food):
+            calls.append(food)
+            return len(food)
+
+        evaluator = features.FeatureEvaluator([
+            features.Feature('numFood', numFood, [features.FOOD]),
+            features.Feature('score', lambda context, score: score, [features.SCORE]),
+        ], {'numFood': -1.0, 'score': 2.0})
+
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        expected = -state.getNumFood() + (2.0 * state.getScore())
+
+        self.assertEqual(expected, evaluator(state))
+
+        # A state with the same food (but the ghosts moved) reuses the value.
+        successor = state.generateSuccessor(1, state.getLegalActions(1)[0])
+        self.assertEqual(expected, evaluator(successor))
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(state.getFood().asList(), calls[0])
+        self.assertEqual(1, evaluator.getStats()['numFood']['hits'])
+
+        # Components can be overridden.
+        values = evaluator.getFeatures(state, {features.FOOD: 0})
+        self.assertEqual(0, values['numFood'])
+
+    def test_maze_distance(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        context = features.EvaluationContext(state.getInitialLayout())
+
+        position = state.getAgentPosition(0)
+        self.assertEqual(0, context.getDistance(position, position))
+
+        for dot in context.getFoodList(state.getFoodBits()):
+            self.assertGreaterEqual(context.getDistance(position, dot),
+                    abs(position[0] - dot[0]) + abs(position[1] - dot[1]))
+
+    def test_scared_ghost_position(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        state.getAgentState(1).setScaredTimer(10)
+
+        # Scared ghosts move at half speed, so this one is between two cells.
+        successor = state.generateSuccessor(1, state.getLegalActions(1)[0])
+        position = successor.getAgentState(1).getPosition()
+        self.assertNotEqual((int(position[0]), int(position[1])), position)
+
+        ghosts = features.COMPONENTS[features.GHOST_POSITIONS](successor)
+        self.assertEqual(position, ghosts[0])
+        self.assertEqual(tuple(successor.getGhostPositions()), ghosts)
+
+    def test_unknown_component(self):
+        self.assertRaises(ValueError, features.Feature, 'bad', None, ['bogus'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from pacai.bin import pacman
+from pacai.core import foodindex
+from pacai.core.layout import getLayout
+
+"""
+Test the nearest food index.
+"""
+class FoodIndexTest(unittest.TestCase):
+
+    def test_nearest(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        index = foodindex.getFoodIndex(state.getInitialLayout())
+        food = state.getFood().asList()
+
+        # Dense food walks the nearest cells, sparse food (a few dots) is checked directly.
+        for foodList in [food, food[::15]]:
+            foodBits = 0
+            for (x, y) in foodList:
+                foodBits |= 1 << (x * state.getFood().getHeight() + y)
+
+            for position in [state.getAgentPosition(0), foodList[0]]:
+                expected = sorted([(index.getDistance(position, dot), dot) for dot in foodList])
+                nearest = index.getNearest(foodBits, position, 3)
+
+                self.assertEqual([distance for (distance, dot) in expected[:3]],
+                        [distance for (distance, dot) in nearest])
+
+        self.assertEqual([], index.getNearest(0, state.getAgentPosition(0)))
+
+    def test_state_queries(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        position = state.getAgentPosition(0)
+
+        distance, dot = state.getNearestFood(position)[0]
+        self.assertEqual(distance, state.getFoodDistance(position))
+
+        # Successors share the answers until they eat.
+        successor = state.generateSuccessor(1, state.getLegalActions(1)[0])
+        self.assertIs(state.getNearestFood(position), successor.getNearestFood(position))
+
+        successor.eatFood(*dot)
+        self.assertNotEqual(dot, successor.getNearestFood(position)[0][1])
+        self.assertEqual(dot, state.getNearestFood(position)[0][1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import random
+import unittest
+
+from pacai.bin import capture
+from pacai.bin import pacman
+from pacai.core import zobrist
+from pacai.core.layout import getLayout
+
+"""
+Test the game states.
+"""
+class GameStateTest(unittest.TestCase):
+
+    def test_generate_successors(self):
+        # Batch successors should match the successors made one at a time.
+        rng = random.Random(4)
+
+        states = [
+            pacman.PacmanGameState(getLayout('mediumClassic')),
+            capture.CaptureGameState(capture.loadLayout('RANDOM13'), 100),
+        ]
+
+        for state in states:
+            agentIndex = 0
+            for i in range(100):
+                if (state.isOver()):
+                    self.assertEqual([], state.generateSuccessors(agentIndex))
+                    break
+
+                successors = state.generateSuccessors(agentIndex)
+
+                self.assertEqual(state.getLegalActions(agentIndex),
+                        [action for (action, successor) in successors])
+
+                for (action, successor) in successors:
+                    expected = state.generateSuccessor(agentIndex, action)
+                    self.assertEqual(expected, successor)
+                    self.assertEqual(hash(expected), hash(successor))
+                    self.assertEqual(expected.getScore(), successor.getScore())
+
+                state = rng.choice(successors)[1]
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_incremental_hash(self):
+        # The incrementally updated board hash always matches one computed from scratch.
+        rng = random.Random(7)
+
+        states = [
+            pacman.PacmanGameState(getLayout('mediumClassic')),
+            capture.CaptureGameState(capture.loadLayout('RANDOM13'), 100),
+        ]
+
+        for state in states:
+            self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+            agentIndex = 0
+            for i in range(200):
+                if (state.isOver()):
+                    break
+
+                action = rng.choice(state.getLegalActions(agentIndex))
+                state = state.generateSuccessor(agentIndex, action)
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+                self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+            for (x, y) in list(state.getCapsules()):
+                state.eatCapsule(x, y)
+                self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+            for (x, y) in state.getFood().asList()[:5]:
+                state.eatFood(x, y)
+                self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+            state.addScore(13)
+            self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+            state.setScore(-2.5)
+            self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+            state.endGame(True)
+            self.assertEqual(state._computeBoardHash(), state._boardHash)
+
+    def test_hash_move_order(self):
+        # The same state reached by moving the ghosts in a different order hashes the same.
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+
+        first = state
+        for agentIndex in [1, 2]:
+            first = first.generateSuccessor(agentIndex, first.getLegalActions(agentIndex)[0])
+
+        second = state
+        for agentIndex in [2, 1]:
+            second = second.generateSuccessor(agentIndex, state.getLegalActions(agentIndex)[0])
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(hash(state), hash(first))
+
+        # Equal scores hash the same, however they were reached.
+        first.addScore(10)
+        second.addScore(3)
+        second.addScore(7.0)
+        self.assertEqual(hash(first), hash(second))
+
+    def test_bounded_keys(self):
+        # Scores and agent configurations do not add stored keys.
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        hash(state)
+
+        numKeys = len(zobrist._keys)
+        for i in range(1000):
+            state.addScore(1)
+            state = state.generateSuccessor(1, state.getLegalActions(1)[0])
+            hash(state)
+
+        self.assertEqual(numKeys, len(zobrist._keys))
+
+if __name__ == '__main__':
+    unittest.main()
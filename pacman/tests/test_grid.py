@@ -0,0 +1,73 @@
+import unittest
+
+from pacai.core.grid import Grid
+
+"""
+Test the bitboard-backed grid.
+"""
+class GridTest(unittest.TestCase):
+    def test_get_set(self):
+        grid = Grid(3, 4)
+        self.assertEqual(0, grid.count())
+        self.assertEqual(12, grid.count(False))
+
+        grid[1][2] = True
+        grid.set(2, 0, True)
+
+        self.assertTrue(grid[1][2])
+        self.assertTrue(grid.get(2, 0))
+        self.assertFalse(grid[0][0])
+        self.assertEqual(2, grid.count())
+        self.assertEqual([(1, 2), (2, 0)], grid.asList())
+        self.assertEqual(10, len(grid.asList(False)))
+
+        grid[1][2] = False
+        self.assertFalse(grid[1][2])
+        self.assertEqual(1, grid.count())
+
+    def test_out_of_range(self):
+        grid = Grid(3, 4)
+        grid[1][0] = True
+
+        # (0, 4) is the same bit as (1, 0), but is not in the grid.
+        for (x, y) in [(0, 4), (3, 0), (0, -5), (-1, 0), (2, 4)]:
+            with self.assertRaises(IndexError):
+                grid.get(x, y)
+
+            with self.assertRaises(IndexError):
+                grid.set(x, y, True)
+
+        for (x, y) in [(0, 4), (3, 0), (0, -5)]:
+            with self.assertRaises(IndexError):
+                grid[x][y]
+
+        # Negative column indexes count from the end, like lists.
+        self.assertTrue(grid[1][-4])
+        self.assertEqual(1, grid.count())
+
+    def test_initial_value(self):
+        grid = Grid(5, 2, initialValue = True)
+        self.assertEqual(10, grid.count())
+        self.assertEqual([], grid.asList(False))
+
+    def test_copy(self):
+        grid = Grid(4, 4)
+        grid[3][3] = True
+
+        other = grid.copy()
+        self.assertEqual(grid, other)
+        self.assertEqual(hash(grid), hash(other))
+
+        other[3][3] = False
+        self.assertTrue(grid[3][3])
+        self.assertFalse(other[3][3])
+        self.assertNotEqual(grid, other)
+
+    def test_str(self):
+        grid = Grid(2, 2)
+        grid[0][1] = True
+
+        self.assertEqual('TF\nFF', str(grid))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from pacai.agents.base import BaseAgent
+from pacai.agents.search.mcts import MCTSAgent
+from pacai.bin import capture
+from pacai.bin import pacman
+from pacai.core import mctsTeam
+from pacai.core.layout import getLayout
+
+"""
+Test the Monte Carlo tree search agent.
+"""
+class MCTSAgentTest(unittest.TestCase):
+
+    def test_load_agent(self):
+        agent = BaseAgent.loadAgent('MCTSAgent', 0, {'iterations': '20'})
+        self.assertIsInstance(agent, MCTSAgent)
+
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        self.assertIn(agent.getAction(state), state.getLegalActions(0))
+
+        self.assertEqual(20, agent.getSearchStats()['iterations'])
+
+    def test_tree_reuse(self):
+        random.seed(0)
+
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        agent = MCTSAgent(0, iterations = 300, rolloutDepth = 5)
+
+        for i in range(3):
+            state = state.generateSuccessor(0, agent.getAction(state))
+            for ghostIndex in range(1, state.getNumAgents()):
+                state = state.generateSuccessor(ghostIndex,
+                        state.getLegalActions(ghostIndex)[0])
+
+        self.assertGreater(agent.getSearchStats()['reused'], 0)
+
+        # Without reuse, every search starts over.
+        agent = MCTSAgent(0, iterations = 300, rolloutDepth = 5, reuseTree = 'false')
+        agent.getAction(state)
+        agent.getAction(state)
+
+        self.assertEqual(0, agent.getSearchStats()['reused'])
+
+    def test_capture_team(self):
+        layout = capture.loadLayout('defaultCapture')
+        state = capture.CaptureGameState(layout, 100)
+
+        agents = mctsTeam.createTeam(0, 2, True, iterations = '10', rolloutPolicy = 'greedy')
+        for agent in agents:
+            self.assertIn(agent.getAction(state), state.getLegalActions(agent.index))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import time
+import unittest
+from unittest import mock
+
+from pacai.agents.search.ordering import MoveOrdering
+from pacai.bin import pacman
+from pacai.core.layout import getLayout
+from pacai.student import multiagents
+
+"""
+Test the multi-agent searchers.
+"""
+class MultiAgentSearchTest(unittest.TestCase):
+
+    def test_iterative_deepening(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+
+        for agentClass in [multiagents.AlphaBetaAgent, multiagents.ExpectimaxAgent]:
+            agent = agentClass(0, timeBudget = '0.05', tableSize = 1000)
+
+            startTime = time.time()
+            action = agent.getAction(state)
+
+            self.assertIn(action, state.getLegalActions(0))
+            self.assertLess(time.time() - startTime, 1.0)
+
+            # The fixed depth is restored after the search.
+            self.assertEqual(2, agent.getTreeDepth())
+
+    def test_auto_time_budget(self):
+        agent = multiagents.AlphaBetaAgent(0, timeBudget = 'auto')
+
+        # Without knowing the rules, searches are to a fixed depth.
+        self.assertIsNone(agent.getTimeBudget())
+
+        # The game passes the rules' time limits to the agents.
+        rules = pacman.ClassicGameRules(timeout = 2)
+        game = rules.newGame(getLayout('mediumClassic'), agent, [], None)
+        game._registerInitialState()
+
+        self.assertEqual(1.0, agent.getTimeBudget())
+
+    def test_move_ordering(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        successors = state.generateSuccessors(0)
+        actions = [action for (action, successor) in successors]
+
+        ordering = MoveOrdering(['killer', 'history'])
+
+        # Killers are per ply, and the latest killer is tried first.
+        ordering.recordCutoff(state, 0, 1, actions[-1], 3)
+        ordering.recordCutoff(state, 0, 1, actions[-2], 1)
+
+        ordered = [action for (action, successor)
+                in ordering.order(state, 0, 1, successors, True, None)]
+        self.assertEqual([actions[-2], actions[-1]], ordered[:2])
+
+        # Killers are forgotten between searches, but history is not.
+        ordering.newSearch()
+
+        ordered = [action for (action, successor)
+                in ordering.order(state, 0, 1, successors, True, None)]
+        self.assertEqual(actions[-1], ordered[0])
+
+        # A first action always comes first.
+        ordered = [action for (action, successor)
+                in ordering.order(state, 0, 1, successors, True, None, actions[1])]
+        self.assertEqual(actions[1], ordered[0])
+        self.assertEqual(sorted(actions), sorted(ordered))
+
+        # Without eval ordering, just the actions can be ordered.
+        self.assertEqual(ordered, ordering.orderActions(state, 0, 1, actions, actions[1]))
+        self.assertRaises(ValueError, MoveOrdering(['eval']).orderActions, state, 0, 0, actions)
+
+        self.assertRaises(ValueError, MoveOrdering, ['bogus'])
+
+    def test_lazy_successors(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        self.assertEqual(state.generateSuccessors(1), list(state.iterSuccessors(1)))
+
+        # Successors are only made as the search gets to them.
+        generated = []
+        originalInit = pacman.PacmanGameState._initSuccessor
+
+        def countingInit(self):
+            generated.append(True)
+            return originalInit(self)
+
+        with mock.patch.object(pacman.PacmanGameState, '_initSuccessor', countingInit):
+            agent = multiagents.AlphaBetaAgent(0, ordering = 'killer+history')
+            successors = iter(agent.getOrderedSuccessors(state, 1, 1))
+            action, successor = next(successors)
+
+            self.assertEqual(1, len(generated))
+            self.assertEqual(state.generateSuccessor(1, action), successor)
+
+            # Eval ordering (near the root) needs all of them.
+            generated.clear()
+            agent = multiagents.AlphaBetaAgent(0, ordering = 'eval')
+            agent.getOrderedSuccessors(state, 0, 0)
+            self.assertEqual(len(state.getLegalActions(0)), len(generated))
+
+    def test_parallel_search(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+
+        for agentClass in [multiagents.AlphaBetaAgent, multiagents.ExpectimaxAgent]:
+            serial = agentClass(0, depth = 2)
+            parallel = agentClass(0, depth = 2, workers = 2)
+
+            try:
+                for i in range(2):
+                    self.assertEqual(serial.getAction(state), parallel.getAction(state))
+
+                # The workers' nodes are counted too.
+                self.assertGreater(parallel.getSearchStats()['nodes'],
+                        0.9 * serial.getSearchStats()['nodes'])
+            finally:
+                parallel.final(state)
+
+    def test_search_stats(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+
+        plain = multiagents.AlphaBetaAgent(0, depth = 2)
+        ordered = multiagents.AlphaBetaAgent(0, depth = 2, ordering = 'eval+killer+history')
+
+        for agent in [plain, ordered]:
+            self.assertIn(agent.getAction(state), state.getLegalActions(0))
+
+            stats = agent.getSearchStats()
+            self.assertEqual(1, stats['searches'])
+            self.assertGreater(stats['nodes'], 1)
+            self.assertGreater(stats['meanBranchingFactor'], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from pacai.core.search import queues
+
+"""
+Test the indexed priority queues for the best first searches.
+"""
+class QueuesTest(unittest.TestCase):
+
+    def test_order(self):
+        for queue in [queues.IndexedPriorityQueue(), queues.BucketQueue()]:
+            self.assertTrue(queue.isEmpty())
+
+            # Values with a priority that is their position in the list.
+            values = [(x, 9 - x) for x in range(1, 10)]
+            for (value, priority) in values:
+                queue.push(value, priority)
+
+            self.assertEqual(len(values), len(queue))
+            for (value, priority) in reversed(values):
+                self.assertEqual((value, priority), queue.popWithPriority())
+
+            self.assertTrue(queue.isEmpty())
+
+    def test_stable_ties(self):
+        for queue in [queues.IndexedPriorityQueue(), queues.BucketQueue()]:
+            queue.pushMany([('a', 1), ('b', 0), ('c', 1), ('d', 0)])
+            self.assertEqual(['b', 'd', 'a', 'c'], [queue.pop() for i in range(4)])
+
+        # An item popped and pushed back at an old priority goes behind the items already there.
+        for queue in [queues.IndexedPriorityQueue(), queues.BucketQueue()]:
+            queue.pushMany([('a', 5), ('a', 3), ('b', 5)])
+            self.assertEqual('a', queue.pop())
+
+            queue.push('a', 5)
+            self.assertEqual(['b', 'a'], [queue.pop(), queue.pop()])
+            self.assertTrue(queue.isEmpty())
+
+    def test_decrease_key(self):
+        for queue in [queues.IndexedPriorityQueue(), queues.BucketQueue()]:
+            queue.pushMany([('a', 5), ('b', 3), ('c', 4)])
+
+            self.assertIn('a', queue)
+            self.assertTrue(queue.contains('c'))
+            self.assertFalse(queue.contains('z'))
+
+            self.assertFalse(queue.decreaseKey('a', 6))
+            self.assertTrue(queue.decreaseKey('a', 2))
+            self.assertEqual(2, queue.getPriority('a'))
+
+            # Pushing a queued item changes its priority (there are no duplicates).
+            queue.push('b', 7)
+            self.assertEqual(3, len(queue))
+
+            self.assertEqual(['a', 'c', 'b'], [queue.pop() for i in range(3)])
+            self.assertNotIn('a', queue)
+
+    def test_bucket_priorities(self):
+        queue = queues.BucketQueue()
+
+        self.assertRaises(ValueError, queue.push, 'a', -1)
+        self.assertRaises(ValueError, queue.push, 'a', 0.5)
+        self.assertRaises(IndexError, queue.pop)
+
+        # Priorities lower than the last one popped are still found.
+        queue.push('a', 3)
+        queue.push('b', 4)
+        self.assertEqual('a', queue.pop())
+
+        queue.push('c', 1)
+        self.assertEqual(['c', 'b'], [queue.pop(), queue.pop()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
+import io
 import os
 import tempfile
 import unittest
 
 from pacai.bin import capture
 from pacai.bin import pacman
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core import replay
 
 PACMAN_FILENAME = 'pacai_unittest_pacman.replay'
 CAPTURE_FILENAME = 'pacai_unittest_capture.replay'
@@ -35,5 +39,70 @@ class ReplayTest(unittest.TestCase):
 
         os.remove(replayPath)
 
+    def test_format_round_trip(self):
+        layout = Layout(['%%%%%', '%P.G%', '%%%%%'])
+        directions = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST,
+                Directions.STOP]
+        moves = [(i % 2, directions[i % len(directions)]) for i in range(1500)]
+
+        for compression in ['none', 'zlib']:
+            buffer = io.BytesIO()
+            replay.writeReplay(buffer, layout, moves, 2, {'seed': 42}, compression = compression)
+
+            buffer.seek(0)
+            with replay.ReplayReader(buffer) as reader:
+                self.assertEqual(42, reader.getHeader()['seed'])
+                self.assertEqual(str(layout), str(reader.getLayout()))
+                self.assertEqual(1, reader.getLayout().getNumGhosts())
+                self.assertEqual(moves, list(reader.actions()))
+
+        # Three bits a move.
+        buffer = io.BytesIO()
+        replay.writeReplay(buffer, layout, moves, 2, compression = 'none')
+        self.assertLess(len(buffer.getvalue()), 150 + (len(moves) * 3 // 8))
+
+    def test_format_errors(self):
+        layout = Layout(['%%%%%', '%P.G%', '%%%%%'])
+
+        with replay.ReplayWriter(io.BytesIO(), layout, 2) as writer:
+            writer.write(0, Directions.NORTH)
+            self.assertRaises(ValueError, writer.write, 0, Directions.NORTH)
+
+        self.assertRaises(ValueError, replay.ReplayReader, io.BytesIO(b'not a replay file'))
+
+    def test_seek(self):
+        replayPath = os.path.join(tempfile.gettempdir(), CAPTURE_FILENAME)
+
+        games = capture.main(['--null-graphics', '--seed', '7', '--record', replayPath])
+        moves = games[0].moveHistory
+
+        # Re-simulate the whole game to check against.
+        with replay.ReplayReader(replayPath) as reader:
+            rules, game = capture.newReplayGame(reader, None)
+            states = [game.state]
+            for move in reader.actions():
+                states.append(states[-1].generateSuccessor(*move))
+
+        self.assertEqual(len(moves) + 1, len(states))
+
+        moveIndexes = [0, 1, replay.KEYFRAME_INTERVAL, replay.KEYFRAME_INTERVAL + 1, len(moves)]
+        for moveIndex in moveIndexes:
+            state = capture.getReplayState(replayPath, moveIndex)
+            self.assertEqual(states[moveIndex].getSnapshot(), state.getSnapshot())
+            self.assertEqual(states[moveIndex].getRedFood(), state.getRedFood())
+
+            # A snapshot restored on the same layout is the same state.
+            restored = capture.CaptureGameState(states[0].getInitialLayout(), 0)
+            restored.loadSnapshot(states[moveIndex].getSnapshot())
+            self.assertEqual(states[moveIndex], restored)
+            self.assertEqual(hash(states[moveIndex]), hash(restored))
+
+        self.assertRaises(ValueError, capture.getReplayState, replayPath, len(moves) + 1)
+
+        capture.main(['--null-graphics', '--replay', replayPath, '--replay-from', '150',
+                '--replay-to', '160'])
+
+        os.remove(replayPath)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,276 @@
+import random
+import unittest
+
+from pacai.agents.search.base import SearchAgent
+from pacai.bin import pacman
+from pacai.core import corridors
+from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.directions import Directions
+from pacai.core.layout import getLayout
+from pacai.core.search import graph
+from pacai.core.search import heuristic
+from pacai.core.search import queues
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+from pacai.student import search
+
+class WeightedGraphProblem(SearchProblem):
+    """
+    A small explicit graph, {state: [(successor, cost), ...]}, where actions are the successors.
+    """
+
+    def __init__(self, edges, start, goal):
+        super().__init__()
+
+        self.edges = edges
+        self.start = start
+        self.goal = goal
+
+    def actionsCost(self, actions):
+        if (actions is None):
+            return 999999
+
+        state = self.start
+        total = 0
+        for action in actions:
+            total += dict(self.edges[state])[action]
+            state = action
+
+        return total
+
+    def isGoal(self, state):
+        return state == self.goal
+
+    def startingState(self):
+        return self.start
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+        return [(successor, successor, cost) for (successor, cost) in self.edges.get(state, [])]
+
+"""
+Test the graph searches.
+"""
+class GraphSearchTest(unittest.TestCase):
+
+    def test_paths(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        start = state.getAgentPosition(0)
+        distances = distanceCalculator.getDistances(state.getInitialLayout())
+
+        for goal in [(1, 1), start]:
+            expected = distances.getDistance(start, goal)
+
+            for function in [search.depthFirstSearch, search.breadthFirstSearch,
+                    search.bidirectionalSearch, search.corridorSearch,
+                    search.uniformCostSearch, search.aStarSearch, search.anytimeAStarSearch]:
+                problem = PositionSearchProblem(state, goal = goal)
+                if (function in [search.aStarSearch, search.anytimeAStarSearch]):
+                    path = function(problem, heuristic = heuristic.manhattan)
+                else:
+                    path = function(problem)
+
+                cost = problem.actionsCost(path)
+                if (function is search.depthFirstSearch):
+                    self.assertLessEqual(expected, cost)
+                else:
+                    self.assertEqual(expected, cost)
+
+    def test_bidirectional(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        distances = distanceCalculator.getDistances(state.getInitialLayout())
+        cells = state.getWalls().asList(False)
+
+        for (start, goal) in zip(cells[::7], cells[::-11]):
+            expected = distances.getDistance(start, goal)
+            self.assertEqual(expected, distance.maze(start, goal, state))
+
+            forward = PositionSearchProblem(state, goal = goal, start = start)
+            both = PositionSearchProblem(state, goal = goal, start = start)
+
+            path = search.bidirectionalSearch(both)
+            self.assertEqual(expected, both.actionsCost(path))
+
+            search.breadthFirstSearch(forward)
+            self.assertLessEqual(both.getExpandedCount(), forward.getExpandedCount() + 1)
+
+    def test_queues(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        distances = distanceCalculator.getDistances(state.getInitialLayout())
+        start = state.getAgentPosition(0)
+
+        for queue in [queues.IndexedPriorityQueue(), queues.BucketQueue()]:
+            problem = PositionSearchProblem(state, start = start)
+            path = graph.bestFirst(problem, heuristic = heuristic.manhattan, queue = queue)
+
+            self.assertEqual(distances.getDistance(start, (1, 1)), problem.actionsCost(path))
+
+    def test_beam_costs(self):
+        # A is reached again (more cheaply) through B after its child C made the beam,
+        # then A itself misses the beam.
+        edges = {
+            'S': [('A', 10), ('B', 1)],
+            'B': [('A', 1), ('E', 1)],
+            'A': [('C', 1)],
+            'C': [('D', 1)],
+            'D': [('G', 1)],
+        }
+        estimates = {'A': 100}
+        graphHeuristic = lambda state, problem: estimates.get(state, 0)
+
+        problem = WeightedGraphProblem(edges, 'S', 'G')
+        path = search.beamSearch(problem, graphHeuristic, width = 2)
+        self.assertEqual(['A', 'C', 'D', 'G'], path)
+        self.assertEqual(13, problem.actionsCost(path))
+
+        # Non-unit costs on a maze (like `pacai.agents.search.staydirection`).
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        for costFn in [lambda position: 0.5 ** position[0], lambda position: 2 ** position[0]]:
+            problem = PositionSearchProblem(state, costFn)
+            optimal = problem.actionsCost(search.uniformCostSearch(problem))
+
+            for width in [1, 3, 10]:
+                problem = PositionSearchProblem(state, costFn)
+                path = search.beamSearch(problem, heuristic.null, width = width)
+                if (path is not None):
+                    self.assertLessEqual(optimal, problem.actionsCost(path))
+
+    def test_corridors(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+        distances = distanceCalculator.getDistances(state.getInitialLayout())
+        cells = state.getWalls().asList(False)
+
+        graph = corridors.getCorridorGraph(state.getWalls())
+        self.assertIs(graph, corridors.getCorridorGraph(state.getWalls().copy()))
+        self.assertLess(graph.getNumNodes(), len(cells) / 2)
+
+        for start in cells[::5]:
+            for goal in cells[::3]:
+                expected = distances.getDistance(start, goal)
+                self.assertEqual(expected, graph.getDistance(start, goal))
+
+                problem = PositionSearchProblem(state, goal = goal, start = start)
+                self.assertEqual(expected, problem.actionsCost(search.corridorSearch(problem)))
+
+    def test_food_states(self):
+        state = pacman.PacmanGameState(getLayout('tinyMaze'))
+        problem = FoodSearchProblem(state)
+
+        start = problem.startingState()
+        position, foodGrid = problem.decodeState(start)
+        self.assertEqual(state.getPacmanPosition(), position)
+        self.assertEqual(state.getFood(), foodGrid)
+        self.assertEqual(state.getFood().asList(), problem.getFoodList(start))
+
+        # Moving onto food clears its bit.
+        for (successor, action, cost) in problem.successorStates(start):
+            nextPosition = problem.getPosition(successor)
+            self.assertEqual(state.hasFood(*nextPosition),
+                    problem.getFoodCount(successor) == problem.getFoodCount(start) - 1)
+
+        path = search.uniformCostSearch(problem)
+        self.assertEqual(len(path), problem.actionsCost(path))
+
+        problem = FoodSearchProblem(state)
+        self.assertEqual(len(path), len(search.aStarSearch(problem, heuristic.numFood)))
+
+    def test_food_heuristics(self):
+        state = pacman.PacmanGameState(getLayout('trickySearch'))
+
+        problem = FoodSearchProblem(state)
+        optimal = len(search.uniformCostSearch(problem))
+
+        for foodHeuristic in [heuristic.foodMST, heuristic.foodFarthestPair,
+                heuristic.foodMatching]:
+            problem = FoodSearchProblem(state)
+            self.assertLessEqual(foodHeuristic(problem.startingState(), problem), optimal)
+
+            path = search.aStarSearch(problem, heuristic = foodHeuristic)
+            self.assertEqual(optimal, problem.actionsCost(path))
+
+        self.assertIn(problem.startingState()[1], problem.heuristicInfo['food']['closestFood'])
+
+    def test_food_heuristics_admissible(self):
+        # Check every heuristic against the optimal cost from states along random walks.
+        state = pacman.PacmanGameState(getLayout('trickySearch'))
+        rng = random.Random(11)
+
+        problem = FoodSearchProblem(state)
+        samples = []
+        current = problem.startingState()
+
+        for i in range(60):
+            current = rng.choice(problem.successorStates(current))[0]
+            if (i % 4 == 0 and not problem.isGoal(current)):
+                samples.append(current)
+
+        for sample in samples:
+            problem = FoodSearchProblem(state)
+            problem.start = sample
+            optimal = len(search.aStarSearch(problem, heuristic.foodMST))
+
+            for foodHeuristic in [heuristic.foodMST, heuristic.foodFarthestPair,
+                    heuristic.foodMatching]:
+                self.assertLessEqual(foodHeuristic(sample, problem), optimal)
+
+    def test_bounded_searches(self):
+        state = pacman.PacmanGameState(getLayout('trickySearch'))
+
+        problem = FoodSearchProblem(state)
+        optimal = problem.actionsCost(search.aStarSearch(problem, heuristic.foodMST))
+        optimalStored = problem.getMaxStoredNodes()
+        self.assertGreater(optimalStored, 0)
+
+        problem = FoodSearchProblem(state)
+        path = search.weightedAStarSearch(problem, heuristic.foodMST, weight = 3)
+        self.assertLessEqual(optimal, problem.actionsCost(path))
+        self.assertLessEqual(problem.actionsCost(path), 3 * optimal)
+
+        problem = FoodSearchProblem(state)
+        path = search.beamSearch(problem, heuristic.foodMST, width = 10)
+        self.assertLessEqual(optimal, problem.actionsCost(path))
+
+        # Given enough time, ARA* ends with an optimal path.
+        problem = FoodSearchProblem(state)
+        path = search.anytimeAStarSearch(problem, heuristic.foodMST, timeBudget = 60)
+        self.assertEqual(optimal, problem.actionsCost(path))
+
+        # IDA* is optimal and only stores the current path.
+        problem = FoodSearchProblem(state)
+        path = search.iterativeDeepeningAStarSearch(problem, heuristic.foodMST)
+        self.assertEqual(optimal, problem.actionsCost(path))
+        self.assertLessEqual(problem.getMaxStoredNodes(), len(path) + 1)
+        self.assertLess(problem.getMaxStoredNodes(), optimalStored)
+
+    def test_unreachable(self):
+        state = pacman.PacmanGameState(getLayout('mediumClassic'))
+
+        # A goal in a wall can never be reached.
+        for function in [search.depthFirstSearch, search.breadthFirstSearch,
+                search.bidirectionalSearch, search.uniformCostSearch, search.beamSearch]:
+            problem = PositionSearchProblem(state, goal = (0, 0))
+            if (function is search.beamSearch):
+                self.assertIsNone(function(problem, heuristic = heuristic.null))
+            else:
+                self.assertIsNone(function(problem))
+
+    def test_search_agent_no_path(self):
+        # A beam one node wide walks into a dead end of the maze and finds no path.
+        state = pacman.PacmanGameState(getLayout('tinyMaze'))
+        agent = SearchAgent(0, fn = 'pacai.core.search.search.beam', width = '1')
+
+        with self.assertLogs(level = 'INFO') as logs:
+            agent.registerInitialState(state)
+
+        output = '\n'.join(logs.output)
+        self.assertIn('No path found', output)
+        self.assertIn('Search nodes expanded', output)
+        self.assertIn('Search nodes stored', output)
+        self.assertNotIn('Path found', output)
+
+        self.assertEqual(Directions.STOP, agent.getAction(state))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from pacai.agents.search import transposition
+from pacai.bin import pacman
+
+"""
+Test the transposition table for the multi-agent searchers.
+"""
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_probe_store(self):
+        table = transposition.TranspositionTable(16)
+        state = 'state'
+
+        self.assertIsNone(table.probe(state, 0, 2))
+
+        table.store(state, 0, 2, 10.0, transposition.LOWER, 'North')
+        entry = table.probe(state, 0, 2)
+
+        self.assertEqual(10.0, entry.value)
+        self.assertEqual(transposition.LOWER, entry.bound)
+        self.assertEqual('North', entry.move)
+
+        # The agent and remaining depth are part of the key.
+        self.assertIsNone(table.probe(state, 1, 2))
+        self.assertIsNone(table.probe(state, 0, 1))
+
+        self.assertEqual(4, table.getStats()['probes'])
+        self.assertEqual(1, table.getStats()['hits'])
+
+        # Move lookups (for move ordering) do not count as search probes.
+        self.assertEqual('North', table.getMove(state, 0, 2))
+        self.assertIsNone(table.getMove(state, 0, 3))
+
+        stats = table.getStats()
+        self.assertEqual((4, 1), (stats['probes'], stats['hits']))
+        self.assertEqual((2, 1), (stats['moveProbes'], stats['moveHits']))
+
+    def test_replacement(self):
+        # With a single slot, every entry collides.
+        deep = transposition.TranspositionTable(1, transposition.REPLACE_DEPTH)
+        deep.store('a', 0, 3, 1.0)
+        deep.store('b', 0, 1, 2.0)
+
+        self.assertIsNotNone(deep.probe('a', 0, 3))
+        self.assertIsNone(deep.probe('b', 0, 1))
+
+        # Entries from older searches are always replaced.
+        deep.newSearch()
+        deep.store('b', 0, 1, 2.0)
+        self.assertIsNotNone(deep.probe('b', 0, 1))
+
+        always = transposition.TranspositionTable(1, transposition.REPLACE_ALWAYS)
+        always.store('a', 0, 3, 1.0)
+        always.store('b', 0, 1, 2.0)
+
+        self.assertIsNone(always.probe('a', 0, 3))
+        self.assertIsNotNone(always.probe('b', 0, 1))
+
+        self.assertRaises(ValueError, transposition.TranspositionTable, 1, 'sometimes')
+
+    def test_get_bound(self):
+        self.assertEqual(transposition.UPPER, transposition.getBound(1, 1, 5))
+        self.assertEqual(transposition.EXACT, transposition.getBound(3, 1, 5))
+        self.assertEqual(transposition.LOWER, transposition.getBound(5, 1, 5))
+
+    def test_search_agents(self):
+        # The table should not change the moves of the deterministic searchers.
+        for agent in ['MinimaxAgent', 'AlphaBetaAgent']:
+            args = ['--null-graphics', '-l', 'mediumClassic', '-s', '4',
+                    '-p', 'pacai.student.multiagents.' + agent]
+
+            withoutTable = pacman.main(args + ['--agent-args', 'depth=2'])
+            withTable = pacman.main(args + ['--agent-args', 'depth=2,tableSize=10000'])
+
+            self.assertEqual(withoutTable[0].moveHistory, withTable[0].moveHistory)
+
+if __name__ == '__main__':
+    unittest.main()